@@ -1,19 +1,45 @@
+import os
+import re
+
 import pandas as pd
 import sqlite3
 
+# 表名、列名只能是普通标识符，不能作为参数绑定，拼接进 SQL 之前先校验
+_IDENTIFIER_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+# 按年分区的表，分区键为 'YYYY-MM-DD HH:MM:SS' 文本的 time 列
+PARTITIONED_TABLES = ('transactions',)
+PARTITION_KEY = 'time'
+
+
+def _identifier(name):
+    """校验并返回 SQL 标识符，防止表名、列名中夹带 SQL。"""
+    if not _IDENTIFIER_PATTERN.match(name):
+        raise ValueError(f"非法的表名或列名: {name!r}")
+    return name
+
+
+def _quote(name):
+    """把任意列名（例如 '交易时间'）转换为带引号的 SQL 标识符，与 to_sql 建表时的列名一致。"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
 class DatabaseManager:
     """
     用于管理 SQLite 数据库连接和 DataFrame 操作的类。
     """
-    def __init__(self, db_name):
+    def __init__(self, db_name, partition_dir=None):
         """
         初始化 DatabaseManager 实例。
 
         参数:
         db_name (str): 数据库文件名 (例如: 'mydatabase.db')。
+        partition_dir (str, 可选): 按年分区的数据库文件所在目录。默认为 None，表示与 db_name 同一目录。
         """
         self.db_name = db_name
+        self.partition_dir = partition_dir if partition_dir is not None else os.path.dirname(os.path.abspath(db_name))
         self.conn = None  # 初始化连接为 None，在需要时建立
+        self._attached = set()  # 当前连接上已附加的分区年份
 
     def connect(self):
         """
@@ -21,7 +47,7 @@ class DatabaseManager:
         """
         if self.conn is None:
             try:
-                self.conn = sqlite3.connect(self.db_name)
+                self.conn = sqlite3.connect(self.db_name, uri=True)  # uri=True 用于以只读方式附加分区
                 print(f"成功连接到数据库 '{self.db_name}'")
             except sqlite3.Error as e:
                 print(f"连接数据库时出错: {e}")
@@ -34,6 +60,7 @@ class DatabaseManager:
         if self.conn:
             self.conn.close()
             self.conn = None
+            self._attached = set()
             print(f"数据库 '{self.db_name}' 连接已关闭")
 
     def save_df(self, df, table_name, if_exists='fail', index=False):
@@ -59,15 +86,81 @@ class DatabaseManager:
             except Exception as e: # 捕获其他可能的异常
                 print(f"保存 DataFrame 时发生未知错误: {e}")
 
+    def save_df_chunks(self, chunks, table_name, index=False):
+        """
+        将分块产出的 DataFrame 依次追加到数据库表，内存占用只与单块大小有关。
+        所有块在同一个事务中写入，产出过程中出错（例如文件中途解析失败）时整个批次回滚。
+
+        参数:
+        chunks (iterable): 产出 Pandas DataFrame 的可迭代对象，例如 common_paser.parse_iter 的结果。
+        table_name (str): 表名。表不存在时按第一块的列创建。
+        index (bool, 可选): 是否将 DataFrame 索引写入数据库。默认为 False。
 
-    def query_df(self, table_name, query=None):
+        返回:
+        int: 写入的总行数。出错时整个批次回滚并返回 0。
+        """
+        self.connect()  # 确保连接已建立
+        total_rows = 0
+        if self.conn:
+            try:
+                with self.conn:  # 成功时提交，异常时回滚
+                    for chunk in chunks:
+                        frame = chunk.reset_index() if index else chunk
+                        if total_rows == 0:
+                            # 只用第一块的空表头建表，数据统一由下面的 executemany 在本事务中写入
+                            frame.head(0).to_sql(table_name, self.conn, if_exists='append', index=False)
+                        columns = [_quote(col) for col in frame.columns]
+                        values = frame.astype(object).where(frame.notna(), None)  # NaN/NaT 写入为 NULL
+                        self.conn.executemany(
+                            f"INSERT INTO {_quote(table_name)} ({', '.join(columns)}) "
+                            f"VALUES ({', '.join('?' * len(columns))})",
+                            values.itertuples(index=False, name=None))
+                        total_rows += len(frame)
+                print(f"已分块保存 {total_rows} 行到数据库 '{self.db_name}' 的表 '{table_name}'")
+            except Exception as e:
+                print(f"分块保存 DataFrame 时出错，已回滚: {e}")
+                return 0
+        return total_rows
+
+    def bulk_insert(self, df, table_name, columns=None, or_ignore=False):
+        """
+        用 executemany 在一个事务中把 DataFrame 批量写入已建好的表（例如 transactions），
+        不经过 to_sql 的类型推断，列类型以表定义为准。
+
+        参数:
+        df (pd.DataFrame): 要写入的 Pandas DataFrame，列名与表的列名一致。
+        table_name (str): 表名，表必须已存在。
+        columns (list, 可选): 要写入的列。默认为 None，表示 df 的全部列。
+        or_ignore (bool, 可选): 为 True 时使用 INSERT OR IGNORE，跳过违反唯一约束的行。默认为 False。
+
+        返回:
+        int: 写入的行数。出错时整个批次回滚并返回 0。
+        """
+        self.connect()  # 确保连接已建立
+        if not self.conn:
+            return 0
+        columns = list(df.columns) if columns is None else list(columns)
+        values = df[columns].astype(object).where(df[columns].notna(), None)  # NaN/NaT 写入为 NULL
+        verb = "INSERT OR IGNORE" if or_ignore else "INSERT"
+        sql = f"{verb} INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        try:
+            with self.conn:  # 成功时提交，异常时回滚
+                cursor = self.conn.executemany(sql, values.itertuples(index=False, name=None))
+            print(f"已批量写入 {cursor.rowcount} 行到数据库 '{self.db_name}' 的表 '{table_name}'")
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            print(f"批量写入时出错，已回滚: {e}")
+            return 0
+
+    def query_df(self, table_name, query=None, params=None):
         """
         从数据库表查询数据并返回 Pandas DataFrame。
 
         参数:
         table_name (str): 表名。
-        query (str, 可选): SQL 查询语句 (例如: "SELECT * FROM mytable WHERE column1 > 10")。
+        query (str, 可选): SQL 查询语句 (例如: "SELECT * FROM mytable WHERE column1 > ?")。
             如果为 None，则查询整个表 ("SELECT * FROM table_name")。 默认为 None。
+        params (tuple, 可选): 查询语句中 ? 占位符对应的参数。默认为 None。
 
         返回:
         pd.DataFrame: 从数据库查询到的 Pandas DataFrame。
@@ -75,10 +168,10 @@ class DatabaseManager:
         """
         self.connect() # 确保连接已建立
         if self.conn: # 只有当连接成功建立时才执行后续操作
-            if query is None:
-                query = f"SELECT * FROM {table_name}"
             try:
-                df = pd.read_sql_query(query, self.conn)
+                if query is None:
+                    query = f"SELECT * FROM {_identifier(table_name)}"
+                df = pd.read_sql_query(query, self.conn, params=params)
                 print(f"已从数据库 '{self.db_name}' 的表 '{table_name}' 成功查询 DataFrame")
                 return df
             except pd.io.sql.DatabaseError as e:
@@ -93,3 +186,250 @@ class DatabaseManager:
         else:
             return pd.DataFrame() # 如果连接失败，返回空 DataFrame
 
+    def iter_query(self, query, params=None, chunksize=10000):
+        """
+        分块执行参数化查询，逐块产出 DataFrame，内存占用只与块大小有关。
+
+        参数:
+        query (str): SQL 查询语句，参数使用 ? 占位符。
+        params (tuple, 可选): 占位符对应的参数。默认为 None。
+        chunksize (int, 可选): 每块的行数。默认为 10000。
+
+        产出:
+        pd.DataFrame: 查询结果中连续的一块。查询出错时抛出异常。
+        """
+        self.connect()  # 确保连接已建立
+        if not self.conn:
+            return
+        yield from pd.read_sql_query(query, self.conn, params=params, chunksize=chunksize)
+
+    def partition_path(self, year):
+        """
+        返回某一年分区的数据库文件路径，例如 bill_ledger.db 的 2021 年分区为 bill_ledger_2021.db。
+
+        参数:
+        year (int): 年份。
+
+        返回:
+        str: 分区文件路径。
+        """
+        stem = os.path.splitext(os.path.basename(self.db_name))[0]
+        return os.path.join(self.partition_dir, f"{stem}_{int(year)}.db")
+
+    def partition_years(self):
+        """
+        列出已存在的按年分区。
+
+        返回:
+        list: 升序排列的年份。
+        """
+        stem = os.path.splitext(os.path.basename(self.db_name))[0]
+        pattern = re.compile(rf'^{re.escape(stem)}_(\d{{4}})\.db$')
+        if not os.path.isdir(self.partition_dir):
+            return []
+        return sorted(int(match.group(1)) for match in map(pattern.match, os.listdir(self.partition_dir)) if match)
+
+    def _attach_partitions(self, years):
+        """
+        以只读方式附加查询需要的分区（别名 p2021 等），并分离不再需要的分区，
+        保证附加的数据库数量不超过 SQLite 的上限。
+        """
+        for year in self._attached - set(years):
+            self.conn.execute(f"DETACH DATABASE p{year}")
+            self._attached.discard(year)
+        for year in years:
+            if year not in self._attached:
+                uri = 'file:' + os.path.abspath(self.partition_path(year)).replace('?', '%3f').replace('#', '%23') + '?mode=ro'
+                self.conn.execute(f"ATTACH DATABASE ? AS p{year}", (uri,))
+                self._attached.add(year)
+
+    def _branches(self, table_name, start=None, end=None):
+        """
+        为查询选择数据来源：分区表只取与 [start, end) 时间范围重叠的年份分区和主库，每个来源一个分支。
+
+        返回:
+        list: 每个分支为 (FROM 子句中的表达式, 时间范围条件列表, 参数列表)。
+        """
+        table_name = _identifier(table_name)
+        bounds = [(f"{PARTITION_KEY} >= ?", start), (f"{PARTITION_KEY} < ?", end)]
+        conditions = [condition for condition, value in bounds if value is not None]
+        values = [value for _, value in bounds if value is not None]
+        years = []
+        if table_name in PARTITIONED_TABLES:
+            years = [year for year in self.partition_years()
+                     if (start is None or start < f"{year + 1}-01-01") and (end is None or end > f"{year}-01-01")]
+        self._attach_partitions(years)
+        if not years:
+            return [(table_name, conditions, values)]
+
+        columns = [row[1] for row in self.conn.execute(f"PRAGMA main.table_info({table_name})")]
+        branches = []
+        for schema in ['main'] + [f"p{year}" for year in years]:
+            # 归档后主库新增的列在旧分区中不存在，以 NULL 补齐；子查询会被 SQLite 展开，不影响索引的使用
+            present = {row[1] for row in self.conn.execute(f"PRAGMA {schema}.table_info({table_name})")}
+            source = f"{schema}.{table_name}"
+            if not present >= set(columns):
+                select = ", ".join(col if col in present else f"NULL AS {col}" for col in columns)
+                source = f"(SELECT {select} FROM {source})"
+            branches.append((source, conditions, values))
+        return branches
+
+    def _route(self, table_name, start=None, end=None):
+        """
+        把 _branches 的各个分支用 UNION ALL 合并为一个数据来源，时间条件下推到每个分支，
+        各分支用自己的 time 索引筛选时间范围；合并结果的排序需要读取范围内的全部行，只适合 query_range 这样
+        本来就要读取全部结果的查询，分页查询见 query_page。
+
+        返回:
+        tuple: (FROM 子句中的表达式, 参数列表)。
+        """
+        branches = self._branches(table_name, start, end)
+        if len(branches) == 1 and not branches[0][1]:
+            return branches[0][0], []
+        selects = []
+        params = []
+        for source, conditions, values in branches:
+            branch = f"SELECT * FROM {source}"
+            if conditions:
+                branch += " WHERE " + " AND ".join(conditions)
+                params.extend(values)
+            selects.append(branch)
+        return f"({' UNION ALL '.join(selects)})", params
+
+    def query_range(self, table_name, start=None, end=None, columns=None, where=None, params=()):
+        """
+        按时间范围查询分区表，只读取与范围重叠的年份分区，结果按 (time, id) 排序。
+
+        参数:
+        table_name (str): 表名，例如 'transactions'。
+        start (str, 可选): 起始时间 (含)，例如 '2021-01-01'。默认为 None，不限制。
+        end (str, 可选): 结束时间 (不含)。默认为 None，不限制。
+        columns (list, 可选): 要查询的列。默认为 None，表示全部列。
+        where (str, 可选): 额外的过滤条件，参数使用 ? 占位符。
+        params (tuple, 可选): where 中占位符对应的参数。
+
+        返回:
+        pd.DataFrame: 查询结果。
+        """
+        self.connect()  # 确保连接已建立
+        if not self.conn:
+            return pd.DataFrame()
+        source, route_params = self._route(table_name, start, end)
+        select = "*" if columns is None else ", ".join(_identifier(col) for col in columns)
+        query = f"SELECT {select} FROM {source}"
+        if where:
+            query += f" WHERE {where}"
+        query += f" ORDER BY {PARTITION_KEY}, id"
+        return pd.read_sql_query(query, self.conn, params=route_params + list(params))
+
+    def _page_segments(self, key, after, descending):
+        """
+        把键集分页拆成翻页键第一列为空和不为空的两段，分别用 (key[1:]) 和 (key) 做键集比较。
+
+        行值比较遇到 NULL 的结果为 NULL，第一列为空的行既无法作为翻页键，也无法被比较条件选中，
+        因此单独成段：空值段只按其余的键列 (通常是 id) 排序。两段的先后与 SQLite 的排序一致，
+        升序时空值在前，降序时空值在后。
+
+        返回:
+        list: 从 after 所在的段开始的 (条件, 参数, 用于比较和排序的键列) 列表。
+        """
+        null_segment = [f"{key[0]} IS NULL", key[1:]]
+        value_segment = [f"{key[0]} IS NOT NULL", key]
+        segments = [value_segment, null_segment] if descending else [null_segment, value_segment]
+        if after is not None:
+            first = segments.index(null_segment if after[0] is None else value_segment)
+            segments = segments[first:]
+        result = []
+        for i, (condition, columns) in enumerate(segments):
+            params = []
+            if i == 0 and after is not None:  # 只有 after 所在的段需要从翻页键之后开始
+                values = list(after[len(key) - len(columns):])
+                condition += f" AND ({', '.join(columns)}) {'<' if descending else '>'} ({', '.join('?' * len(columns))})"
+                params.extend(values)
+            result.append((condition, params, columns))
+        return result
+
+    def query_page(self, table_name, columns=None, where=None, params=(), after=None, limit=100,
+                   descending=False, key=('time', 'id'), start=None, end=None):
+        """
+        按 (time, id) 做键集分页 (keyset pagination) 查询一页数据。
+
+        与 OFFSET 分页不同，下一页从上一页最后一行的键之后开始，借助 (time) 索引直接定位，
+        翻到多深都只读取一页的行。翻页键第一列为空的行单独成段，同样逐页读出，见 _page_segments。
+        分区表的每个分区各自按索引读取一页再合并，附加的分区越多，每页读取的行数按分区数成倍增加，
+        但与账簿总行数无关。
+
+        参数:
+        table_name (str): 表名。
+        columns (list, 可选): 要查询的列。默认为 None，表示全部列。
+        where (str, 可选): 额外的过滤条件，参数使用 ? 占位符，例如 "source = ? AND time >= ?"。
+        params (tuple, 可选): where 中占位符对应的参数。
+        after (tuple, 可选): 上一页返回的翻页键。默认为 None，表示第一页。
+        limit (int, 可选): 每页行数。默认为 100。
+        descending (bool, 可选): 是否按键倒序（最新的在前）。默认为 False。
+        key (tuple, 可选): 翻页键的列，只有第一列可以为空，最后一列须唯一。默认为 ('time', 'id')。
+        start (str, 可选): 起始时间 (含)。给出 start 或 end 时，分区表只读取与时间范围重叠的年份分区。
+        end (str, 可选): 结束时间 (不含)。
+
+        返回:
+        tuple: (pd.DataFrame, 下一页的翻页键)；没有更多数据时翻页键为 None。
+        """
+        key = [_identifier(col) for col in key]
+        # 翻页键的列不在查询列中时也要取出，用于计算下一页的键
+        extra_keys = [] if columns is None else [col for col in key if col not in columns]
+        select = "*" if columns is None else ", ".join(_identifier(col) for col in list(columns) + extra_keys)
+
+        self.connect()  # 确保连接已建立
+        if not self.conn:
+            return pd.DataFrame(), None
+        branches = self._branches(table_name, start, end)
+        pages = []
+        remaining = limit
+        for condition, segment_params, segment_key in self._page_segments(key, after, descending):
+            order = ", ".join(f"{col} {'DESC' if descending else 'ASC'}" for col in segment_key)
+            # 每个分支各自按索引顺序读取至多 remaining 行，再合并取前 remaining 行，不对整个范围排序
+            branch_pages = []
+            for source, range_conditions, range_params in branches:
+                conditions = list(range_conditions) + ([f"({where})"] if where else []) + [condition]
+                query = f"SELECT {select} FROM {source} WHERE {' AND '.join(conditions)} ORDER BY {order} LIMIT ?"
+                branch_pages.append(pd.read_sql_query(query, self.conn, params=list(range_params) + list(params)
+                                                      + segment_params + [remaining]))
+            page = branch_pages[0]
+            if len(branch_pages) > 1:
+                page = pd.concat([branch for branch in branch_pages if not branch.empty] or branch_pages[:1],
+                                 ignore_index=True)
+                page = page.sort_values(segment_key, ascending=not descending, kind='stable',
+                                        ignore_index=True).head(remaining)
+            pages.append(page)
+            remaining -= len(page)
+            if remaining == 0:
+                break
+        filled = [page for page in pages if not page.empty]
+        page = pd.concat(filled, ignore_index=True) if len(filled) > 1 else (filled or pages)[0]
+        next_key = None
+        if len(page) == limit:
+            last = (page[col].iloc[-1:].tolist()[0] for col in key)
+            next_key = tuple(None if pd.isna(value) else value for value in last)
+        if extra_keys:
+            page = page.drop(columns=extra_keys)
+        return page, next_key
+
+    def iter_pages(self, table_name, page_size=1000, **kwargs):
+        """
+        从第一页开始按键集分页遍历整个查询结果，逐页产出 DataFrame。
+
+        参数:
+        table_name (str): 表名。
+        page_size (int, 可选): 每页行数。默认为 1000。
+        **kwargs: 传给 query_page 的其他参数 (columns, where, params, descending, key, start, end)。
+
+        产出:
+        pd.DataFrame: 一页数据。
+        """
+        after = None
+        while True:
+            page, after = self.query_page(table_name, after=after, limit=page_size, **kwargs)
+            if not page.empty:
+                yield page
+            if after is None:
+                return
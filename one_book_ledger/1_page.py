@@ -1,12 +1,10 @@
 import streamlit as st
-from one_book_ledger.database_helper import DatabaseHelper
+from one_book_ledger.gui.web import bill_files
 
 def main():
     st.title("One-Book-Ledger - 账单文件列表")
 
-    db_helper = DatabaseHelper()
-    bill_files_data = db_helper.get_bill_files() # 获取账单文件列表数据 (列表字典格式)
-    db_helper.close_connection()
+    bill_files_data = bill_files() # 获取账单文件列表数据 (列表字典格式)，没有新的写入时读取缓存
 
     if bill_files_data:
         st.subheader("已上传账单文件")
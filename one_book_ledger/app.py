@@ -1,9 +1,8 @@
 import streamlit as st
-from database_helper import DatabaseHelper
-from upload_handler import bill_file_uploader
-
-# 预定义的账单类型
-BILL_TYPES = ["微信账单", "支付宝账单", "中信银行账单", "浦发银行账单"]
+from one_book_ledger.gui.web import bill_files
+from one_book_ledger.bill_parser.registry import BILL_TYPES
+from one_book_ledger.upload_handler import AUTO_DETECT_BILL_TYPE, RESOURCES_DIR, bill_file_uploader
+from one_book_ledger.ledger_manager.importer import import_folder
 
 def main():
     st.title("One-Book-Ledger - 账单文件列表")
@@ -15,9 +14,7 @@ def main():
     if "bill_file_content" not in st.session_state:  # Initialize bill_file_content in session_state
         st.session_state.bill_file_content = None
 
-    db_helper = DatabaseHelper()
-    st.session_state.bill_files_data = db_helper.get_bill_files()
-    db_helper.close_connection()
+    st.session_state.bill_files_data = bill_files()  # 没有新的上传或导入时直接读取缓存
 
     if st.session_state.bill_files_data:
         st.subheader("已上传账单文件")
@@ -36,18 +33,37 @@ def main():
 
     st.subheader("上传账单文件")
     with st.form("upload_form"):
-        uploaded_file = st.file_uploader("请选择账单文件", type=["csv", "xls", "xlsx"])
-        selected_bill_type = st.selectbox("选择账单类型", BILL_TYPES)
+        uploaded_files = st.file_uploader("请选择账单文件", type=["csv", "xls", "xlsx"], accept_multiple_files=True)
+        selected_bill_type = st.selectbox("选择账单类型", [AUTO_DETECT_BILL_TYPE] + BILL_TYPES)
         submit_button = st.form_submit_button("上传")
         if submit_button:
-            upload_result = bill_file_uploader(uploaded_file, selected_bill_type)
-            if upload_result["status"]:
-                st.success(upload_result["message"])
-            else:
-                st.session_state.bill_file_content = None # Clear bill content on error/warning
-                st.warning(upload_result["message"])
+            for uploaded_file in uploaded_files or [None]:  # 未选择文件时也给出提示
+                upload_result = bill_file_uploader(uploaded_file, selected_bill_type)
+                if upload_result["status"]:
+                    st.success(upload_result["message"])
+                elif upload_result.get("duplicate"):
+                    st.info(upload_result["message"])  # 重复上传，未做任何处理
+                else:
+                    st.session_state.bill_file_content = None # Clear bill content on error/warning
+                    st.warning(upload_result["message"])
             st.rerun()
 
+    st.subheader("导入账单文件夹")
+    st.caption(f"解析 '{RESOURCES_DIR}' 中所有尚未导入的账单文件，并入统一账簿")
+    if st.button("导入账簿"):
+        progress_bar = st.progress(0.0, text="正在扫描账单文件夹...")
+
+        def report_progress(done, total, path, error):
+            status = "解析完成" if error is None else f"解析失败: {error}"
+            progress_bar.progress(done / total, text=f"[{done}/{total}] {path} {status}")
+
+        import_result = import_folder(RESOURCES_DIR, progress=report_progress)
+        progress_bar.empty()
+        st.success(f"已导入 {import_result['files']} 个文件，共 {import_result['rows']} 条交易记录，"
+                   f"其中 {import_result['mirrors']} 条银行记录与钱包记录重复，已标记为镜像")
+        for path, error in import_result["failed"].items():
+            st.warning(f"文件 '{path}' 导入失败: {error}")
+
 
 
 if __name__ == "__main__":
@@ -1,25 +1,36 @@
-from one_book_ledger.bill_parser.common_paser import parse
+from one_book_ledger.bill_parser.common_paser import DEFAULT_CHUNKSIZE, parse, parse_iter
 
+ENCODING = 'gbk'
+SKIP_LINES = 24
+COLUMN_MAPPING = [
+    ('交易时间', '交易时间', None),
+    ('交易分类', '交易分类', None),  # 使用映射函数
+    ('交易对方', '交易对方', None),
+    ('商品说明', '交易说明', None),
+    ('金额', '交易金额', None),
+    ('收/支', '收/支', None),
+    ('收/付款方式', '收/付款账户', None),
+    ('交易状态', '交易状态', None)
+]
+EXTRA_COLUMNS = {'统计账单': '支付宝'}
 
-def parse_alipay_csv(input_f):
+
+def parse_alipay_csv(input_f, skip_lines=SKIP_LINES):
     """解析支付宝CSV文件。
 
     Args:
         input_f (str): 输入CSV文件路径。
+        skip_lines (int, optional): 表头之前需要跳过的行数。默认为 SKIP_LINES。
     """
-    encoding = 'gbk'
-    skip_lines = 24
-    column_mapping = [
-        ('交易时间', '交易时间', None),
-        ('交易分类', '交易分类', None),  # 使用映射函数
-        ('交易对方', '交易对方', None),
-        ('商品说明', '交易说明', None),
-        ('金额', '交易金额', None),
-        ('收/支', '收/支', None),
-        ('收/付款方式', '收/付款账户', None),
-        ('交易状态', '交易状态', None)
-    ]
-    extra_columns = {'统计账单': '支付宝'}
-    return parse(input_f, column_mapping, extra_columns, encoding, skip_lines)
+    return parse(input_f, COLUMN_MAPPING, EXTRA_COLUMNS, ENCODING, skip_lines)
+
 
+def iter_alipay_csv(input_f, chunksize=DEFAULT_CHUNKSIZE, skip_lines=SKIP_LINES):
+    """分块解析支付宝CSV文件，逐块产出转换后的 DataFrame。
 
+    Args:
+        input_f (str): 输入CSV文件路径。
+        chunksize (int, optional): 每块的行数。
+        skip_lines (int, optional): 表头之前需要跳过的行数。默认为 SKIP_LINES。
+    """
+    return parse_iter(input_f, COLUMN_MAPPING, EXTRA_COLUMNS, ENCODING, skip_lines, chunksize=chunksize)
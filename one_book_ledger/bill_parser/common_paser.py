@@ -1,30 +1,79 @@
 import os
 from one_book_ledger.bill_parser.utils import (
+    get_source_name,
     read_csv_to_dataframe,
     read_excel_to_dataframe,  # 导入 read_excel_to_dataframe
+    iter_csv_chunks,
+    iter_excel_chunks,
     transform_dataframe,
-    add_constant_column,
 )
 
+# parse_iter 默认每块的行数
+DEFAULT_CHUNKSIZE = 10000
+# 取值种类很少、转换后不再被修改的目标列，直接映射到这些列的原始列按 category 读取
+CATEGORICAL_TARGETS = frozenset({'收/支'})
 
-def parse(input_f, column_mapping, extra_columns=None, encoding=None, skip_lines=0):
+
+def mapped_columns(column_mapping):
+    """列映射中用到的原始列名（去重并保持顺序），读取文件时只需要这些列。"""
+    return list(dict.fromkeys(old_col for old_col, _, _ in column_mapping))
+
+
+def read_plan(column_mapping):
+    """由列映射生成读取计划，作为读取函数的关键字参数。
+
+    只读取映射中用到的原始列，其余列（订单号、备注等）不会被解析。原始列一律按字符串读取，
+    类型转换交给映射中的转换函数；只直接映射到 CATEGORICAL_TARGETS 的列按 category 读取。
+
+    Args:
+        column_mapping (list): 列映射关系列表，包含三元组 (原始列名, 目标列名, 转换函数)。
+
+    Returns:
+        dict: {'usecols': 原始列名列表, 'dtype': {原始列名: 类型}}。
+    """
+    usecols = mapped_columns(column_mapping)
+    dtype = {}
+    for col in usecols:
+        targets = [(new_col, func) for old_col, new_col, func in column_mapping if old_col == col]
+        if all(func is None and new_col in CATEGORICAL_TARGETS for new_col, func in targets):
+            dtype[col] = 'category'
+        else:
+            dtype[col] = 'str'
+    return {'usecols': usecols, 'dtype': dtype}
+
+
+def _finish_frame(df, column_mapping, extra_columns=None, post_process=None):
+    """对读取到的原始数据做列转换、添加常量列和解析器自定义的后处理。"""
+    transformed_df = transform_dataframe(df, column_mapping)
+
+    if extra_columns:
+        transformed_df = transformed_df.assign(**extra_columns)  # 一次性添加全部常量列
+
+    if post_process is not None:
+        transformed_df = post_process(transformed_df)
+
+    return transformed_df
+
+
+def parse(input_f, column_mapping, extra_columns=None, encoding=None, skip_lines=0, post_process=None):
     """
     通用CSV/Excel解析方法，根据文件后缀名判断调用不同的读取函数。
 
     Args:
-        input_f (str): 输入文件路径。
+        input_f (str | file-like): 输入文件路径，或带文件名的上传文件对象（如 Streamlit 的 UploadedFile）。
         column_mapping (list): 列映射关系列表，包含三元组 (原始列名, 目标列名, 转换函数)。
         extra_columns (dict, optional): 额外的常量列，键为列名，值为常量值。默认为None。
         encoding (str, optional): 文件编码格式。默认为 None，表示自动检测。
         skip_lines (int, optional): 需要跳过的行数。默认为 0。
+        post_process (callable, optional): 对转换后的 DataFrame 做的额外处理，接收并返回 DataFrame。默认为None。
     """
     try:
-        file_extension = os.path.splitext(input_f)[1].lower()  # 获取文件后缀名并转换为小写
+        file_extension = os.path.splitext(get_source_name(input_f))[1].lower()  # 获取文件后缀名并转换为小写
 
         if file_extension == '.csv':
-            df = read_csv_to_dataframe(input_f, encoding=encoding, skip_lines=skip_lines)
+            df = read_csv_to_dataframe(input_f, encoding=encoding, skip_lines=skip_lines, **read_plan(column_mapping))
         elif file_extension == '.xlsx' or file_extension == '.xls':  # 支持 xlsx 和 xls 格式
-            df = read_excel_to_dataframe(input_f, skiprows=skip_lines)  # 默认读取第一个 sheet
+            df = read_excel_to_dataframe(input_f, skiprows=skip_lines, **read_plan(column_mapping))  # 默认读取第一个 sheet
         else:
             print(f"不支持的文件格式: {file_extension}")
             return
@@ -32,13 +81,48 @@ def parse(input_f, column_mapping, extra_columns=None, encoding=None, skip_lines
         if df is None:
             return
 
-        transformed_df = transform_dataframe(df, column_mapping)
+        return _finish_frame(df, column_mapping, extra_columns, post_process)
 
-        if extra_columns:
-            for col_name, value in extra_columns.items():
-                transformed_df = add_constant_column(transformed_df, col_name, value)
+    except Exception as e:
+        print(f"解析文件出错: {e}")
+
+
+def parse_iter(input_f, column_mapping, extra_columns=None, encoding=None, skip_lines=0,
+               chunksize=DEFAULT_CHUNKSIZE, post_process=None):
+    """
+    分块解析CSV/Excel文件，逐块产出转换后的 DataFrame。
+
+    与 parse 的参数和转换规则相同，但不会一次性构造整个文件的 DataFrame，
+    适合把大文件直接分块写入数据库。读取或转换出错时打印错误并重新抛出异常，
+    调用方据此回滚已写入的块（见 DatabaseManager.save_df_chunks）；不支持的文件格式不产出任何块。
+
+    Args:
+        input_f (str | file-like): 输入文件路径，或带文件名的上传文件对象。
+        column_mapping (list): 列映射关系列表，包含三元组 (原始列名, 目标列名, 转换函数)。
+        extra_columns (dict, optional): 额外的常量列，键为列名，值为常量值。默认为None。
+        encoding (str, optional): 文件编码格式。默认为 None，表示自动检测。
+        skip_lines (int, optional): 需要跳过的行数。默认为 0。
+        chunksize (int, optional): 每块的行数。默认为 DEFAULT_CHUNKSIZE。
+        post_process (callable, optional): 对每块转换结果做的额外处理。默认为None。
+
+    Yields:
+        pandas.DataFrame: 转换后的一块数据。
+    """
+    try:
+        file_extension = os.path.splitext(get_source_name(input_f))[1].lower()
+
+        if file_extension == '.csv':
+            chunks = iter_csv_chunks(input_f, chunksize, skip_lines=skip_lines, encoding=encoding,
+                                     **read_plan(column_mapping))
+        elif file_extension == '.xlsx' or file_extension == '.xls':
+            chunks = iter_excel_chunks(input_f, chunksize, skiprows=skip_lines, **read_plan(column_mapping))
+        else:
+            print(f"不支持的文件格式: {file_extension}")
+            return
 
-        return transformed_df
+        for chunk in chunks:
+            yield _finish_frame(chunk, column_mapping, extra_columns, post_process)
 
     except Exception as e:
         print(f"解析文件出错: {e}")
+        raise  # 调用方可能已经写入了前面的块，必须知道文件没有完整解析
@@ -1,5 +1,40 @@
 import datetime
 
+import numpy as np
+import pandas as pd
+
+# 列级（向量化）转换实现注册表：逐行转换函数 -> 接收并返回 Series 的函数
+VECTORIZED_CONVERTERS = {}
+
+
+def register_vectorized(row_func):
+    """为逐行转换函数注册列级（向量化）实现的装饰器。
+
+    transform_dataframe 遇到已注册的转换函数时，会对整列调用向量化实现，
+    未注册的函数仍通过 Series.apply 逐行调用。向量化实现的结果须与逐行函数一致。
+
+    Args:
+        row_func (callable): 逐行转换函数。
+
+    Returns:
+        callable: 装饰器，被装饰函数接收一个 Series 并返回等长的 Series。
+    """
+    def decorator(series_func):
+        VECTORIZED_CONVERTERS[row_func] = series_func
+        return series_func
+    return decorator
+
+
+def get_vectorized_converter(row_func):
+    """获取逐行转换函数对应的列级实现，没有时返回 None。"""
+    return VECTORIZED_CONVERTERS.get(row_func)
+
+
+def _as_str_series(series):
+    """将 Series 转换为字符串列，空值保持为空值。"""
+    return series.where(series.isna(), series.astype(str))
+
+
 def convert_date_format(date_str, time_str="00:00:00"):
     """
     将'YYYYMMDD'格式的日期字符串转换为'YYYY-MM-DD HH:MM:SS'格式的日期时间字符串。
@@ -61,4 +96,81 @@ def get_income_or_expense(amount):
         else:
             return "其他"  # 金额为零
     except ValueError:
-        return None  # 金额格式不正确
\ No newline at end of file
+        return None  # 金额格式不正确
+
+
+def extract_account(trade_summary):
+    """
+    从交易摘要中提取收付款账户。
+
+    Args:
+        trade_summary (str): 交易摘要字符串，例如 '财付通-起点中文网'。
+
+    Returns:
+        str: 收付款账户名称，例如 '财付通'。
+           如果交易摘要不包含 '-'，则返回 None。
+    """
+    if '-' in trade_summary:
+        return trade_summary.split('-')[0]
+    else:
+        return None
+
+def extract_description(trade_summary):
+    """
+    从交易摘要中提取商品描述。
+
+    Args:
+        trade_summary (str): 交易摘要字符串，例如 '财付通-起点中文网'。
+
+    Returns:
+        str: 商品描述，例如 '起点中文网'。
+           如果交易摘要不包含 '-'，则直接返回交易摘要。
+    """
+
+    if '-' in trade_summary:
+        return trade_summary.split('-')[1]
+    else:
+        return trade_summary
+
+
+# -------------------------------- 列级（向量化）实现 ---------------------------------
+
+@register_vectorized(convert_date_format)
+def convert_date_format_series(date_series):
+    """convert_date_format 的列级实现，一次性按 '%Y%m%d' 解析整列日期。"""
+    parsed = pd.to_datetime(_as_str_series(date_series), format='%Y%m%d', errors='coerce')
+    formatted = parsed.dt.strftime('%Y-%m-%d %H:%M:%S').astype(object)
+    return formatted.where(parsed.notna(), None)
+
+
+@register_vectorized(remove_sign)
+def remove_sign_series(amount_series):
+    """remove_sign 的列级实现，使用 to_numeric 加 abs 代替逐行 float()。"""
+    amounts = pd.to_numeric(amount_series, errors='coerce').abs()
+    formatted = amounts.map('{:.2f}'.format, na_action='ignore').astype(object)
+    return formatted.where(amounts.notna(), None)
+
+
+@register_vectorized(get_income_or_expense)
+def get_income_or_expense_series(amount_series):
+    """get_income_or_expense 的列级实现，按金额符号映射收支方向。"""
+    amounts = pd.to_numeric(amount_series, errors='coerce').to_numpy(dtype=float)
+    sign = np.sign(amounts)
+    result = np.select([sign > 0, sign < 0, sign == 0], ["支出", "收入", "其他"], default=None)
+    return pd.Series(result, index=amount_series.index, dtype=object)
+
+
+@register_vectorized(extract_account)
+def extract_account_series(summary_series):
+    """extract_account 的列级实现，使用 str.split 一次性拆分整列交易摘要。"""
+    has_dash = summary_series.str.contains('-', regex=False, na=False)
+    accounts = summary_series.str.split('-', n=1).str[0].astype(object)
+    return accounts.where(has_dash, None)
+
+
+@register_vectorized(extract_description)
+def extract_description_series(summary_series):
+    """extract_description 的列级实现，取第一个与第二个 '-' 之间的内容。"""
+    has_dash = summary_series.str.contains('-', regex=False, na=False)
+    descriptions = summary_series.str.split('-', n=2).str[1].astype(object)
+    return descriptions.where(has_dash, summary_series.astype(object))
@@ -0,0 +1,165 @@
+"""
+解析结果缓存：按文件内容哈希和解析器版本缓存转换后的 DataFrame。
+
+缓存文件保存在缓存目录中，安装了 pyarrow 时使用 Feather（列式存储，读取时内存映射），
+否则退回 pickle。缓存目录总大小超过上限时，按最近使用时间淘汰最旧的文件。
+"""
+import hashlib
+import inspect
+import logging
+import os
+import tempfile
+
+import pandas as pd
+
+from one_book_ledger.bill_parser import (
+    alipay_parser,
+    common_paser,
+    field_convert,
+    pufa_parser,
+    registry,
+    utils,
+    wechat_parser,
+    zhongxin_parser,
+)
+from one_book_ledger.bill_parser.registry import resolve_parser
+from one_book_ledger.bill_parser.utils import get_source_name, open_bill_buffer
+
+try:
+    import pyarrow  # noqa: F401  可选依赖，仅用于 Feather 格式
+    CACHE_SUFFIX = '.feather'
+except ImportError:
+    pyarrow = None
+    CACHE_SUFFIX = '.pkl'
+
+# 默认缓存目录
+PARSE_CACHE_DIR = '.parse_cache'
+# 缓存目录的大小上限（字节）
+PARSE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _parser_version():
+    """由解析相关模块的源码计算解析器版本，修改任何解析或转换逻辑都会使旧缓存失效。"""
+    digest = hashlib.sha1()
+    for module in (utils, field_convert, common_paser, registry,
+                   alipay_parser, wechat_parser, zhongxin_parser, pufa_parser):
+        try:
+            digest.update(inspect.getsource(module).encode('utf-8'))
+        except (OSError, TypeError):  # 打包后的程序没有源码，只按模块名区分
+            digest.update(module.__name__.encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+PARSER_VERSION = _parser_version()
+
+
+def content_hash(source):
+    """计算账单文件内容的哈希值。
+
+    Args:
+        source (str | bytes | file-like): 文件路径、字节数据或上传文件对象。
+
+    Returns:
+        str: 十六进制哈希值。
+    """
+    with open_bill_buffer(source) as buffer:
+        return hashlib.blake2b(buffer, digest_size=20).hexdigest()
+
+
+class ParseCache:
+    """大小受限的解析结果缓存。
+
+    Args:
+        cache_dir (str, optional): 缓存目录。默认为 PARSE_CACHE_DIR。
+        max_bytes (int, optional): 缓存目录的大小上限。默认为 PARSE_CACHE_MAX_BYTES。
+        parser_version (str, optional): 解析器版本。默认为当前代码的 PARSER_VERSION。
+    """
+
+    def __init__(self, cache_dir=PARSE_CACHE_DIR, max_bytes=PARSE_CACHE_MAX_BYTES, parser_version=PARSER_VERSION):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.parser_version = parser_version
+
+    def key(self, file_hash, bill_type, skip_lines):
+        """缓存键：文件内容、账单类型、跳过行数和解析器版本共同决定解析结果。"""
+        return hashlib.sha1(f"{file_hash}|{bill_type}|{skip_lines}|{self.parser_version}".encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + CACHE_SUFFIX)
+
+    def get(self, key):
+        """读取缓存的 DataFrame，未命中或缓存文件损坏时返回 None。"""
+        path = self._path(key)
+        try:
+            if pyarrow is not None:
+                df = pd.read_feather(path, memory_map=True)
+            else:
+                df = pd.read_pickle(path)
+            os.utime(path)  # 记录最近使用时间，供淘汰使用
+            return df
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"读取解析缓存失败，将重新解析: {path}, {e}")
+            return None
+
+    def put(self, key, df):
+        """写入缓存。先写临时文件再原子替换，多个进程同时写入同一个键也不会读到半个文件。"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        os.close(fd)
+        try:
+            if pyarrow is not None:
+                df.reset_index(drop=True).to_feather(temp_path)
+            else:
+                df.to_pickle(temp_path)
+            os.replace(temp_path, self._path(key))
+        except Exception as e:
+            logging.warning(f"写入解析缓存失败: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return
+        self.evict()
+
+    def evict(self):
+        """缓存目录超过大小上限时，从最久未使用的文件开始删除。"""
+        entries = []
+        total = 0
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(CACHE_SUFFIX):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:  # 已被其他进程删除
+                pass
+            total -= size
+
+    def parse(self, source, bill_type=None):
+        """解析账单文件，内容和解析器都未变化时直接返回缓存的结果。
+
+        Args:
+            source (str | bytes | file-like): 文件路径，或带文件名的上传文件对象。
+            bill_type (str, optional): 账单类型名称。默认为 None，表示自动识别。
+
+        Returns:
+            tuple: (BillParserSpec, DataFrame)；无法识别时为 (None, None)，解析失败时 DataFrame 为 None。
+        """
+        spec, skip_lines = resolve_parser(source, bill_type)
+        if spec is None:
+            print(f"无法识别账单类型: {get_source_name(source)}")
+            return None, None
+
+        key = self.key(content_hash(source), spec.bill_type, skip_lines)
+        df = self.get(key)
+        if df is None:
+            df = spec.parse(source, skip_lines=skip_lines)
+            if df is not None:
+                self.put(key, df)
+        return spec, df
@@ -0,0 +1,190 @@
+"""
+账单解析器注册表：根据文件开头的表头行自动识别账单类型，并分发到对应的解析器。
+"""
+import io
+import os
+
+import pandas as pd
+
+from one_book_ledger.bill_parser import alipay_parser, pufa_parser, wechat_parser, zhongxin_parser
+from one_book_ledger.bill_parser.common_paser import DEFAULT_CHUNKSIZE
+from one_book_ledger.bill_parser.utils import get_source_name, iter_buffer_lines, open_bill_buffer
+
+# 识别账单类型时最多读取的字节数和行数
+DETECT_SAMPLE_SIZE = 16 * 1024
+DETECT_MAX_LINES = 64
+
+CSV_KIND = 'csv'
+EXCEL_KIND = 'excel'
+FILE_KINDS = {'.csv': CSV_KIND, '.xls': EXCEL_KIND, '.xlsx': EXCEL_KIND}
+
+
+class BillParserSpec:
+    """一种账单来源的解析器描述。
+
+    Attributes:
+        bill_type (str): 账单类型名称，例如 '支付宝账单'。
+        file_kind (str): 文件类型，CSV_KIND 或 EXCEL_KIND。
+        encoding (str): 文件编码格式。
+        skip_lines (int): 默认的表头前跳过行数。
+        signature (frozenset): 表头必须包含的原始列名，即 column_mapping 中的全部原始列。
+        parse (callable): 整体解析函数，签名为 parse(input_f, skip_lines=...)。
+        parse_iter (callable): 分块解析函数，签名为 parse_iter(input_f, chunksize=..., skip_lines=...)。
+    """
+
+    def __init__(self, bill_type, file_kind, parser_module, parse, parse_iter):
+        self.bill_type = bill_type
+        self.file_kind = file_kind
+        self.encoding = parser_module.ENCODING
+        self.skip_lines = parser_module.SKIP_LINES
+        self.signature = frozenset(old_col for old_col, _, _ in parser_module.COLUMN_MAPPING)
+        self.parse = parse
+        self.parse_iter = parse_iter
+
+    def __repr__(self):
+        return f"BillParserSpec({self.bill_type!r}, {self.file_kind!r})"
+
+
+# 已注册的解析器，键为账单类型名称
+BILL_PARSERS = {}
+# 表头签名索引：(文件类型, 表头签名) -> 解析器
+_SIGNATURE_INDEX = {}
+# 每种文件类型下所有解析器关心的列名并集，用于把表头行归约为签名
+_KNOWN_COLUMNS = {}
+
+
+def register_parser(spec):
+    """注册解析器并更新表头签名索引。
+
+    Args:
+        spec (BillParserSpec): 解析器描述。
+    """
+    BILL_PARSERS[spec.bill_type] = spec
+    _SIGNATURE_INDEX[(spec.file_kind, spec.signature)] = spec
+    _KNOWN_COLUMNS[spec.file_kind] = _KNOWN_COLUMNS.get(spec.file_kind, frozenset()) | spec.signature
+
+
+register_parser(BillParserSpec('微信账单', CSV_KIND, wechat_parser,
+                               wechat_parser.parse_wechat_csv, wechat_parser.iter_wechat_csv))
+register_parser(BillParserSpec('支付宝账单', CSV_KIND, alipay_parser,
+                               alipay_parser.parse_alipay_csv, alipay_parser.iter_alipay_csv))
+register_parser(BillParserSpec('中信银行账单', CSV_KIND, zhongxin_parser,
+                               zhongxin_parser.parse_zhongxin_csv, zhongxin_parser.iter_zhongxin_csv))
+register_parser(BillParserSpec('浦发银行账单', EXCEL_KIND, pufa_parser,
+                               pufa_parser.parse_pufa_excel, pufa_parser.iter_pufa_excel))
+
+# 预定义的账单类型
+BILL_TYPES = list(BILL_PARSERS)
+
+
+def get_file_kind(source):
+    """根据文件名后缀返回文件类型，不支持的格式返回 None。"""
+    return FILE_KINDS.get(os.path.splitext(get_source_name(source))[1].lower())
+
+
+def match_header(file_kind, cells):
+    """根据一行表头单元格查找对应的解析器。
+
+    先把表头归约为已知列名的集合，在签名索引中做一次哈希查找；
+    表头中恰好出现其他解析器的列时退回逐个比较签名。
+
+    Args:
+        file_kind (str): 文件类型。
+        cells (iterable): 表头行的单元格内容。
+
+    Returns:
+        BillParserSpec: 匹配的解析器，没有匹配时返回 None。
+    """
+    fields = frozenset(str(cell).strip().strip('"').lstrip('\ufeff') for cell in cells if cell is not None)
+    known_fields = fields & _KNOWN_COLUMNS.get(file_kind, frozenset())
+    spec = _SIGNATURE_INDEX.get((file_kind, known_fields))
+    if spec is not None:
+        return spec
+    for spec in BILL_PARSERS.values():
+        if spec.file_kind == file_kind and spec.signature <= known_fields:
+            return spec
+    return None
+
+
+def _candidate_header_rows(source, file_kind):
+    """产出文件开头若干行的 (行号, 单元格列表)，用于识别表头。"""
+    if file_kind == CSV_KIND:
+        with open_bill_buffer(source) as buffer:
+            sample = bytes(buffer[:DETECT_SAMPLE_SIZE])
+        encodings = list(dict.fromkeys(spec.encoding for spec in BILL_PARSERS.values()
+                                       if spec.file_kind == CSV_KIND))
+        for i, (_, raw_line) in enumerate(iter_buffer_lines(sample, DETECT_MAX_LINES)):
+            if b',' not in raw_line:
+                continue
+            for encoding in encodings:
+                yield i, raw_line.decode(encoding, errors='replace').rstrip('\r').split(',')
+    else:
+        excel_input = source if isinstance(source, (str, os.PathLike)) else io.BytesIO(source.getvalue())
+        head = pd.read_excel(excel_input, header=None, nrows=DETECT_MAX_LINES)
+        for i, row in enumerate(head.itertuples(index=False)):
+            yield i, [cell for cell in row if not pd.isna(cell)]
+
+
+def detect_bill_type(source):
+    """只读取文件开头的少量内容，识别账单类型和表头所在行。
+
+    Args:
+        source (str | file-like): 文件路径，或带文件名的上传文件对象。
+
+    Returns:
+        tuple: (BillParserSpec, 表头前需要跳过的行数)；无法识别时返回 (None, None)。
+    """
+    file_kind = get_file_kind(source)
+    if file_kind is None:
+        return None, None
+    try:
+        for line_number, cells in _candidate_header_rows(source, file_kind):
+            spec = match_header(file_kind, cells)
+            if spec is not None:
+                return spec, line_number
+    except Exception as e:
+        print(f"识别账单类型出错: {e}")
+    return None, None
+
+
+def resolve_parser(source, bill_type=None):
+    """返回 (解析器, 跳过行数)。指定了账单类型时直接使用该类型的默认设置。"""
+    if bill_type is not None:
+        spec = BILL_PARSERS[bill_type]
+        return spec, spec.skip_lines
+    return detect_bill_type(source)
+
+
+def parse_bill(source, bill_type=None):
+    """解析账单文件，未指定账单类型时自动识别。
+
+    Args:
+        source (str | file-like): 文件路径，或带文件名的上传文件对象。
+        bill_type (str, optional): 账单类型名称。默认为 None，表示自动识别。
+
+    Returns:
+        pandas.DataFrame: 转换后的账单数据；无法识别或解析失败时返回 None。
+    """
+    spec, skip_lines = resolve_parser(source, bill_type)
+    if spec is None:
+        print(f"无法识别账单类型: {get_source_name(source)}")
+        return None
+    return spec.parse(source, skip_lines=skip_lines)
+
+
+def iter_bill(source, bill_type=None, chunksize=DEFAULT_CHUNKSIZE):
+    """分块解析账单文件，未指定账单类型时自动识别。
+
+    Args:
+        source (str | file-like): 文件路径，或带文件名的上传文件对象。
+        bill_type (str, optional): 账单类型名称。默认为 None，表示自动识别。
+        chunksize (int, optional): 每块的行数。
+
+    Returns:
+        iterator: 逐块产出转换后的 DataFrame；无法识别时为空迭代器。
+    """
+    spec, skip_lines = resolve_parser(source, bill_type)
+    if spec is None:
+        print(f"无法识别账单类型: {get_source_name(source)}")
+        return iter(())
+    return spec.parse_iter(source, chunksize=chunksize, skip_lines=skip_lines)
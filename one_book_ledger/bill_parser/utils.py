@@ -1,22 +1,186 @@
+import contextlib
+import hashlib
+import io
+import mmap
+import os
+import zipfile
+from collections import OrderedDict
+
+import openpyxl
 import pandas as pd
 import chardet
 
-def auto_detect_encoding(file_path):
+from one_book_ledger.bill_parser.field_convert import get_vectorized_converter
+
+
+@contextlib.contextmanager
+def open_bill_buffer(source):
+    """以只读缓冲区的形式打开账单来源，整个读取流程只读取一次文件内容。
+
+    文件路径通过 mmap 映射为缓冲区；内存中的字节（bytes 等）或带 getvalue() 的
+    上传文件对象（如 Streamlit 的 UploadedFile）直接使用已有的字节，不再落盘或复制。
+
+    Args:
+        source (str | bytes | file-like): 文件路径、字节数据或上传文件对象。
+
+    Yields:
+        bytes | mmap.mmap: 文件内容缓冲区。
+    """
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        yield source
+    elif hasattr(source, 'getvalue'):
+        yield source.getvalue()
+    else:
+        with open(source, 'rb') as f:
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # 空文件无法 mmap
+                yield b''
+                return
+            with buffer:
+                yield buffer
+
+
+def get_source_name(source):
+    """返回账单来源的文件名（用于判断后缀和输出日志），内存数据没有文件名时返回空字符串。"""
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    return getattr(source, 'name', '') or ''
+
+
+class BufferReader(io.RawIOBase):
+    """在缓冲区（bytes 或 mmap）上提供只读文件接口，供 pd.read_csv 直接读取。
+
+    数据按 pandas 的读取块大小逐段拷贝，不会复制整个缓冲区。
+    """
+
+    def __init__(self, buffer, offset=0):
+        self._view = memoryview(buffer)
+        self._pos = offset
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        n = min(len(b), len(self._view) - self._pos)
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._view.release()  # 释放对 mmap 的引用，之后才能关闭 mmap
+        super().close()
+
+
+def iter_buffer_lines(buffer, max_lines, offset=0):
+    """逐行产出缓冲区开头的若干行（原始字节，不含换行符）及其起始偏移量。
+
+    Args:
+        buffer (bytes | mmap.mmap): 文件内容缓冲区。
+        max_lines (int): 最多产出的行数。
+        offset (int, optional): 开始扫描的字节偏移量。默认为 0。
+
+    Yields:
+        tuple: (行起始偏移量, 行字节内容)。
+    """
+    size = len(buffer)
+    for _ in range(max_lines):
+        if offset >= size:
+            break
+        end = buffer.find(b'\n', offset)
+        if end == -1:
+            end = size
+        yield offset, buffer[offset:end]
+        offset = end + 1
+
+
+def line_offset(buffer, line_number):
+    """返回缓冲区中第 line_number 行（从 0 开始）的起始字节偏移量，行数不足时返回缓冲区长度。"""
+    offset = 0
+    for _ in range(line_number):
+        end = buffer.find(b'\n', offset)
+        if end == -1:
+            return len(buffer)
+        offset = end + 1
+    return offset
+
+
+# 编码检测的初始采样字节数，置信度不足时按 ENCODING_SAMPLE_GROWTH 倍扩大采样
+ENCODING_SAMPLE_SIZE = 64 * 1024
+ENCODING_SAMPLE_GROWTH = 4
+ENCODING_MIN_CONFIDENCE = 0.8
+# 编码检测结果缓存：(路径, 大小, 修改时间) 或内容哈希 -> 编码
+ENCODING_CACHE_SIZE = 256
+_encoding_cache = OrderedDict()
+
+
+def _encoding_cache_key(file_path, buffer):
+    """文件路径按 (路径, 大小, 修改时间) 缓存，内存数据按内容哈希缓存。"""
+    if isinstance(file_path, (str, os.PathLike)):
+        stat = os.stat(file_path)
+        return ('path', os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    return ('content', hashlib.blake2b(buffer, digest_size=16).hexdigest())
+
+
+def detect_buffer_encoding(buffer):
+    """在缓冲区的有限前缀上检测编码，置信度不足时逐步扩大采样，最多检测整个缓冲区。
+
+    Args:
+        buffer (bytes | mmap.mmap): 文件内容缓冲区。
+
+    Returns:
+        str: 检测到的编码格式，如果检测失败则返回 None。
+    """
+    sample_size = ENCODING_SAMPLE_SIZE
+    while True:
+        whole = sample_size >= len(buffer)
+        sample = bytes(buffer[:sample_size])
+        if not whole:
+            # 截断到最后一个换行，避免把多字节字符切成两半
+            last_newline = sample.rfind(b'\n')
+            if last_newline > 0:
+                sample = sample[:last_newline + 1]
+        encoding_detection = chardet.detect(sample)
+        confident = (encoding_detection['confidence'] or 0) >= ENCODING_MIN_CONFIDENCE
+        # 前缀全是 ASCII 时无法确定后续内容的编码，继续扩大采样
+        if whole or (confident and encoding_detection['encoding'] != 'ascii'):
+            break
+        sample_size *= ENCODING_SAMPLE_GROWTH
+
+    if encoding_detection['encoding'] == 'GB2312':
+        encoding_detection['encoding'] = 'gbk'
+    return encoding_detection['encoding']
+
+
+def auto_detect_encoding(file_path, buffer=None):
     """自动检测文件编码格式。
 
+    只对文件开头的有限采样做检测，结果按文件 (路径, 大小, 修改时间) 或内容哈希缓存，
+    重复导入或预览同一文件时不会再次检测。
+
     Args:
-        file_path (str): 文件路径。
+        file_path (str | bytes): 文件路径，或已读入内存的文件内容。
+        buffer (bytes | mmap.mmap, optional): 已打开的文件内容缓冲区，提供时不再重新读取文件。
 
     Returns:
         str: 检测到的编码格式，如果检测失败则返回 None。
     """
     try:
-        with open(file_path, 'rb') as f:
-            raw_data = f.read()
-            encoding_detection = chardet.detect(raw_data)
-            if encoding_detection['encoding'] == 'GB2312':
-                encoding_detection['encoding'] = 'gbk'
-            return encoding_detection['encoding']
+        with contextlib.ExitStack() as stack:
+            if buffer is None:
+                buffer = stack.enter_context(open_bill_buffer(file_path))
+            cache_key = _encoding_cache_key(file_path, buffer)
+            if cache_key in _encoding_cache:
+                _encoding_cache.move_to_end(cache_key)
+                return _encoding_cache[cache_key]
+
+            encoding = detect_buffer_encoding(buffer)
+            if encoding:
+                _encoding_cache[cache_key] = encoding
+                if len(_encoding_cache) > ENCODING_CACHE_SIZE:
+                    _encoding_cache.popitem(last=False)
+            return encoding
     except Exception:
         return None
 
@@ -24,7 +188,7 @@ def auto_skip_header_lines(file_path, encoding='utf-8', num_lines_to_check=100):
     """自动检测并确定需要跳过的非CSV格式行数。
 
     Args:
-        file_path (str): 文件路径。
+        file_path (str | bytes): 文件路径，或已读入内存的文件内容。
         encoding (str, optional): 文件编码格式。默认为 'utf-8'。
         num_lines_to_check (int, optional): 检查的行数，用于判断header行. 默认为 20.
 
@@ -34,10 +198,9 @@ def auto_skip_header_lines(file_path, encoding='utf-8', num_lines_to_check=100):
     skip_lines_auto = 0
     header_line_found = False
     try:
-        with open(file_path, 'r', encoding=encoding) as f:
-            for i, line in enumerate(f):
-                if i >= num_lines_to_check: # 只检查前 N 行
-                    break
+        with open_bill_buffer(file_path) as buffer:
+            for i, (_, raw_line) in enumerate(iter_buffer_lines(buffer, num_lines_to_check)): # 只检查前 N 行
+                line = raw_line.decode(encoding, errors='replace')
                 if ',' in line.strip(): # 简单判断是否包含逗号，可能是CSV header
                     # 进一步判断是否是header行 (可以根据实际情况调整判断标准)
                     # 这里简单判断是否不是纯数字行，header通常包含文本
@@ -51,83 +214,288 @@ def auto_skip_header_lines(file_path, encoding='utf-8', num_lines_to_check=100):
     return skip_lines_auto
 
 
-def read_csv_to_dataframe(file_path, skip_lines=0, encoding=None):
+def _resolve_csv_options(file_path, buffer, skip_lines=0, encoding=None):
+    """确定读取CSV文件时使用的编码和跳过行数，未指定时在同一缓冲区上自动检测。
+
+    Args:
+        file_path (str | bytes | file-like): CSV文件来源，用作编码检测缓存的键。
+        buffer (bytes | mmap.mmap): 文件内容缓冲区。
+        skip_lines (int, optional): 需要跳过的行数。为 None 或 0 时尝试自动检测。
+        encoding (str, optional): 文件编码格式。为 None 时自动检测。
+
+    Returns:
+        tuple: (encoding, skip_lines)。
+    """
+    # 自动检测编码格式
+    if encoding is None:
+        detected_encoding = auto_detect_encoding(file_path, buffer=buffer)
+        if detected_encoding:
+            encoding = detected_encoding
+        else:
+            encoding = 'utf-8' # 默认编码
+
+
+    # 自动检测跳过行数
+    if skip_lines is None:
+        skip_lines = auto_skip_header_lines(buffer, encoding=encoding)
+    elif skip_lines == 0: # 如果用户显式设置为0，也尝试自动检测，但优先级低于用户手动设置的非0值
+         skip_lines_auto_detected = auto_skip_header_lines(buffer, encoding=encoding)
+         if skip_lines_auto_detected > 0 : # 只有自动检测到跳过行数大于0时才使用自动检测结果，否则保持用户设置的0
+             skip_lines = skip_lines_auto_detected
+
+    return encoding, skip_lines
+
+
+def _open_csv_reader(buffer, skip_lines):
+    """在缓冲区上打开一个从表头行开始的只读文件对象，直接跳过文件头，不再逐行解析。"""
+    return io.BufferedReader(BufferReader(buffer, offset=line_offset(buffer, skip_lines)))
+
+
+def _column_options(header, usecols=None, dtype=None):
+    """按文件的实际表头生成 usecols 和 dtype 参数：列名两侧的空白不影响匹配，文件中缺少的列直接跳过。
+
+    Args:
+        header (Iterable): 文件表头中的原始列名。
+        usecols (list, optional): 需要读取的列名。为 None 时读取全部列。
+        dtype (dict, optional): {列名: 类型}。
+
+    Returns:
+        tuple: (usecols 判断函数或 None, 以原始列名为键的 dtype 或 None)。
+    """
+    if usecols is None:
+        select = None
+    else:
+        wanted = {str(name).strip() for name in usecols}
+
+        def select(name):
+            return str(name).strip() in wanted
+    if not dtype:
+        return select, dtype
+    dtype = {str(name).strip(): value for name, value in dtype.items()}
+    resolved = {name: dtype[str(name).strip()] for name in header
+                if str(name).strip() in dtype and (select is None or select(name))}
+    return select, resolved
+
+
+def _strip_column_names(df):
+    """去掉列名两侧的空白，使列映射能匹配表头带空格的文件。"""
+    return df.rename(columns=lambda name: name.strip() if isinstance(name, str) else name)
+
+
+def _read_csv_header(buffer, skip_lines, encoding):
+    with _open_csv_reader(buffer, skip_lines) as reader:
+        return pd.read_csv(reader, encoding=encoding, nrows=0).columns
+
+
+def read_csv_to_dataframe(file_path, skip_lines=0, encoding=None, usecols=None, dtype=None):
     """读取CSV文件并将其转换为DataFrame，自动识别编码和跳过非CSV格式行。
 
+    文件内容只读取一次：编码检测、文件头行数检测和 CSV 解析都在同一个缓冲区上完成。
+
     Args:
-        file_path (str): CSV文件路径。
+        file_path (str | bytes | file-like): CSV文件路径，或已读入内存的文件内容（如上传文件对象）。
         skip_lines (int, optional): 需要跳过的行数（文件头）。如果为 None，则自动检测。 默认为 0.
         encoding (str, optional): 文件编码格式。如果为 None，则自动检测。 默认为 None (自动检测)。
+        usecols (list, optional): 需要读取的列名，文件中缺少的列跳过。默认为 None，表示读取全部列。
+        dtype (dict, optional): 各列的数据类型。默认为 None，表示由 pandas 推断。
 
     Returns:
-        pandas.DataFrame: 读取到的数据，以DataFrame形式返回。
+        pandas.DataFrame: 读取到的数据，以DataFrame形式返回，列名两侧的空白已去掉。
         如果文件无法读取或处理，则返回None。
     """
+    source_name = get_source_name(file_path) or '内存数据'
     try:
-        # 自动检测编码格式
-        if encoding is None:
-            detected_encoding = auto_detect_encoding(file_path)
-            if detected_encoding:
-                encoding = detected_encoding
-            else:
-                encoding = 'utf-8' # 默认编码
-
-
-        # 自动检测跳过行数
-        if skip_lines is None:
-            skip_lines = auto_skip_header_lines(file_path, encoding=encoding)
-        elif skip_lines == 0: # 如果用户显式设置为0，也尝试自动检测，但优先级低于用户手动设置的非0值
-             skip_lines_auto_detected = auto_skip_header_lines(file_path, encoding=encoding)
-             if skip_lines_auto_detected > 0 : # 只有自动检测到跳过行数大于0时才使用自动检测结果，否则保持用户设置的0
-                 skip_lines = skip_lines_auto_detected
-
-
-        df = pd.read_csv(file_path, skiprows=skip_lines, encoding=encoding)
-        return df
+        with open_bill_buffer(file_path) as buffer:
+            encoding, skip_lines = _resolve_csv_options(file_path, buffer, skip_lines, encoding)
+            if usecols is not None or dtype:
+                usecols, dtype = _column_options(_read_csv_header(buffer, skip_lines, encoding), usecols, dtype)
+            with _open_csv_reader(buffer, skip_lines) as reader:
+                df = pd.read_csv(reader, encoding=encoding, usecols=usecols, dtype=dtype)
+        return _strip_column_names(df)
     except FileNotFoundError:
-        print(f"文件未找到：{file_path}")
+        print(f"文件未找到：{source_name}")
         return None
     except pd.errors.ParserError:
-        print(f"解析CSV文件出错：{file_path}")
+        print(f"解析CSV文件出错：{source_name}")
         return None
     except UnicodeDecodeError:  # 处理编码错误
-        print(f"解码CSV文件出错，请检查编码格式：{file_path}, 尝试其他编码或手动指定编码格式。")
+        print(f"解码CSV文件出错，请检查编码格式：{source_name}, 尝试其他编码或手动指定编码格式。")
         return None
     except Exception as e:
         print(f"发生未知错误：{e}")
         return None
 
 
+def iter_csv_chunks(file_path, chunksize, skip_lines=0, encoding=None, usecols=None, dtype=None):
+    """分块读取CSV文件，每次产出不超过 chunksize 行的DataFrame。
+
+    编码与跳过行数的处理规则与 read_csv_to_dataframe 相同。读取出错时抛出异常，由调用方处理。
+
+    Args:
+        file_path (str | bytes | file-like): CSV文件路径，或已读入内存的文件内容。
+        chunksize (int): 每块的行数。
+        skip_lines (int, optional): 需要跳过的行数（文件头）。默认为 0。
+        encoding (str, optional): 文件编码格式。默认为 None (自动检测)。
+        usecols (list, optional): 需要读取的列名，文件中缺少的列跳过。默认为 None，表示读取全部列。
+        dtype (dict, optional): 各列的数据类型。默认为 None，表示由 pandas 推断。
+
+    Yields:
+        pandas.DataFrame: 文件中连续的一块数据，列名两侧的空白已去掉。
+    """
+    with open_bill_buffer(file_path) as buffer:
+        encoding, skip_lines = _resolve_csv_options(file_path, buffer, skip_lines, encoding)
+        if usecols is not None or dtype:
+            usecols, dtype = _column_options(_read_csv_header(buffer, skip_lines, encoding), usecols, dtype)
+        with _open_csv_reader(buffer, skip_lines) as reader:
+            with pd.read_csv(reader, encoding=encoding, chunksize=chunksize, usecols=usecols, dtype=dtype) as chunks:
+                for chunk in chunks:
+                    yield _strip_column_names(chunk)
+
+
+def _excel_input(file_path):
+    """pd.read_excel 可直接读取文件路径；内存中的数据包装为 BytesIO。"""
+    if isinstance(file_path, (str, os.PathLike)):
+        return file_path
+    if hasattr(file_path, 'getvalue'):
+        return io.BytesIO(file_path.getvalue())
+    return io.BytesIO(file_path)
+
+
+def _header_name(cell):
+    """表头单元格转换为列名，空单元格返回 None。"""
+    if cell is None:
+        return None
+    return str(cell).strip()
+
+
+def _columns_to_frame(columns, dtype=None):
+    """由按列收集的单元格值构造 DataFrame。
+
+    dtype 中指定了类型的列直接按该类型构造；其余列与 pd.read_excel 一致，整列都是数字文本时转换为数值类型。
+    """
+    dtype = dtype or {}
+    df = pd.DataFrame({name: pd.Series(values, dtype=dtype.get(name)) for name, values in columns.items()})
+    for name in df.columns:
+        if name in dtype:
+            continue
+        if pd.api.types.is_object_dtype(df[name]) or pd.api.types.is_string_dtype(df[name]):
+            try:
+                df[name] = pd.to_numeric(df[name])
+            except (ValueError, TypeError):
+                pass  # 含非数字内容，保留原值
+    return df
+
+
+def _iter_xlsx_chunks(excel_input, chunksize=None, skiprows=0, usecols=None, dtype=None):
+    """以只读、只取值的方式逐行读取 xlsx 的第一个 sheet，按列累积后分块产出 DataFrame。
 
-def read_excel_to_dataframe(file_path,  skiprows=0, encoding=None):
+    只保留 usecols 中的列，整行为空的行跳过（与 pd.read_excel 一致）。chunksize 为 None 时只产出一块。
+    """
+    workbook = openpyxl.load_workbook(excel_input, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(min_row=skiprows + 1, values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        names = [_header_name(cell) for cell in header]
+        wanted = set(names) - {None} if usecols is None else set(usecols)
+        indices = {}  # 列名 -> 列号，重复列名取第一个
+        for i, name in enumerate(names):
+            if name in wanted and name not in indices:
+                indices[name] = i
+
+        columns = {name: [] for name in indices}
+        count = 0
+        for row in rows:
+            if all(value is None for value in row):  # 跳过空行
+                continue
+            for name, i in indices.items():
+                columns[name].append(row[i] if i < len(row) else None)
+            count += 1
+            if count == chunksize:
+                yield _columns_to_frame(columns, dtype)
+                columns = {name: [] for name in indices}
+                count = 0
+        if count or chunksize is None:
+            yield _columns_to_frame(columns, dtype)
+    finally:
+        workbook.close()
+
+
+def _iter_excel_frames(file_path, chunksize=None, skiprows=0, usecols=None, dtype=None):
+    """分块产出 Excel 数据。xlsx 走 openpyxl 只读流式读取；旧版 xls 等格式交给 pd.read_excel 后切分。"""
+    excel_input = _excel_input(file_path)
+    if zipfile.is_zipfile(excel_input):  # xlsx 本质上是 zip 包
+        yield from _iter_xlsx_chunks(excel_input, chunksize, skiprows, usecols, dtype)
+        return
+
+    if not isinstance(excel_input, (str, os.PathLike)):
+        excel_input.seek(0)
+    if usecols is not None or dtype:
+        header = pd.read_excel(excel_input, skiprows=skiprows, nrows=0).columns
+        if not isinstance(excel_input, (str, os.PathLike)):
+            excel_input.seek(0)
+        usecols, dtype = _column_options(header, usecols, dtype)
+    df = _strip_column_names(pd.read_excel(excel_input, skiprows=skiprows, dtype=dtype, usecols=usecols))
+    if chunksize is None:
+        yield df
+        return
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+
+def read_excel_to_dataframe(file_path,  skiprows=0, encoding=None, usecols=None, dtype=None):
     """
     读取 Excel 文件并将其转换为 DataFrame。
 
+    xlsx 文件以 openpyxl 只读模式逐行读取单元格的值，只收集 usecols 中的列，
+    不会把整个工作簿的单元格对象载入内存。
+
     Args:
-        file_path (str): Excel 文件路径。
+        file_path (str | bytes | file-like): Excel 文件路径，或已读入内存的文件内容。
         skiprows (int, optional): 需要跳过的行数。默认为 0。
+        usecols (list, optional): 需要读取的列名。默认为 None，表示读取全部列。
+        dtype (dict, optional): 各列的数据类型。默认为 None，表示按单元格的值推断。
 
     Returns:
         pandas.DataFrame: 读取到的数据，以DataFrame形式返回。
         如果文件无法读取或处理，则返回 None。
     """
     try:
-        df = pd.read_excel(
-            file_path,
-            skiprows=skiprows
-        )
-        return df
+        frames = list(_iter_excel_frames(file_path, skiprows=skiprows, usecols=usecols, dtype=dtype))
+        return frames[0] if frames else pd.DataFrame()
     except FileNotFoundError:
-        print(f"文件未找到：{file_path}")
+        print(f"文件未找到：{get_source_name(file_path)}")
         return None
     except Exception as e:
         print(f"发生未知错误：{e}")
         return None
 
 
+def iter_excel_chunks(file_path, chunksize, skiprows=0, usecols=None, dtype=None):
+    """分块产出 Excel 文件中的数据，每块不超过 chunksize 行。
+
+    xlsx 文件边读边产出，内存占用只与块大小有关；旧版 xls 文件只能整体读取后按块切分。
+
+    Args:
+        file_path (str | bytes | file-like): Excel 文件路径，或已读入内存的文件内容。
+        chunksize (int): 每块的行数。
+        skiprows (int, optional): 需要跳过的行数。默认为 0。
+        usecols (list, optional): 需要读取的列名。默认为 None，表示读取全部列。
+        dtype (dict, optional): 各列的数据类型。默认为 None，表示按单元格的值推断。
+
+    Yields:
+        pandas.DataFrame: 文件中连续的一块数据。
+    """
+    yield from _iter_excel_frames(file_path, chunksize, skiprows, usecols, dtype)
+
+
 def transform_dataframe(df, column_mapping):
     """根据映射关系列表转换DataFrame列，并应用不同的字段转换方法。
 
+    转换函数如果注册了列级（向量化）实现（见 field_convert.register_vectorized），
+    则对整列调用向量化实现；否则回退为 Series.apply 逐行调用。
+
     Args:
         df (pandas.DataFrame): 输入的DataFrame。
         column_mapping (list): 包含三元组的映射关系列表，
@@ -140,7 +508,11 @@ def transform_dataframe(df, column_mapping):
     for old_col, new_col, func in column_mapping:
         if old_col in df.columns:
             if callable(func):  # 检查是否为函数
-                new_df[new_col] = df[old_col].apply(func)
+                vectorized_func = get_vectorized_converter(func)
+                if vectorized_func is not None:  # 优先使用列级实现
+                    new_df[new_col] = vectorized_func(df[old_col])
+                else:
+                    new_df[new_col] = df[old_col].apply(func)
             elif isinstance(func, dict):  # 检查是否为字典
                 # 处理字典映射
                 mapping_dict = func
@@ -1,6 +1,20 @@
-from one_book_ledger.bill_parser.common_paser import parse
+from one_book_ledger.bill_parser.common_paser import DEFAULT_CHUNKSIZE, parse, parse_iter
 import re
 
+ENCODING = 'utf-8'
+SKIP_LINES = 16
+COLUMN_MAPPING = [
+    ('交易时间', '交易时间', None),
+    ('交易类型', '交易分类', None),  # 使用映射函数
+    ('交易对方', '交易对方', None),
+    ('商品', '交易说明', None),
+    ('金额(元)', '交易金额', None),
+    ('收/支', '收/支', None),
+    ('支付方式', '收/付款账户', None),
+    ('当前状态', '交易状态', None)
+]
+EXTRA_COLUMNS = {'统计账单': '微信'}
+
 
 def convert_refund_status(text):
     """
@@ -22,28 +36,39 @@ def convert_refund_status(text):
         return text
 
 
-def parse_wechat_csv(input_f):
-    """解析微信CSV文件。
+def normalize_wechat_change(df):
+    """微信账单特殊处理：存入零钱的记录统一为零钱账户、交易成功。
 
     Args:
-        input_f (str): 输入CSV文件路径。
-    """
-    encoding = 'utf-8'
-    skip_lines = 16
-    column_mapping = [
-        ('交易时间', '交易时间', None),
-        ('交易类型', '交易分类', None),  # 使用映射函数
-        ('交易对方', '交易对方', None),
-        ('商品', '交易说明', None),
-        ('金额(元)', '交易金额', None),
-        ('收/支', '收/支', None),
-        ('支付方式', '收/付款账户', None),
-        ('当前状态', '交易状态', None)
-    ]
-    extra_columns = {'统计账单': '微信'}
-    df = parse(input_f, column_mapping, extra_columns, encoding, skip_lines)
+        df (pandas.DataFrame): 转换后的微信账单数据。
 
+    Returns:
+        pandas.DataFrame: 处理后的数据。
+    """
     # 特殊处理 1. 将 {'收/付款账户'：'/','交易状态':'已存入零钱'} 处理为 {'收/付款账户'：'零钱','交易状态':'交易成功'}
     df.loc[df['交易状态'] == '已存入零钱', '收/付款账户'] = '零钱'  # 使用 .loc 定位并修改
     df.loc[df['交易状态'] == '已存入零钱', '交易状态'] = '交易成功'
     return df
+
+
+def parse_wechat_csv(input_f, skip_lines=SKIP_LINES):
+    """解析微信CSV文件。
+
+    Args:
+        input_f (str): 输入CSV文件路径。
+        skip_lines (int, optional): 表头之前需要跳过的行数。默认为 SKIP_LINES。
+    """
+    return parse(input_f, COLUMN_MAPPING, EXTRA_COLUMNS, ENCODING, skip_lines,
+                 post_process=normalize_wechat_change)
+
+
+def iter_wechat_csv(input_f, chunksize=DEFAULT_CHUNKSIZE, skip_lines=SKIP_LINES):
+    """分块解析微信CSV文件，逐块产出转换后的 DataFrame。
+
+    Args:
+        input_f (str): 输入CSV文件路径。
+        chunksize (int, optional): 每块的行数。
+        skip_lines (int, optional): 表头之前需要跳过的行数。默认为 SKIP_LINES。
+    """
+    return parse_iter(input_f, COLUMN_MAPPING, EXTRA_COLUMNS, ENCODING, skip_lines,
+                      chunksize=chunksize, post_process=normalize_wechat_change)
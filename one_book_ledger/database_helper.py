@@ -1,71 +1,108 @@
+import logging
 import sqlite3
-import datetime
-import os
+import threading
+
+from one_book_ledger.migrations import migrate
 
 DATABASE_NAME = "bill_ledger.db"
 
-class DatabaseHelper:
-    def __init__(self):
-        self.conn = self._connect_db()
-        self._create_tables()
-        self._insert_test_data()
+# 每个连接建立时设置的 PRAGMA。WAL 模式下读写互不阻塞，synchronous=NORMAL 在 WAL 下已足够安全
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64 * 1024,  # 负数单位为 KiB，约 64MB 页缓存
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+}
 
-    def _connect_db(self):
-        try:
-            conn = sqlite3.connect(DATABASE_NAME)
-            return conn
-        except sqlite3.Error as e:
-            print(f"数据库连接失败: {e}")
-            return None
+_local = threading.local()  # 每个线程各自的连接：{数据库路径: 连接}
+_schema_lock = threading.Lock()  # 同一进程中的多个线程不同时执行迁移
+_generation_lock = threading.Lock()
+_write_generation = 0  # 本进程中数据库写入的代数，每次上传、导入等写入提交后加一
 
-    def _create_tables(self):
-        if self.conn is not None:
-            cursor = self.conn.cursor()
-            try:
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS bill_files (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        filename TEXT NOT NULL,
-                        bill_type TEXT NOT NULL,
-                        storage_path TEXT NOT NULL,
-                        upload_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS bill_types (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        name TEXT UNIQUE NOT NULL,
-                        parser_config TEXT --  解析器配置，暂时留空
-                    )
-                """)
-                self.conn.commit()
-                print("数据表创建/检查 完成")
-            except sqlite3.Error as e:
-                print(f"数据表创建失败: {e}")
 
-    def _insert_test_data(self):
-        if self.conn is not None:
-            cursor = self.conn.cursor()
-            try:
-                # #  测试账单类型数据
-                # cursor.execute("INSERT OR IGNORE INTO bill_types (name) VALUES (?)", ("支付宝账单",))
-                # cursor.execute("INSERT OR IGNORE INTO bill_types (name) VALUES (?)", ("微信账单",))
-                # cursor.execute("INSERT OR IGNORE INTO bill_types (name) VALUES (?)", ("中信银行信用卡账单",))
-                #
-                # #  测试账单文件数据
-                # cursor.execute("""
-                #     INSERT OR IGNORE INTO bill_files (filename, bill_type, storage_path)
-                #     VALUES (?, ?, ?)
-                # """, ("alipay_202412.csv", "支付宝账单", "/path/to/alipay_202412.csv"))
-                # cursor.execute("""
-                #     INSERT OR IGNORE INTO bill_files (filename, bill_type, storage_path)
-                #     VALUES (?, ?, ?)
-                # """, ("wechat_202412.xlsx", "微信账单", "/path/to/wechat_202412.xlsx"))
-                #
-                # self.conn.commit()
-                print("测试数据初始化完成")
-            except sqlite3.Error as e:
-                print(f"测试数据初始化失败: {e}")
+def _setup_schema(conn):
+    """检查结构版本，落后时执行迁移；版本一致时只读取一次 user_version，没有 DDL 开销。"""
+    with _schema_lock:
+        migrate(conn)
+
+
+def write_generation():
+    """当前的写入代数。缓存以它为键，代数不变时缓存的查询结果仍然有效。"""
+    return _write_generation
+
+
+def bump_write_generation():
+    """在上传、导入等写入提交后调用，使以旧代数为键的缓存失效。
+
+    Returns:
+        int: 新的写入代数。
+    """
+    global _write_generation
+    with _generation_lock:
+        _write_generation += 1
+        return _write_generation
+
+
+def open_connection(database=None, check_same_thread=True):
+    """建立新的数据库连接：设置 SQLITE_PRAGMAS，并按 user_version 执行尚未完成的迁移。
+
+    Args:
+        database (str, optional): 数据库文件路径。默认为 DATABASE_NAME。
+        check_same_thread (bool, optional): 为 False 时连接可以跨线程使用，调用方需自行加锁。
+
+    Returns:
+        sqlite3.Connection: 数据库连接。
+    """
+    database = DATABASE_NAME if database is None else database
+    conn = sqlite3.connect(database, check_same_thread=check_same_thread)
+    for name, value in SQLITE_PRAGMAS.items():
+        conn.execute(f"PRAGMA {name}={value}")
+    try:
+        _setup_schema(conn)
+    except sqlite3.Error:
+        conn.close()
+        raise
+    logging.debug(f"已连接数据库: {database}")
+    return conn
+
+
+def get_connection(database=None):
+    """获取当前线程的共享数据库连接。
+
+    同一线程中对同一个数据库只由 open_connection 建立一次连接，之后的调用直接返回已有连接，
+    没有连接和 DDL 开销。
+
+    Args:
+        database (str, optional): 数据库文件路径。默认为 DATABASE_NAME。
+
+    Returns:
+        sqlite3.Connection: 数据库连接。
+    """
+    database = DATABASE_NAME if database is None else database
+    connections = _local.__dict__.setdefault("connections", {})
+    conn = connections.get(database)
+    if conn is None:
+        conn = open_connection(database)
+        connections[database] = conn
+    return conn
+
+
+def close_connections():
+    """关闭当前线程的所有共享连接（用于测试和程序退出）。"""
+    connections = _local.__dict__.pop("connections", {})
+    for conn in connections.values():
+        conn.close()
+
+
+class DatabaseHelper:
+    def __init__(self, conn=None):
+        #  conn 为 None 时使用当前线程的共享连接
+        try:
+            self.conn = get_connection() if conn is None else conn
+        except sqlite3.Error as e:
+            logging.error(f"数据库连接失败: {e}")
+            self.conn = None
 
     def get_bill_files(self):
         if self.conn is not None:
@@ -83,10 +120,63 @@ class DatabaseHelper:
                     })
                 return bill_file_list # 返回列表字典
             except sqlite3.Error as e:
-                print(f"获取账单文件列表失败: {e}")
+                logging.error(f"获取账单文件列表失败: {e}")
                 return []
         return []
 
+    def get_imported_paths(self):
+        #  已导入账簿的账单文件存储路径集合
+        if self.conn is not None:
+            cursor = self.conn.cursor()
+            try:
+                cursor.execute("SELECT storage_path FROM bill_files WHERE imported_at IS NOT NULL")
+                return {row[0] for row in cursor.fetchall()}
+            except sqlite3.Error as e:
+                logging.error(f"获取已导入文件列表失败: {e}")
+                return set()
+        return set()
+
+    def get_rejected_files(self):
+        #  批量导入时被拒绝的账单文件，{存储路径: (mtime_ns, size, parser_version)}
+        if self.conn is not None:
+            cursor = self.conn.cursor()
+            try:
+                cursor.execute("SELECT storage_path, mtime_ns, size, parser_version FROM rejected_files")
+                return {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+            except sqlite3.Error as e:
+                logging.error(f"获取被拒绝文件列表失败: {e}")
+                return {}
+        return {}
+
+    def save_rejected_files(self, rejected, accepted=()):
+        #  记录被拒绝的文件 [(存储路径, mtime_ns, size, parser_version, 错误信息)]，并删除已成功解析的文件的旧记录
+        if self.conn is not None:
+            try:
+                with self.conn:
+                    self.conn.executemany("INSERT OR REPLACE INTO rejected_files "
+                                          "(storage_path, mtime_ns, size, parser_version, error) VALUES (?, ?, ?, ?, ?)",
+                                          rejected)
+                    self.conn.executemany("DELETE FROM rejected_files WHERE storage_path = ?",
+                                          [(path,) for path in accepted])
+                return True
+            except sqlite3.Error as e:
+                logging.error(f"保存被拒绝文件列表失败: {e}")
+        return False
+
+    def get_bill_file_by_hash(self, content_hash):
+        #  按内容哈希查找已上传的账单文件（走唯一索引），不存在时返回 None
+        if self.conn is not None:
+            cursor = self.conn.cursor()
+            try:
+                cursor.execute("SELECT id, filename, bill_type, storage_path FROM bill_files WHERE content_hash = ?",
+                               (content_hash,))
+                row = cursor.fetchone()
+                if row is not None:
+                    return {"id": row[0], "filename": row[1], "bill_type": row[2], "storage_path": row[3]}
+            except sqlite3.Error as e:
+                logging.error(f"查询账单文件失败: {e}")
+        return None
+
     def get_bill_types(self):
         if self.conn is not None:
             cursor = self.conn.cursor()
@@ -96,8 +186,8 @@ class DatabaseHelper:
         return []
 
     def close_connection(self):
-        if self.conn:
-            self.conn.close()
+        #  连接在线程内共享，这里只释放引用，不真正关闭
+        self.conn = None
 
     def get_bill_types_with_details(self):  # 新增方法：获取账单类型详情
         if self.conn is not None:
@@ -114,20 +204,21 @@ class DatabaseHelper:
                     })
                 return bill_type_list  # 返回包含 id 和 name 的列表字典
             except sqlite3.Error as e:
-                print(f"获取账单类型列表失败: {e}")
+                logging.error(f"获取账单类型列表失败: {e}")
                 return []
         return []
 
-    def save_bill_file_info(self, filename, bill_type, storage_path): #  Ensure this method is present and correctly spelled
+    def save_bill_file_info(self, filename, bill_type, storage_path, content_hash=None): #  Ensure this method is present and correctly spelled
         if self.conn is not None:
             cursor = self.conn.cursor()
             try:
-                cursor.execute("INSERT INTO bill_files (filename, bill_type, storage_path) VALUES (?, ?, ?)",
-                               (filename, bill_type, storage_path))
+                cursor.execute("INSERT INTO bill_files (filename, bill_type, storage_path, content_hash) VALUES (?, ?, ?, ?)",
+                               (filename, bill_type, storage_path, content_hash))
                 self.conn.commit()
-                print(f"文件信息保存成功: {filename}, 类型: {bill_type}, 路径: {storage_path}") #  添加日志
+                bump_write_generation()
+                logging.info(f"文件信息保存成功: {filename}, 类型: {bill_type}, 路径: {storage_path}") #  添加日志
                 return True #  返回 True 表示保存成功
             except sqlite3.Error as e:
-                print(f"文件信息保存失败: {filename}, 错误: {e}") #  添加错误日志
+                logging.error(f"文件信息保存失败: {filename}, 错误: {e}") #  添加错误日志
             return False #  返回 False 表示保存失败
         return False #  数据库连接失败，返回 False
@@ -0,0 +1,97 @@
+"""
+账簿视图：在服务端完成筛选、排序和键集分页，浏览器每次只收到当前一页的交易。
+
+翻页时把每一页的起始翻页键保存在 session_state 中，上一页即回到栈中的前一个键；
+筛选或排序条件变化时回到第一页。查询结果经 gui.web 按写入代数缓存，来回翻页不重复查询。
+"""
+import datetime
+
+import streamlit as st
+
+from one_book_ledger.gui.web import ledger_page, ledger_summary
+from one_book_ledger.ledger_manager.ledger_query import LEDGER_PAGE_SIZE, build_filters
+
+# 排序选项 -> (排序方式, 是否倒序)
+SORT_OPTIONS = {
+    "时间（最新在前）": ('time', True),
+    "时间（最早在前）": ('time', False),
+    "金额（从大到小）": ('amount', True),
+    "金额（从小到大）": ('amount', False),
+}
+PAGE_SIZE_OPTIONS = [50, LEDGER_PAGE_SIZE, 200, 500]
+DIRECTION_OPTIONS = ["全部", "支出", "收入"]
+COLUMN_LABELS = {
+    "time": "交易时间",
+    "category": "交易分类",
+    "counterparty": "交易对方",
+    "description": "交易说明",
+    "amount": st.column_config.NumberColumn("交易金额", format="%.2f"),
+    "direction": "收/支",
+    "account": "收/付款账户",
+    "status": "交易状态",
+    "source": "统计账单",
+}
+
+
+def _date_bounds(dates):
+    """把日期选择框的结果转换为 [开始, 结束) 时间文本，结束日期当天包含在内。"""
+    start = end = None
+    if len(dates) >= 1:
+        start = dates[0].strftime('%Y-%m-%d')
+    if len(dates) == 2:
+        end = (dates[1] + datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+    return start, end
+
+
+def _filter_controls():
+    """绘制筛选控件，返回查询条件；来源和分类的选项取自月度汇总表，不扫描交易表。"""
+    summary = ledger_summary()
+    with st.expander("筛选", expanded=True):
+        col1, col2, col3 = st.columns(3)
+        dates = col1.date_input("交易日期", value=(), format="YYYY-MM-DD")
+        sources = col2.multiselect("统计账单", sorted(set(summary['source']) - {''}))
+        categories = col3.multiselect("交易分类", sorted(set(summary['category']) - {''}))
+        col1, col2, col3 = st.columns(3)
+        text = col1.text_input("搜索交易对方或交易说明", placeholder="例如 美团")
+        direction = col2.selectbox("收/支", DIRECTION_OPTIONS)
+        sort_label = col3.selectbox("排序", list(SORT_OPTIONS))
+        col1, col2, col3 = st.columns(3)
+        min_amount = col1.number_input("最小金额", min_value=0.0, value=None, step=10.0)
+        max_amount = col2.number_input("最大金额", min_value=0.0, value=None, step=10.0)
+        include_mirrors = col3.checkbox("显示镜像记录", help="与钱包记录重复的银行记录，统计时已跳过")
+
+    where, params = build_filters(sources=sources, categories=categories,
+                                  direction=None if direction == "全部" else direction, text=text.strip(),
+                                  min_amount=min_amount, max_amount=max_amount, include_mirrors=include_mirrors)
+    start, end = _date_bounds(dates)
+    sort, descending = SORT_OPTIONS[sort_label]
+    return {"where": where, "params": params, "sort": sort, "descending": descending, "start": start, "end": end}
+
+
+def render_ledger_view():
+    """绘制分页账簿视图。"""
+    query = _filter_controls()
+    limit = st.session_state.get("ledger_page_size", LEDGER_PAGE_SIZE)
+    signature = (tuple(sorted(query.items())), limit)
+    if st.session_state.get("ledger_query") != signature:  # 条件变化，回到第一页
+        st.session_state.ledger_query = signature
+        st.session_state.ledger_page_keys = [None]
+    page_keys = st.session_state.ledger_page_keys
+
+    page, next_key = ledger_page(after=page_keys[-1], limit=limit, **query)
+    if page.empty:
+        st.info("没有符合条件的交易记录")
+    else:
+        st.dataframe(page, column_config=COLUMN_LABELS, column_order=list(COLUMN_LABELS),
+                     hide_index=True, use_container_width=True)
+
+    col1, col2, col3, col4 = st.columns([1, 1, 2, 2])
+    if col1.button("上一页", disabled=len(page_keys) == 1):
+        page_keys.pop()
+        st.rerun()
+    if col2.button("下一页", disabled=next_key is None):
+        page_keys.append(next_key)
+        st.rerun()
+    col3.caption(f"第 {len(page_keys)} 页，本页 {len(page)} 条")
+    col4.selectbox("每页行数", PAGE_SIZE_OPTIONS, key="ledger_page_size",
+                   index=PAGE_SIZE_OPTIONS.index(LEDGER_PAGE_SIZE))
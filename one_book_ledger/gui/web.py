@@ -0,0 +1,67 @@
+"""
+Streamlit 应用的缓存层：页面每次交互都会重新执行脚本，这里把数据库连接和查询结果缓存起来。
+
+查询结果以 database_helper 的写入代数为缓存键，上传、导入等写入提交后代数加一，旧结果自然失效；
+代数不变时重新执行脚本不会执行任何 SQL。写入代数只在本进程内计数，其他进程写入数据库后需要重启应用。
+"""
+import threading
+
+import streamlit as st
+
+from DatabaseManager import DatabaseManager
+from one_book_ledger import database_helper
+from one_book_ledger.database_helper import DatabaseHelper, open_connection, write_generation
+from one_book_ledger.ledger_manager.ledger_query import LEDGER_PAGE_SIZE, fetch_page
+from one_book_ledger.ledger_manager.summary import monthly_summary
+
+
+@st.cache_resource
+def shared_connection():
+    """整个应用共用的数据库连接和保护它的锁。Streamlit 在多个线程中执行各个会话的脚本，使用连接前须加锁。"""
+    return open_connection(check_same_thread=False), threading.Lock()
+
+
+@st.cache_resource
+def shared_manager():
+    """使用共用连接的 DatabaseManager，账簿页面用它做分页查询和分区路由。"""
+    conn, _ = shared_connection()
+    manager = DatabaseManager(database_helper.DATABASE_NAME)
+    manager.conn = conn
+    return manager
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _load_bill_files(generation):
+    conn, lock = shared_connection()
+    with lock:
+        return DatabaseHelper(conn).get_bill_files()
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _load_monthly_summary(generation, start_month, end_month, source, category):
+    conn, lock = shared_connection()
+    with lock:
+        return monthly_summary(conn, start_month, end_month, source, category)
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _load_ledger_page(generation, where, params, sort, descending, after, limit, start, end):
+    _, lock = shared_connection()
+    with lock:
+        return fetch_page(shared_manager(), where, params, sort, descending, after, limit, start, end)
+
+
+def bill_files():
+    """已上传的账单文件列表（列表字典格式），按上传时间倒序。"""
+    return _load_bill_files(write_generation())
+
+
+def ledger_summary(start_month=None, end_month=None, source=None, category=None):
+    """按 (月份, 来源, 分类, 收支) 的月度汇总，参数与 summary.monthly_summary 相同。"""
+    return _load_monthly_summary(write_generation(), start_month, end_month, source, category)
+
+
+def ledger_page(where=None, params=(), sort='time', descending=True, after=None, limit=LEDGER_PAGE_SIZE,
+                start=None, end=None):
+    """账簿的一页交易，参数与 ledger_query.fetch_page 相同（不含 db_manager）。"""
+    return _load_ledger_page(write_generation(), where, tuple(params), sort, descending, after, limit, start, end)
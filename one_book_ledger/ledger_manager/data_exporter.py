@@ -0,0 +1,27 @@
+"""
+账簿导出：按 (time, id) 键集分页逐页读取交易记录并写出，不会把整个账簿载入内存。
+"""
+
+# 导出时每页读取的行数
+EXPORT_PAGE_SIZE = 10000
+
+
+def export_transactions_csv(db_manager, output_path, where=None, params=(), page_size=EXPORT_PAGE_SIZE):
+    """把 transactions 表中的交易记录按时间顺序导出为 CSV 文件。
+
+    Args:
+        db_manager (DatabaseManager): 提供 iter_pages 的数据库管理对象。
+        output_path (str): 输出 CSV 文件路径。
+        where (str, optional): 过滤条件，参数使用 ? 占位符，例如 "source = ?"。
+        params (tuple, optional): where 中占位符对应的参数。
+        page_size (int, optional): 每页读取的行数。默认为 EXPORT_PAGE_SIZE。
+
+    Returns:
+        int: 导出的行数。
+    """
+    total_rows = 0
+    with open(output_path, 'w', encoding='utf-8-sig', newline='') as f:  # 带 BOM，Excel 可直接打开
+        for page in db_manager.iter_pages('transactions', page_size=page_size, where=where, params=params):
+            page.to_csv(f, header=total_rows == 0, index=False)
+            total_rows += len(page)
+    return total_rows
@@ -0,0 +1,112 @@
+"""
+批量导入：扫描账单文件夹，用进程池并行解析所有未导入的账单文件，再在一个事务中并入账簿。
+
+无法识别或解析失败的文件按 (修改时间, 大小, 解析器版本) 记录在 rejected_files 表中，只报告一次；
+文件被替换或解析器代码更新后签名变化，下次导入时重新尝试。
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from one_book_ledger.bill_parser.parse_cache import PARSE_CACHE_DIR, PARSER_VERSION, ParseCache
+from one_book_ledger.bill_parser.registry import detect_bill_type, get_file_kind
+from one_book_ledger.database_helper import DatabaseHelper
+from one_book_ledger.ledger_manager.ledger import Ledger
+from one_book_ledger.ledger_manager.reconcile import reconcile
+from one_book_ledger.upload_handler import RESOURCES_DIR
+
+
+def file_signature(path):
+    """文件的拒绝记录签名 (mtime_ns, size, parser_version)，任何一项变化都说明值得重新解析。"""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size, PARSER_VERSION
+
+
+def find_unimported_files(folder, imported_paths, rejected=None):
+    """列出文件夹中尚未导入账簿的账单文件。
+
+    Args:
+        folder (str): 账单文件夹。
+        imported_paths (set): 已导入文件的存储路径集合。
+        rejected (dict, optional): 之前被拒绝的文件 {存储路径: 签名}，签名与 file_signature 相同的文件跳过。
+
+    Returns:
+        list: 未导入的账单文件路径，按文件名排序。
+    """
+    imported = {os.path.normpath(path) for path in imported_paths}
+    rejected = {os.path.normpath(path): tuple(signature) for path, signature in (rejected or {}).items()}
+    paths = []
+    for entry in sorted(os.scandir(folder), key=lambda e: e.name):
+        path = os.path.join(folder, entry.name)
+        if not entry.is_file() or get_file_kind(path) is None or os.path.normpath(path) in imported:
+            continue
+        if rejected.get(os.path.normpath(path)) == file_signature(path):
+            continue
+        paths.append(path)
+    return paths
+
+
+def parse_bill_file(path, cache_dir=PARSE_CACHE_DIR):
+    """在工作进程中识别并解析单个账单文件。
+
+    Args:
+        path (str): 账单文件路径。
+        cache_dir (str, optional): 解析结果缓存目录，内容未变化的文件直接读取缓存。为 None 时不使用缓存。
+
+    Returns:
+        tuple: (path, bill_type, DataFrame, 错误信息)；成功时错误信息为 None，失败时 DataFrame 为 None。
+    """
+    if cache_dir is None:
+        spec, skip_lines = detect_bill_type(path)
+        df = spec.parse(path, skip_lines=skip_lines) if spec is not None else None
+    else:
+        spec, df = ParseCache(cache_dir).parse(path)
+    if spec is None:
+        return path, None, None, "无法识别账单类型"
+    if df is None:
+        return path, spec.bill_type, None, "解析失败"
+    return path, spec.bill_type, df, None
+
+
+def import_folder(folder=RESOURCES_DIR, max_workers=None, progress=None, cache_dir=PARSE_CACHE_DIR):
+    """并行解析账单文件夹中所有未导入的文件，并在一个事务中并入账簿，然后做跨来源对账。
+
+    Args:
+        folder (str, optional): 账单文件夹。默认为 RESOURCES_DIR。
+        max_workers (int, optional): 进程数。默认为 None，即使用全部 CPU 核心。
+        progress (callable, optional): 每个文件解析完成后调用 progress(done, total, path, error)，
+            error 为 None 表示解析成功。
+        cache_dir (str, optional): 解析结果缓存目录。默认为 PARSE_CACHE_DIR，为 None 时不使用缓存。
+
+    Returns:
+        dict: {"files": 导入的文件数, "rows": 写入的交易行数, "mirrors": 新标记的镜像记录数,
+            "failed": {路径: 错误信息}}；之前已报告过且未变化的失败文件不再出现在 failed 中。
+    """
+    db_helper = DatabaseHelper()
+    try:
+        paths = find_unimported_files(folder, db_helper.get_imported_paths(), db_helper.get_rejected_files())
+        signatures = {path: file_signature(path) for path in paths}  # 解析前取签名，解析期间文件被替换时下次会重试
+        parsed_files = []
+        failed = {}
+        if paths:
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = [executor.submit(parse_bill_file, path, cache_dir) for path in paths]
+                for done, future in enumerate(as_completed(futures), start=1):
+                    path, bill_type, df, error = future.result()
+                    if error is None:
+                        parsed_files.append((path, bill_type, df))
+                        logging.info(f"[{done}/{len(paths)}] 解析完成: {path}, 账单类型: {bill_type}, {len(df)} 行")
+                    else:
+                        failed[path] = error
+                        logging.warning(f"[{done}/{len(paths)}] 解析失败: {path}, {error}")
+                    if progress is not None:
+                        progress(done, len(paths), path, error)
+
+        db_helper.save_rejected_files([(path, *signatures[path], error) for path, error in sorted(failed.items())],
+                                      accepted=[path for path, _, _ in parsed_files])
+        parsed_files.sort(key=lambda item: item[0])  # 按文件名顺序写入，结果与完成顺序无关
+        rows = Ledger(db_helper.conn).import_files(parsed_files) if parsed_files else 0
+        mirrors = reconcile(db_helper.conn) if rows else 0
+        return {"files": len(parsed_files), "rows": rows, "mirrors": mirrors, "failed": failed}
+    finally:
+        db_helper.close_connection()
@@ -0,0 +1,223 @@
+"""
+统一账簿：把各来源解析后的账单写入 transactions 表。
+"""
+import os
+import sqlite3
+
+import pandas as pd
+
+from one_book_ledger.bill_parser.parse_cache import content_hash
+from one_book_ledger.database_helper import bump_write_generation
+from one_book_ledger.ledger_manager.search import index_transactions
+from one_book_ledger.utils.category_cache import CategoryMemo
+from one_book_ledger.utils.utils import parse_amount_series, parse_datetime_series
+
+# 统一账单列名 -> transactions 表列名
+LEDGER_COLUMNS = [
+    ('交易时间', 'time'),
+    ('交易分类', 'category'),
+    ('交易对方', 'counterparty'),
+    ('交易说明', 'description'),
+    ('交易金额', 'amount_cents'),
+    ('收/支', 'direction'),
+    ('收/付款账户', 'account'),
+    ('交易状态', 'status'),
+    ('统计账单', 'source'),
+]
+
+# transactions 表中 time 列的文本格式，按字典序排列即按时间排列
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+# bulk_insert 每批写入的行数
+BULK_INSERT_BATCH_SIZE = 5000
+
+# 参与行指纹计算的列：同一笔交易在不同导出文件中保持不变的字段（交易状态可能变化，交易分类可能由规则补充）
+FINGERPRINT_COLUMNS = ['统计账单', '交易时间', '交易金额', '收/支', '交易对方', '交易说明', '收/付款账户']
+
+
+def _to_db_value(value):
+    """将 DataFrame 中的空值（None、NaN、NaT、pd.NA）统一转换为 None。"""
+    if pd.isna(value):
+        return None
+    return value
+
+
+def amounts_to_cents(amounts):
+    """把金额（元）转换为以分为单位的整数，无法解析的金额为 None，不计入月度汇总。"""
+    cents = (parse_amount_series(amounts, failed_value=float('nan')) * 100).round().astype('Int64')
+    return cents.astype(object).where(cents.notna(), None)
+
+
+def normalize_times(times):
+    """把交易时间统一为 TIME_FORMAT 文本，无法解析的值为 None。
+
+    time 列的文本必须可以按字典序比较，时间范围查询、翻页和按年分区都依赖这一点，因此不保存原始文本。
+    """
+    parsed = parse_datetime_series(times)
+    return parsed.dt.strftime(TIME_FORMAT).astype(object).where(parsed.notna(), None)
+
+
+def bulk_insert(cursor, table_name, columns, rows, or_ignore=False):
+    """用 executemany 分批写入多行，由调用方负责事务。
+
+    Args:
+        cursor (sqlite3.Cursor): 数据库游标。
+        table_name (str): 表名。
+        columns (list): 列名。
+        rows (iterable): 与 columns 对应的行元组。
+        or_ignore (bool, optional): 为 True 时使用 INSERT OR IGNORE，跳过违反唯一约束的行。
+
+    Returns:
+        int: 实际写入的行数。
+    """
+    verb = "INSERT OR IGNORE" if or_ignore else "INSERT"
+    sql = f"{verb} INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    rows = list(rows)
+    inserted = 0
+    for start in range(0, len(rows), BULK_INSERT_BATCH_SIZE):
+        cursor.executemany(sql, rows[start:start + BULK_INSERT_BATCH_SIZE])
+        inserted += cursor.rowcount
+    return inserted
+
+
+def dataframe_to_rows(df, file_id=None, category_memo=None):
+    """把统一格式的账单 DataFrame 转换为 transactions 表的行元组。
+
+    Args:
+        df (pandas.DataFrame): 解析器输出的账单数据。
+        file_id (int, optional): 来源账单文件在 bill_files 表中的 id。
+        category_memo (CategoryMemo, optional): 提供时，为没有交易分类的行（如银行账单）补充分类。
+
+    Returns:
+        list: 每个元素为 (file_id, time, category, ..., source) 元组，金额为以分为单位的整数。
+    """
+    df = df.reindex(columns=[col for col, _ in LEDGER_COLUMNS])
+    if category_memo is not None:
+        missing = df['交易分类'].isna() | (df['交易分类'] == '')
+        if missing.any():
+            df.loc[missing, '交易分类'] = category_memo.categorize(df.loc[missing, '交易对方'],
+                                                               df.loc[missing, '交易说明'])
+    df['交易时间'] = normalize_times(df['交易时间'])
+    df['交易金额'] = amounts_to_cents(df['交易金额'])
+    return [(file_id,) + tuple(_to_db_value(value) for value in row)
+            for row in df.itertuples(index=False, name=None)]
+
+
+def row_fingerprints(df):
+    """计算每行交易的指纹，用于识别重叠账单中已导入的交易。
+
+    指纹由 FINGERPRINT_COLUMNS 和该行在文件内的出现序号共同决定：同一文件中完全相同的两笔交易
+    序号不同，都会保留；而另一份覆盖同一时段的账单会得到相同的指纹。
+
+    Args:
+        df (pandas.DataFrame): 解析器输出的账单数据（整个文件）。
+
+    Returns:
+        pandas.Series: int64 指纹，与 df 索引一致。
+    """
+    keys = df.reindex(columns=FINGERPRINT_COLUMNS).astype(str)  # 空值统一为 'nan'，与来源文件格式无关
+    ordinal = keys.groupby(FINGERPRINT_COLUMNS, sort=False, dropna=False).cumcount()
+    hashes = pd.util.hash_pandas_object(keys.assign(ordinal=ordinal), index=False)
+    return pd.Series(hashes.to_numpy().view('int64'), index=df.index)  # SQLite 的 INTEGER 为有符号 64 位
+
+
+class Ledger:
+    """统一账簿，基于 DatabaseHelper 的数据库连接读写 transactions 表。"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.category_memo = CategoryMemo(conn)
+
+    def _file_hash(self, cursor, storage_path):
+        """文件的内容哈希，与上传时的查重哈希相同；文件不存在或同样内容已由其他记录登记时返回 None。"""
+        if not os.path.isfile(storage_path):
+            return None
+        file_hash = content_hash(storage_path)
+        cursor.execute("SELECT 1 FROM bill_files WHERE content_hash = ?", (file_hash,))
+        return None if cursor.fetchone() is not None else file_hash
+
+    def _get_or_create_file_id(self, cursor, storage_path, bill_type):
+        cursor.execute("SELECT id, content_hash FROM bill_files WHERE storage_path = ?", (storage_path,))
+        row = cursor.fetchone()
+        if row is not None:
+            if row[1] is None:  # 早于内容哈希的记录，补上哈希，之后上传同样的文件时能识别为重复
+                cursor.execute("UPDATE bill_files SET content_hash = ? WHERE id = ?",
+                               (self._file_hash(cursor, storage_path), row[0]))
+            return row[0]
+        cursor.execute("INSERT INTO bill_files (filename, bill_type, storage_path, content_hash) VALUES (?, ?, ?, ?)",
+                       (os.path.basename(storage_path), bill_type, storage_path, self._file_hash(cursor, storage_path)))
+        return cursor.lastrowid
+
+    def remove_file(self, storage_path):
+        """从账簿中撤销一个已导入的账单文件：删除它写入的交易。
+
+        月度汇总由触发器随删除同步扣减。文件本身仍登记在 bill_files 中，可以重新导入。
+
+        Args:
+            storage_path (str): 账单文件的存储路径。
+
+        Returns:
+            int: 删除的交易行数。
+
+        Raises:
+            ValueError: 文件的部分交易已归档到年份分区。分区是只读的，只删除主库中的交易会使
+                重新导入时把已归档的交易再写入一遍。
+        """
+        try:
+            with self.conn:
+                cursor = self.conn.cursor()
+                cursor.execute("SELECT id FROM bill_files WHERE storage_path = ?", (storage_path,))
+                row = cursor.fetchone()
+                if row is None:
+                    return 0
+                file_id = row[0]
+                cursor.execute("SELECT year FROM archived_files WHERE file_id = ? ORDER BY year", (file_id,))
+                archived_years = [year for year, in cursor.fetchall()]
+                if archived_years:
+                    raise ValueError(f"账单文件 {storage_path} 的交易已归档到 "
+                                     f"{', '.join(map(str, archived_years))} 年分区，不能撤销导入")
+                cursor.execute("UPDATE transactions SET mirror_of = NULL WHERE mirror_of IN "
+                               "(SELECT id FROM transactions WHERE file_id = ?)", (file_id,))  # 对方记录不再是镜像
+                cursor.execute("DELETE FROM transactions WHERE file_id = ?", (file_id,))
+                deleted = cursor.rowcount
+                cursor.execute("UPDATE bill_files SET imported_at = NULL WHERE id = ?", (file_id,))
+        except sqlite3.Error as e:
+            print(f"撤销导入失败，已回滚: {e}")
+            raise
+        bump_write_generation()
+        return deleted
+
+    def import_files(self, parsed_files):
+        """在同一个事务中把多个已解析的账单文件增量并入账簿。
+
+        是否重复只由行指纹的唯一索引决定：已存在的指纹被 INSERT OR IGNORE 跳过，因此重叠的账单
+        只会写入新增的交易，时间落在已导入时段内的新交易（如补导出的其他账户记录）同样会写入。
+        文件尚未登记在 bill_files 中时自动登记，写入后记录导入时间。没有交易分类的行按
+        交易说明和交易对方自动分类，新写入的交易同时加入全文索引。任何一步失败都会回滚整个批次。
+
+        Args:
+            parsed_files (list): 元素为 (storage_path, bill_type, DataFrame) 的列表。
+
+        Returns:
+            int: 新写入的交易行数。
+        """
+        columns = ["file_id"] + [col for _, col in LEDGER_COLUMNS] + ["fingerprint"]
+        total_rows = 0
+        try:
+            with self.conn:  # 成功时提交，异常时回滚
+                cursor = self.conn.cursor()
+                cursor.execute("SELECT COALESCE(MAX(id), 0) FROM transactions")
+                last_id = cursor.fetchone()[0]
+                for storage_path, bill_type, df in parsed_files:
+                    file_id = self._get_or_create_file_id(cursor, storage_path, bill_type)
+                    df = df.reset_index(drop=True)
+                    if not df.empty:
+                        rows = dataframe_to_rows(df, file_id, self.category_memo)
+                        rows = [row + (int(fingerprint),) for row, fingerprint in zip(rows, row_fingerprints(df))]
+                        total_rows += bulk_insert(cursor, "transactions", columns, rows, or_ignore=True)
+                    cursor.execute("UPDATE bill_files SET imported_at = CURRENT_TIMESTAMP WHERE id = ?", (file_id,))
+                index_transactions(cursor, last_id)  # AUTOINCREMENT 保证新写入的交易 id 都大于导入前的最大 id
+        except sqlite3.Error as e:
+            print(f"导入账簿失败，已回滚: {e}")
+            raise
+        bump_write_generation()
+        return total_rows
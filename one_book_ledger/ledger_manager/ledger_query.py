@@ -0,0 +1,89 @@
+"""
+账簿分页查询：把界面上的筛选和排序条件转换为 SQL，按键集分页每次只读取一页交易。
+
+翻页键与排序方式对应：按时间排序时为 (time, id)，按金额排序时为 (amount_cents, id)，
+两者都有索引，翻到多深都只读取一页的行。时间或金额无法解析而为空的交易同样显示：
+升序时排在最前，降序时排在最后，由 DatabaseManager.query_page 单独分段翻页。
+"""
+import pandas as pd
+
+from one_book_ledger.ledger_manager.search import fts_query
+
+# 排序方式 -> 翻页键的列
+SORT_KEYS = {
+    'time': ('time', 'id'),
+    'amount': ('amount_cents', 'id'),
+}
+# 账簿页面显示的列
+LEDGER_VIEW_COLUMNS = ['id', 'time', 'category', 'counterparty', 'description', 'amount_cents',
+                       'direction', 'account', 'status', 'source']
+# 默认每页行数
+LEDGER_PAGE_SIZE = 100
+
+
+def build_filters(sources=None, categories=None, direction=None, text=None,
+                  min_amount=None, max_amount=None, include_mirrors=False):
+    """把筛选条件转换为 WHERE 子句和参数。时间范围不在这里处理，由 fetch_page 交给分区路由。
+
+    Args:
+        sources (list, optional): 只显示这些来源，例如 ['微信', '支付宝']。
+        categories (list, optional): 只显示这些交易分类。
+        direction (str, optional): 只显示该收支方向，例如 '支出'。
+        text (str, optional): 在交易对方和交易说明中全文搜索。
+        min_amount (float, optional): 最小金额（元，含）。
+        max_amount (float, optional): 最大金额（元，含）。
+        include_mirrors (bool, optional): 是否显示已标记为镜像的银行记录。默认为 False。
+
+    Returns:
+        tuple: (WHERE 子句，没有条件时为 None, 参数元组)。
+    """
+    conditions = []
+    params = []
+    for column, values in (('source', sources), ('category', categories)):
+        if values:
+            conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    if direction:
+        conditions.append("direction = ?")
+        params.append(direction)
+    query = fts_query(text) if text else None
+    if query is not None:
+        conditions.append("id IN (SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH ?)")
+        params.append(query)
+    if min_amount is not None:
+        conditions.append("amount_cents >= ?")
+        params.append(round(min_amount * 100))
+    if max_amount is not None:
+        conditions.append("amount_cents <= ?")
+        params.append(round(max_amount * 100))
+    if not include_mirrors:
+        conditions.append("+mirror_of IS NULL")  # 一元 + 使查询不走 mirror_of 索引（绝大多数行为空），按翻页键的索引顺序读取
+    return (" AND ".join(conditions) or None), tuple(params)
+
+
+def fetch_page(db_manager, where=None, params=(), sort='time', descending=True, after=None,
+               limit=LEDGER_PAGE_SIZE, start=None, end=None):
+    """读取账簿的一页交易。
+
+    Args:
+        db_manager (DatabaseManager): 提供 query_page 的数据库管理对象。
+        where (str, optional): build_filters 生成的 WHERE 子句。
+        params (tuple, optional): where 中占位符对应的参数。
+        sort (str, optional): 排序方式，取值为 SORT_KEYS 的键。默认为 'time'。
+        descending (bool, optional): 是否倒序。默认为 True，最新或金额最大的在前。
+        after (tuple, optional): 上一页返回的翻页键。默认为 None，表示第一页。
+        limit (int, optional): 每页行数。默认为 LEDGER_PAGE_SIZE。
+        start (str, optional): 起始时间（含），例如 '2025-01-01'。
+        end (str, optional): 结束时间（不含）。
+
+    Returns:
+        tuple: (pandas.DataFrame, 下一页的翻页键)；金额列为 amount（元），没有更多数据时翻页键为 None。
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f"不支持的排序方式: {sort}")
+    page, next_key = db_manager.query_page('transactions', columns=LEDGER_VIEW_COLUMNS, where=where, params=params,
+                                           after=after, limit=limit, descending=descending, key=SORT_KEYS[sort],
+                                           start=start, end=end)
+    if 'amount_cents' in page:
+        page.insert(5, 'amount', pd.to_numeric(page.pop('amount_cents')) / 100)  # 整页金额都为空时列的类型为 object
+    return page, next_key
@@ -0,0 +1,147 @@
+"""
+按年分区：把已结束年份的交易从主库移到单独的数据库文件，主库只保留近期数据。
+
+分区文件由 DatabaseManager.partition_path 命名，查询时由 DatabaseManager 按时间范围只附加重叠的年份。
+归档后的分区默认整理为只读文件（VACUUM 并去掉写权限），备份和清理主库时不再涉及旧年份。
+月度汇总保持不变；全文索引、跨来源对账和行指纹去重只覆盖主库中的交易，因此只应归档不会再导入账单的年份。
+有交易已归档的账单文件不能再撤销导入。
+"""
+import logging
+import os
+import sqlite3
+import stat
+
+from one_book_ledger.database_helper import bump_write_generation
+
+
+def year_range(year):
+    """返回某一年的时间范围 [开始, 结束)，与 transactions.time 的文本格式可直接比较。"""
+    return f"{year}-01-01 00:00:00", f"{year + 1}-01-01 00:00:00"
+
+
+def compact_partition(path):
+    """整理分区文件：VACUUM 回收空间、关闭 WAL，再去掉写权限，之后只以只读方式附加。"""
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.chmod(path, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+
+
+def _readonly_uri(path):
+    return 'file:' + os.path.abspath(path).replace('?', '%3f').replace('#', '%23') + '?mode=ro'
+
+
+def _copy_to_partition(conn, path, start, end):
+    """第一步：把 [start, end) 的交易复制到新的分区文件并提交，这个事务只写分区文件。"""
+    conn.execute("ATTACH DATABASE ? AS archive", (path,))
+    try:
+        conn.execute("BEGIN")
+        with conn:  # 成功时提交，异常时回滚
+            conn.execute("CREATE TABLE archive.transactions AS SELECT * FROM main.transactions "
+                         "WHERE time >= ? AND time < ? ORDER BY time, id", (start, end))
+            copied = conn.execute("SELECT COUNT(*) FROM archive.transactions").fetchone()[0]
+            if copied:
+                conn.execute("CREATE INDEX archive.idx_transactions_time ON transactions (time, id)")
+                # 分区中的 id 不是 rowid，须放进索引才能按 (amount_cents, id) 翻页
+                conn.execute("CREATE INDEX archive.idx_transactions_amount ON transactions (amount_cents, id)")
+    finally:
+        conn.execute("DETACH DATABASE archive")
+    return copied
+
+
+def _delete_archived(conn, path, year):
+    """第二步：按分区中交易的 id 从主库删除，这个事务只写主库，分区以只读方式附加。
+
+    删除交易时触发器会扣减月度汇总，因此先保存该年的汇总行，删除后原样写回，归档前后的统计结果一致。
+    """
+    conn.execute("ATTACH DATABASE ? AS archive", (_readonly_uri(path),))
+    try:
+        conn.execute("BEGIN")
+        with conn:  # 成功时提交，异常时回滚
+            conn.execute("CREATE TEMP TABLE archived_summary AS SELECT * FROM main.monthly_summary "
+                         "WHERE month >= ? AND month <= ?", (f"{year}-01", f"{year}-12"))
+            deleted = conn.execute("DELETE FROM main.transactions WHERE id IN "
+                                   "(SELECT id FROM archive.transactions)").rowcount
+            conn.execute("INSERT OR REPLACE INTO main.monthly_summary SELECT * FROM temp.archived_summary")
+            conn.execute("DROP TABLE temp.archived_summary")
+            conn.execute("INSERT OR REPLACE INTO main.archived_files (file_id, year, row_count) "
+                         "SELECT file_id, ?, COUNT(*) FROM archive.transactions "
+                         "WHERE file_id IS NOT NULL GROUP BY file_id", (year,))
+    finally:
+        conn.execute("DETACH DATABASE archive")
+    return deleted
+
+
+def _count_rows(path):
+    conn = sqlite3.connect(_readonly_uri(path), uri=True)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def _pending_rows(conn, path):
+    """分区文件中仍留在主库的交易数；不为 0 说明上次归档在复制之后、删除之前中断。"""
+    conn.execute("ATTACH DATABASE ? AS archive", (_readonly_uri(path),))
+    try:
+        return conn.execute("SELECT COUNT(*) FROM main.transactions WHERE id IN "
+                            "(SELECT id FROM archive.transactions)").fetchone()[0]
+    finally:
+        conn.execute("DETACH DATABASE archive")
+
+
+def archive_year(db_manager, year, compact=True):
+    """把某一年的交易从主库移到该年的分区文件。
+
+    主库使用 WAL 模式，SQLite 不保证跨数据库文件的事务整体原子，因此分两步完成：先把交易复制到
+    分区文件并提交，核对分区中的行数，再在只写主库的事务中按 id 删除这些交易。两步之间中断时，
+    交易同时留在主库和分区中，不会丢失；再次调用 archive_year 时完成删除。各账单文件归档的行数
+    记录在主库的 archived_files 表中，Ledger.remove_file 据此拒绝撤销这些文件。
+
+    Args:
+        db_manager (DatabaseManager): 主库的数据库管理对象。
+        year (int): 要归档的年份。
+        compact (bool, optional): 是否把分区整理为只读文件。默认为 True。
+
+    Returns:
+        int: 移到分区中的交易行数；该年没有交易时返回 0，不创建分区文件。
+
+    Raises:
+        FileExistsError: 该年已经归档完毕，分区文件已存在。
+        sqlite3.DatabaseError: 分区中的行数与复制的行数不一致，主库未被修改。
+    """
+    path = db_manager.partition_path(year)
+    start, end = year_range(year)
+    db_manager.connect()  # 确保连接已建立
+    conn = db_manager.conn
+    if os.path.exists(path):
+        if not _pending_rows(conn, path):
+            raise FileExistsError(f"分区文件已存在: {path}")
+        logging.warning(f"{year} 年的上次归档没有完成，继续从主库删除已复制的交易")
+    else:
+        try:
+            copied = _copy_to_partition(conn, path, start, end)
+            if copied and _count_rows(path) != copied:
+                raise sqlite3.DatabaseError(f"分区 {path} 中的行数与复制的 {copied} 行不一致")
+        except sqlite3.Error as e:
+            print(f"归档 {year} 年交易失败，主库未修改: {e}")
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        if not copied:
+            os.remove(path)
+            return 0
+
+    try:
+        archived = _delete_archived(conn, path, year)
+    except sqlite3.Error as e:
+        print(f"从主库删除 {year} 年已归档的交易失败，已回滚，再次归档时继续: {e}")
+        raise
+    bump_write_generation()
+    if compact:
+        compact_partition(path)
+    logging.info(f"已把 {year} 年的 {archived} 条交易归档到 {path}")
+    return archived
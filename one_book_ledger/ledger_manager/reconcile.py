@@ -0,0 +1,111 @@
+"""
+跨来源对账：找出同一笔消费在钱包账单和银行账单中的两条记录，把银行一侧标记为镜像。
+
+用微信或支付宝绑定的信用卡付款时，钱包账单和银行账单各有一条记录。钱包一侧的信息更完整
+（交易分类、商品说明），因此保留钱包记录，银行记录的 mirror_of 指向对应的钱包记录，
+统计时跳过 mirror_of 不为空的记录即可避免重复计算。
+"""
+import logging
+import sqlite3
+
+import pandas as pd
+
+from one_book_ledger.database_helper import bump_write_generation
+
+# 钱包账单来源
+WALLET_SOURCES = ('微信', '支付宝')
+# 银行账单来源 -> 钱包付款方式中出现的银行关键字
+BANK_KEYWORDS = {'中信银行': '中信', '浦发银行': '浦发'}
+# 银行账单交易摘要中的收付款账户 -> 对应的钱包来源
+BANK_CHANNELS = {'财付通': '微信', '微信支付': '微信', '支付宝': '支付宝'}
+# 默认时间窗口：银行入账日期与钱包交易时间最多相差的时间
+MATCH_WINDOW = pd.Timedelta(days=3)
+
+
+def _wallet_bank(account):
+    """从钱包记录的付款方式（如 '中信银行信用卡(1234)'）识别出资银行，零钱、余额等返回 None。"""
+    if not isinstance(account, str):
+        return None
+    for bank, keyword in BANK_KEYWORDS.items():
+        if keyword in account:
+            return bank
+    return None
+
+
+def _match_keys(df):
+    """计算每条记录的配对键 (银行, 钱包, 金额分, 收支)，不参与配对的记录键为空。"""
+    is_wallet = df['source'].isin(WALLET_SOURCES)
+    is_bank = df['source'].isin(list(BANK_KEYWORDS))
+    bank = df['source'].where(is_bank, df['account'].map(_wallet_bank).where(is_wallet))
+    wallet = df['source'].where(is_wallet, df['account'].map(BANK_CHANNELS).where(is_bank))
+    cents = pd.to_numeric(df['amount_cents'], errors='coerce')
+    keys = pd.DataFrame({'bank': bank, 'wallet': wallet, 'cents': cents, 'direction': df['direction']})
+    return keys, is_wallet
+
+
+def match_mirrors(df, window=MATCH_WINDOW):
+    """在账单记录中配对钱包记录与银行记录。
+
+    按 (银行, 钱包, 金额, 收支, 时间) 排序后，同一键下的钱包记录和银行记录各自按时间有序，
+    用双指针贪心配对：每条钱包记录匹配时间窗口内最早的未配对银行记录。排序 O(n log n)，配对 O(n)。
+
+    Args:
+        df (pandas.DataFrame): 包含 id, time, amount_cents, direction, source, account 列的交易记录。
+        window (pandas.Timedelta, optional): 时间窗口。默认为 MATCH_WINDOW。
+
+    Returns:
+        list: (镜像记录 id, 主记录 id) 元组，镜像记录为银行一侧。
+    """
+    keys, is_wallet = _match_keys(df)
+    candidates = keys.assign(id=df['id'], time=pd.to_datetime(df['time'], errors='coerce'), is_wallet=is_wallet)
+    candidates = candidates.dropna(subset=['bank', 'wallet', 'cents', 'direction', 'time'])
+    candidates = candidates.sort_values(['bank', 'wallet', 'cents', 'direction', 'time'], kind='stable')
+
+    pairs = []
+    for _, group in candidates.groupby(['bank', 'wallet', 'cents', 'direction'], sort=False):
+        wallet_rows = group[group['is_wallet']]
+        bank_rows = group[~group['is_wallet']]
+        if wallet_rows.empty or bank_rows.empty:
+            continue
+        bank_times = bank_rows['time'].tolist()
+        bank_ids = bank_rows['id'].tolist()
+        j = 0
+        for wallet_id, wallet_time in zip(wallet_rows['id'], wallet_rows['time']):
+            while j < len(bank_times) and bank_times[j] < wallet_time - window:
+                j += 1  # 早于窗口的银行记录不可能再与后面的钱包记录配对
+            if j == len(bank_times):
+                break
+            if bank_times[j] <= wallet_time + window:
+                pairs.append((bank_ids[j], wallet_id))
+                j += 1
+    return pairs
+
+
+def reconcile(conn, window=MATCH_WINDOW):
+    """对账簿中尚未配对的记录做跨来源对账，并在一个事务中写入 mirror_of。
+
+    Args:
+        conn (sqlite3.Connection): 数据库连接，transactions 表需包含 mirror_of 列。
+        window (pandas.Timedelta, optional): 时间窗口。默认为 MATCH_WINDOW。
+
+    Returns:
+        int: 新标记的镜像记录数。
+    """
+    df = pd.read_sql_query(
+        "SELECT id, time, amount_cents, direction, source, account FROM transactions "
+        "WHERE mirror_of IS NULL "
+        "AND id NOT IN (SELECT mirror_of FROM transactions WHERE mirror_of IS NOT NULL)",
+        conn,
+    )
+    pairs = match_mirrors(df, window)
+    if pairs:
+        try:
+            with conn:
+                conn.executemany("UPDATE transactions SET mirror_of = ? WHERE id = ?",
+                                 [(int(primary_id), int(mirror_id)) for mirror_id, primary_id in pairs])
+        except sqlite3.Error as e:
+            print(f"写入对账结果失败，已回滚: {e}")
+            raise
+        bump_write_generation()
+    logging.info(f"跨来源对账完成，新标记 {len(pairs)} 条镜像记录")
+    return len(pairs)
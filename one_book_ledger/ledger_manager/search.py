@@ -0,0 +1,108 @@
+"""
+全文搜索：在 transactions_fts 索引中按交易对方和交易说明搜索交易。
+
+FTS5 的 unicode61 分词器把连续的汉字当作一个词，trigram 分词器又无法匹配两个字的查询（如 '美团'），
+因此写入索引前先把每段连续的汉字展开为重叠的二元组：'美团外卖' 索引为 '美团 团外 外卖'，
+每段的最后一个字另外补在文本末尾，保证单字查询也能命中。查询时用同样的方式展开为短语，
+两个字及以上的子串都能走索引匹配。
+"""
+import re
+
+import pandas as pd
+
+# 中日韩文字（含扩展 A 区和兼容汉字）
+CJK_PATTERN = re.compile(r'[㐀-䶿一-鿿豈-﫿]+')
+# 搜索结果的默认条数上限
+SEARCH_LIMIT = 200
+# 可搜索的列
+SEARCH_COLUMNS = ('counterparty', 'description')
+
+
+def _bigrams(run):
+    #  单个汉字保持原样
+    return [run[i:i + 2] for i in range(len(run) - 1)] or [run]
+
+
+def fts_text(text):
+    """把交易对方或交易说明展开为写入全文索引的文本，空值返回空字符串。"""
+    if text is None or text != text:  # NaN 不等于自身
+        return ''
+    text = str(text)
+    tails = [run[-1] for run in CJK_PATTERN.findall(text) if len(run) > 1]
+    expanded = CJK_PATTERN.sub(lambda m: ' ' + ' '.join(_bigrams(m.group())) + ' ', text)
+    return ' '.join([expanded.strip()] + tails).strip()
+
+
+def fts_query(text):
+    """把用户输入的搜索词转换为 FTS5 查询，空白分隔的多个词之间为 AND 关系。
+
+    每个词展开为一个短语；以单个汉字结尾时（如 '美'）最后一个词元按前缀匹配，可以匹配以该字开头的二元组。
+
+    Returns:
+        str: FTS5 查询表达式；没有可搜索的内容时返回 None。
+    """
+    phrases = []
+    for term in str(text).split():
+        runs = list(CJK_PATTERN.finditer(term))
+        expanded = CJK_PATTERN.sub(lambda m: ' ' + ' '.join(_bigrams(m.group())) + ' ', term).strip()
+        if not re.search(r'\w', expanded):
+            continue
+        prefix = bool(runs) and runs[-1].end() == len(term) and len(runs[-1].group()) == 1
+        phrases.append('"' + expanded.replace('"', '""') + '"' + (' *' if prefix else ''))
+    return ' AND '.join(phrases) if phrases else None
+
+
+def index_transactions(cursor, after_id=0, until_id=None):
+    """把 id 在 (after_id, until_id] 区间内的交易写入全文索引，由调用方负责事务。
+
+    Args:
+        cursor (sqlite3.Cursor): 数据库游标。
+        after_id (int, optional): 只索引 id 大于该值的交易（导入前的最大 id）。默认为 0，即全部交易。
+        until_id (int, optional): 只索引 id 不大于该值的交易，用于分批建立索引。默认为 None，不限制。
+
+    Returns:
+        int: 写入索引的行数。
+    """
+    if until_id is None:
+        cursor.execute("SELECT id, counterparty, description FROM transactions WHERE id > ?", (after_id,))
+    else:
+        cursor.execute("SELECT id, counterparty, description FROM transactions WHERE id > ? AND id <= ?",
+                       (after_id, until_id))
+    rows = [(row_id, fts_text(counterparty), fts_text(description)) for row_id, counterparty, description in cursor.fetchall()]
+    cursor.executemany("INSERT INTO transactions_fts (rowid, counterparty, description) VALUES (?, ?, ?)", rows)
+    return len(rows)
+
+
+def search_transactions(conn, text, column=None, source=None, limit=SEARCH_LIMIT):
+    """按交易对方和交易说明全文搜索交易，结果按交易时间倒序。
+
+    Args:
+        conn (sqlite3.Connection): 数据库连接。
+        text (str): 搜索词，例如 '美团' 或 '起点中文网'；空白分隔的多个词需要同时出现。
+        column (str, optional): 只搜索该列，取值为 SEARCH_COLUMNS 之一。默认为 None，搜索两列。
+        source (str, optional): 只返回该来源的交易。
+        limit (int, optional): 最多返回的条数。默认为 SEARCH_LIMIT。
+
+    Returns:
+        pandas.DataFrame: 匹配的交易记录，金额列为 amount（元）。
+    """
+    if column is not None and column not in SEARCH_COLUMNS:
+        raise ValueError(f"不支持搜索的列: {column}")
+    query = fts_query(text)
+    if query is None:
+        return pd.DataFrame(columns=['id', 'time', 'category', 'counterparty', 'description', 'amount',
+                                     'direction', 'account', 'status', 'source'])
+    if column is not None:
+        query = f"{column} : ({query})"
+    sql = ("SELECT t.id, t.time, t.category, t.counterparty, t.description, t.amount_cents, t.direction, "
+           "t.account, t.status, t.source FROM transactions_fts JOIN transactions AS t ON t.id = transactions_fts.rowid "
+           "WHERE transactions_fts MATCH ?")
+    params = [query]
+    if source is not None:
+        sql += " AND t.source = ?"
+        params.append(source)
+    sql += " ORDER BY t.time DESC, t.id DESC LIMIT ?"
+    params.append(limit)
+    df = pd.read_sql_query(sql, conn, params=params)
+    df.insert(5, 'amount', df.pop('amount_cents') / 100)
+    return df
@@ -0,0 +1,52 @@
+"""
+账簿汇总：读取由触发器增量维护的 monthly_summary 表，汇总查询只读取预先汇总好的少量行。
+"""
+import pandas as pd
+
+
+def monthly_summary(conn, start_month=None, end_month=None, source=None, category=None):
+    """按 (月份, 来源, 分类, 收支) 查询月度汇总，镜像记录已排除。
+
+    Args:
+        conn (sqlite3.Connection): 数据库连接。
+        start_month (str, optional): 起始月份 'YYYY-MM'（含）。
+        end_month (str, optional): 结束月份 'YYYY-MM'（含）。
+        source (str, optional): 只统计该来源，例如 '微信'。
+        category (str, optional): 只统计该交易分类。
+
+    Returns:
+        pandas.DataFrame: 列为 month, source, category, direction, amount（元）, count。
+    """
+    conditions = []
+    params = []
+    for column, operator, value in (('month', '>=', start_month), ('month', '<=', end_month),
+                                    ('source', '=', source), ('category', '=', category)):
+        if value is not None:
+            conditions.append(f"{column} {operator} ?")
+            params.append(value)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    df = pd.read_sql_query(
+        f"SELECT month, source, category, direction, amount_cents, tx_count AS count FROM monthly_summary {where} "
+        f"ORDER BY month, source, category, direction",
+        conn, params=params,
+    )
+    df.insert(4, 'amount', df.pop('amount_cents') / 100)
+    return df
+
+
+def income_expense_by_month(conn, start_month=None, end_month=None, source=None):
+    """按月汇总收入和支出。
+
+    Args:
+        conn (sqlite3.Connection): 数据库连接。
+        start_month (str, optional): 起始月份 'YYYY-MM'（含）。
+        end_month (str, optional): 结束月份 'YYYY-MM'（含）。
+        source (str, optional): 只统计该来源。
+
+    Returns:
+        pandas.DataFrame: 以月份为索引，列为 收入, 支出（元）。
+    """
+    df = monthly_summary(conn, start_month, end_month, source)
+    totals = df[df['direction'].isin(['收入', '支出'])].pivot_table(
+        index='month', columns='direction', values='amount', aggfunc='sum', fill_value=0)
+    return totals.reindex(columns=['收入', '支出'], fill_value=0)
@@ -0,0 +1,307 @@
+"""
+数据库结构迁移：按顺序执行 MIGRATIONS，已执行到的版本号保存在 PRAGMA user_version 中。
+
+版本号与 SCHEMA_VERSION 一致时 migrate 只读取一次 user_version，不执行任何 DDL。
+修改表结构时在 MIGRATIONS 末尾追加新的迁移函数，不要修改已发布的迁移。
+
+每个迁移必须可以重复执行（CREATE ... IF NOT EXISTS、_ensure_column、只回填空值），
+这样迁移完成但版本号尚未写入时中断，下次启动重新执行也不会出错。数据量大的回填按 id 区间
+分批提交，避免长时间持有写锁。
+"""
+import contextlib
+import logging
+import sqlite3
+
+from one_book_ledger.ledger_manager.search import index_transactions
+
+# 分批回填时每批处理的 id 区间长度
+MIGRATION_BATCH_SIZE = 10000
+
+
+@contextlib.contextmanager
+def _transaction(conn):
+    """显式开启事务，成功时提交，异常时回滚（sqlite3 模块不会为 DDL 自动开启事务）。"""
+    conn.execute("BEGIN")
+    with conn:
+        yield conn.cursor()
+
+
+def _ensure_column(cursor, table_name, column_name, column_type):
+    #  旧数据库中缺少新增的列时补上
+    columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table_name})")]
+    if column_name not in columns:
+        cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}")
+
+
+def _in_batches(conn, apply, table_name="transactions", start=0, batch_size=None):
+    """把 table_name 中 id 大于 start 的行按 id 区间分批交给 apply(cursor, 起始 id, 结束 id)，每批单独提交。"""
+    batch_size = batch_size or MIGRATION_BATCH_SIZE
+    max_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table_name}").fetchone()[0]
+    for batch_start in range(start, max_id, batch_size):
+        with _transaction(conn) as cursor:
+            apply(cursor, batch_start, batch_start + batch_size)
+
+
+def _initial_tables(conn):
+    with _transaction(conn) as cursor:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS bill_files (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                filename TEXT NOT NULL,
+                bill_type TEXT NOT NULL,
+                storage_path TEXT NOT NULL,
+                upload_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS bill_types (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT UNIQUE NOT NULL,
+                parser_config TEXT --  解析器配置，暂时留空
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS transactions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_id INTEGER REFERENCES bill_files(id),
+                time TEXT,
+                category TEXT,
+                counterparty TEXT,
+                description TEXT,
+                amount_cents INTEGER,
+                direction TEXT,
+                account TEXT,
+                status TEXT,
+                source TEXT
+            )
+        """)  #  金额以分为单位的整数保存，time 为 'YYYY-MM-DD HH:MM:SS' 文本，可按字典序做范围查询
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS category_cache (
+                counterparty_key TEXT NOT NULL,
+                summary_key TEXT NOT NULL,
+                rules_version TEXT NOT NULL,
+                category TEXT NOT NULL,
+                PRIMARY KEY (counterparty_key, summary_key)
+            )
+        """)
+
+
+def _add_bill_file_tracking(conn):
+    with _transaction(conn) as cursor:
+        _ensure_column(cursor, "bill_files", "imported_at", "DATETIME")  #  导入账簿的时间，为空表示尚未导入
+        _ensure_column(cursor, "bill_files", "content_hash", "TEXT")  #  文件内容哈希，用于识别重复上传
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_bill_files_content_hash ON bill_files (content_hash)")
+
+
+def _add_amount_cents(conn):
+    with _transaction(conn) as cursor:
+        _ensure_column(cursor, "transactions", "amount_cents", "INTEGER")
+        has_legacy_amount = "amount" in [row[1] for row in cursor.execute("PRAGMA table_info(transactions)")]
+    if has_legacy_amount:
+        #  旧版本以 REAL 保存金额，换算为分
+        _in_batches(conn, lambda cursor, start, end: cursor.execute(
+            "UPDATE transactions SET amount_cents = CAST(ROUND(amount * 100) AS INTEGER) "
+            "WHERE id > ? AND id <= ? AND amount_cents IS NULL AND amount IS NOT NULL", (start, end)))
+
+
+def _add_time_indexes(conn):
+    with _transaction(conn) as cursor:
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_time ON transactions (time)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_source_time ON transactions (source, time)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_category_time ON transactions (category, time)")
+
+
+def _add_mirror_of(conn):
+    with _transaction(conn) as cursor:
+        _ensure_column(cursor, "transactions", "mirror_of", "INTEGER REFERENCES transactions(id)")  #  镜像记录指向的主记录，统计时跳过
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_mirror_of ON transactions (mirror_of)")
+
+
+def _add_incremental_import(conn):
+    with _transaction(conn) as cursor:
+        _ensure_column(cursor, "transactions", "fingerprint", "INTEGER")  #  行指纹，重叠账单中已导入的交易不再写入
+        cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_fingerprint ON transactions (fingerprint)")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS import_coverage (
+                source TEXT NOT NULL,
+                start_time TEXT NOT NULL,
+                end_time TEXT NOT NULL,
+                PRIMARY KEY (source, start_time)
+            )
+        """)  #  各来源已导入账单覆盖的时间区间
+
+
+# 月度汇总表的键：月份取交易时间的前 7 个字符 ('YYYY-MM')，空值统一为空字符串，保证唯一约束生效
+_SUMMARY_KEY = {
+    "month": "substr(COALESCE({row}.time, ''), 1, 7)",
+    "source": "COALESCE({row}.source, '')",
+    "category": "COALESCE({row}.category, '')",
+    "direction": "COALESCE({row}.direction, '')",
+}
+
+
+def _summary_add_sql(row, sign):
+    """生成把一行交易计入（sign=1）或移出（sign=-1）月度汇总的 SQL。"""
+    keys = ", ".join(expr.format(row=row) for expr in _SUMMARY_KEY.values())
+    return f"""
+        INSERT INTO monthly_summary (month, source, category, direction, amount_cents, tx_count)
+        VALUES ({keys}, {sign} * COALESCE({row}.amount_cents, 0), {sign})
+        ON CONFLICT (month, source, category, direction) DO UPDATE SET
+            amount_cents = amount_cents + excluded.amount_cents,
+            tx_count = tx_count + excluded.tx_count;
+    """
+
+
+def _add_monthly_summary(conn):
+    #  按 (月份, 来源, 分类, 收支) 预先汇总的金额和笔数，由 transactions 上的触发器增量维护，镜像记录不计入。
+    #  建表、触发器和回填在同一个事务中完成，回填是一条 GROUP BY 语句，不需要分批
+    with _transaction(conn) as cursor:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS monthly_summary (
+                month TEXT NOT NULL,
+                source TEXT NOT NULL,
+                category TEXT NOT NULL,
+                direction TEXT NOT NULL,
+                amount_cents INTEGER NOT NULL DEFAULT 0,
+                tx_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (month, source, category, direction)
+            )
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_summary_insert AFTER INSERT ON transactions
+            WHEN NEW.mirror_of IS NULL
+            BEGIN {_summary_add_sql("NEW", 1)} END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_summary_delete AFTER DELETE ON transactions
+            WHEN OLD.mirror_of IS NULL
+            BEGIN {_summary_add_sql("OLD", -1)}
+                DELETE FROM monthly_summary WHERE tx_count = 0;
+            END
+        """)
+        columns = "time, source, category, direction, amount_cents, mirror_of"
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_summary_update_old AFTER UPDATE OF {columns} ON transactions
+            WHEN OLD.mirror_of IS NULL
+            BEGIN {_summary_add_sql("OLD", -1)}
+                DELETE FROM monthly_summary WHERE tx_count = 0;
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_summary_update_new AFTER UPDATE OF {columns} ON transactions
+            WHEN NEW.mirror_of IS NULL
+            BEGIN {_summary_add_sql("NEW", 1)} END
+        """)
+        keys = ", ".join(expr.format(row="t") for expr in _SUMMARY_KEY.values())
+        cursor.execute("DELETE FROM monthly_summary")
+        cursor.execute(f"""
+            INSERT INTO monthly_summary (month, source, category, direction, amount_cents, tx_count)
+            SELECT {keys}, SUM(COALESCE(t.amount_cents, 0)), COUNT(*)
+            FROM transactions AS t WHERE t.mirror_of IS NULL
+            GROUP BY 1, 2, 3, 4
+        """)
+
+
+def _add_transactions_fts(conn):
+    #  交易对方和交易说明的全文索引，rowid 与 transactions.id 一致；导入时由 Ledger 写入展开后的文本，删除交易时由触发器同步删除
+    with _transaction(conn) as cursor:
+        cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts "
+                       "USING fts5(counterparty, description, tokenize = 'unicode61')")
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_transactions_fts_delete AFTER DELETE ON transactions
+            BEGIN DELETE FROM transactions_fts WHERE rowid = OLD.id; END
+        """)
+        indexed = cursor.execute("SELECT COALESCE(MAX(rowid), 0) FROM transactions_fts").fetchone()[0]
+    #  按 id 顺序分批建立索引，中断后从已索引的最大 id 继续
+    _in_batches(conn, index_transactions, start=indexed)
+
+
+def _add_amount_index(conn):
+    #  账簿页面按金额排序时的翻页键 (amount_cents, id)
+    with _transaction(conn) as cursor:
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_amount ON transactions (amount_cents)")
+
+
+def _add_rejected_files(conn):
+    #  无法识别或解析失败的账单文件，文件和解析器都未变化时批量导入不再重复解析
+    with _transaction(conn) as cursor:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS rejected_files (
+                storage_path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                parser_version TEXT NOT NULL,
+                error TEXT
+            )
+        """)
+
+
+def _drop_import_coverage(conn):
+    #  重复交易只由行指纹判断，按来源记录的已导入区间会跳过同一时段内其他账户的新交易，不再使用
+    with _transaction(conn) as cursor:
+        cursor.execute("DROP TABLE IF EXISTS import_coverage")
+
+
+def _add_archived_files(conn):
+    #  各账单文件已归档到年份分区的交易行数，撤销导入时据此拒绝跨越已归档年份的文件
+    with _transaction(conn) as cursor:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS archived_files (
+                file_id INTEGER NOT NULL,
+                year INTEGER NOT NULL,
+                row_count INTEGER NOT NULL,
+                PRIMARY KEY (file_id, year)
+            )
+        """)
+
+
+# 按版本顺序排列的迁移，第 n 个迁移执行后 user_version 为 n
+MIGRATIONS = [
+    _initial_tables,
+    _add_bill_file_tracking,
+    _add_amount_cents,
+    _add_time_indexes,
+    _add_mirror_of,
+    _add_incremental_import,
+    _add_monthly_summary,
+    _add_transactions_fts,
+    _add_amount_index,
+    _add_rejected_files,
+    _drop_import_coverage,
+    _add_archived_files,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """把数据库结构升级到 SCHEMA_VERSION。
+
+    Args:
+        conn (sqlite3.Connection): 数据库连接，不能处于未提交的事务中。
+
+    Returns:
+        int: 升级后的版本号。
+
+    Raises:
+        sqlite3.DatabaseError: 数据库版本高于当前程序支持的版本。
+        sqlite3.Error: 迁移失败，已完成的迁移保留，失败的迁移回滚。
+    """
+    version = get_schema_version(conn)
+    if version == SCHEMA_VERSION:
+        return version
+    if version > SCHEMA_VERSION:
+        raise sqlite3.DatabaseError(f"数据库版本 {version} 高于程序支持的版本 {SCHEMA_VERSION}，请升级程序")
+    for number in range(version + 1, SCHEMA_VERSION + 1):
+        migration = MIGRATIONS[number - 1]
+        try:
+            migration(conn)
+        except sqlite3.Error as e:
+            logging.error(f"数据库迁移 {number} ({migration.__name__}) 失败: {e}")
+            raise
+        conn.execute(f"PRAGMA user_version = {number}")
+        logging.info(f"数据库迁移 {number} ({migration.__name__}) 完成")
+    return SCHEMA_VERSION
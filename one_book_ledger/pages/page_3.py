@@ -0,0 +1,9 @@
+import streamlit as st
+
+from one_book_ledger.gui.ledger_view import render_ledger_view
+
+st.set_page_config(page_title="统一账簿", page_icon="📒", layout="wide")
+
+st.title("统一账簿")
+
+render_ledger_view()
@@ -1,32 +1,51 @@
 import os
-import datetime
-from database_helper import DatabaseHelper
+from one_book_ledger.database_helper import DatabaseHelper
+from one_book_ledger.bill_parser.parse_cache import content_hash
+from one_book_ledger.bill_parser.registry import BILL_TYPES, detect_bill_type
 
 # 资源文件存储目录
 RESOURCES_DIR = "resources"
 os.makedirs(RESOURCES_DIR, exist_ok=True)  # Ensure resources directory exists
 
-# 预定义的账单类型 (Consider moving to database later)
-BILL_TYPES = ["微信账单", "支付宝账单", "中信银行账单", "浦发银行账单"]
+# 上传时选择此项表示根据文件表头自动识别账单类型
+AUTO_DETECT_BILL_TYPE = "自动识别"
 
-def generate_unique_filename(original_filename):
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename, extension = os.path.splitext(original_filename)
-    unique_filename = f"{filename}_{timestamp}{extension}"
-    return unique_filename
+def content_addressed_filename(file_hash, original_filename):
+    #  按内容哈希命名：同一份账单无论上传多少次都只存一份
+    extension = os.path.splitext(original_filename)[1].lower()
+    return f"{file_hash}{extension}"
 
-def bill_file_uploader(uploaded_file, selected_bill_type):  # Remove Streamlit UI elements, accept arguments
+def bill_file_uploader(uploaded_file, selected_bill_type=AUTO_DETECT_BILL_TYPE):  # Remove Streamlit UI elements, accept arguments
     if uploaded_file is not None:
         original_filename = uploaded_file.name
-        unique_filename = generate_unique_filename(original_filename)
-        storage_path = os.path.join(RESOURCES_DIR, unique_filename)
+        data = uploaded_file.getvalue()
+        file_hash = content_hash(data)
 
+        db_helper = DatabaseHelper()
         try:
-            with open(storage_path, "wb") as f:
-                f.write(uploaded_file.getvalue())
+            # 解析之前先按内容哈希查重，重复上传的文件不再存储和解析
+            existing = db_helper.get_bill_file_by_hash(file_hash)
+        finally:
+            db_helper.close_connection()
+        if existing is not None:
+            return {"status": False, "duplicate": True,
+                    "message": f"文件 '{original_filename}' 与已上传的 '{existing['filename']}' 内容相同，已跳过"}
+
+        if selected_bill_type in (None, AUTO_DETECT_BILL_TYPE):
+            # 只读取已在内存中的文件开头，根据表头识别账单类型
+            spec, _ = detect_bill_type(uploaded_file)
+            if spec is None:
+                return {"status": False, "message": f"无法识别文件 '{original_filename}' 的账单类型，请手动选择账单类型"}
+            selected_bill_type = spec.bill_type
+        storage_path = os.path.join(RESOURCES_DIR, content_addressed_filename(file_hash, original_filename))
+
+        try:
+            if not os.path.exists(storage_path):  # 内容相同的文件已在磁盘上时无需重写
+                with open(storage_path, "wb") as f:
+                    f.write(data)
 
             db_helper = DatabaseHelper()
-            save_success = db_helper.save_bill_file_info(original_filename, selected_bill_type, storage_path)
+            save_success = db_helper.save_bill_file_info(original_filename, selected_bill_type, storage_path, file_hash)
             db_helper.close_connection()
 
             if save_success:
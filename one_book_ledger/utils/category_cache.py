@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+交易分类缓存：按 (交易对方, 交易说明) 记忆分类结果。
+
+进程内 LRU 在前，SQLite 的 category_cache 表在后；规则集变化时版本号随之变化，旧结果自动失效。
+"""
+import contextlib
+import hashlib
+import sqlite3
+from collections import OrderedDict
+
+import pandas as pd
+
+from one_book_ledger.utils.utils import TRANSACTION_TYPE_RULES, TransactionType, standardize_transaction_type
+
+# 规则版本：由规则内容计算，修改任何关键字或顺序都会得到新的版本号
+RULES_VERSION = hashlib.sha1(
+    repr([(transaction_type.name, keywords) for transaction_type, keywords in TRANSACTION_TYPE_RULES]).encode('utf-8')
+).hexdigest()[:12]
+
+# 进程内 LRU 容量
+CATEGORY_LRU_SIZE = 8192
+# 每条 SQL 查询的键数量，保证参数个数不超过 SQLite 上限
+_LOOKUP_BATCH_SIZE = 400
+
+_category_lru = OrderedDict()  # (规则版本, 交易对方键, 交易说明键) -> 分类
+_purged_versions = set()  # 本进程中已清理过旧版本记录的 (数据库, 规则版本)
+
+
+def normalize_key(text):
+    """规范化缓存键：空值视为空字符串，其余转换为小写。
+
+    分类规则本身就在小写文本上匹配（且部分关键字包含首尾空格），
+    因此只做小写转换，保证同一个键的分类结果与直接计算一致。
+    """
+    if text is None or text != text:  # NaN 不等于自身
+        return ''
+    return str(text).lower()
+
+
+def classify(counterparty, summary):
+    """根据交易说明判断交易类型，无法判断时再用交易对方判断。
+
+    Args:
+        counterparty (str): 交易对方。
+        summary (str): 交易说明。
+
+    Returns:
+        str: 交易类型 (TransactionType 枚举值)。
+    """
+    category = TransactionType.UNKNOWN.value
+    for text in (summary, counterparty):
+        if text:
+            category = standardize_transaction_type(text)
+            if category != TransactionType.UNKNOWN.value:
+                break
+    return category
+
+
+def _lru_get(key):
+    category = _category_lru.get(key)
+    if category is not None:
+        _category_lru.move_to_end(key)
+    return category
+
+
+def _lru_put(key, category):
+    _category_lru[key] = category
+    _category_lru.move_to_end(key)
+    if len(_category_lru) > CATEGORY_LRU_SIZE:
+        _category_lru.popitem(last=False)
+
+
+class CategoryMemo:
+    """带持久化的交易分类缓存。
+
+    Args:
+        conn (sqlite3.Connection): 数据库连接，需已包含 category_cache 表。
+        rules_version (str, optional): 规则版本号。默认为当前规则的 RULES_VERSION。
+    """
+
+    def __init__(self, conn, rules_version=RULES_VERSION):
+        self.conn = conn
+        self.rules_version = rules_version
+        self._purge_stale_versions()
+
+    def _purge_stale_versions(self):
+        #  规则变化后，删除旧版本规则产生的缓存记录（每个进程每个数据库只做一次）。
+        #  调用方已开启事务时不清理：提交别人的事务不是这里的职责，旧记录按版本号过滤，留到下次再删
+        database = self.conn.execute("PRAGMA database_list").fetchone()[2]
+        if (database, self.rules_version) in _purged_versions or self.conn.in_transaction:
+            return
+        try:
+            with self.conn:
+                self.conn.execute("DELETE FROM category_cache WHERE rules_version != ?", (self.rules_version,))
+            _purged_versions.add((database, self.rules_version))
+        except sqlite3.Error as e:
+            print(f"清理分类缓存失败: {e}")
+
+    def _load(self, keys):
+        """从 SQLite 批量读取缓存的分类，返回 {(交易对方键, 交易说明键): 分类}。"""
+        found = {}
+        for start in range(0, len(keys), _LOOKUP_BATCH_SIZE):
+            batch = keys[start:start + _LOOKUP_BATCH_SIZE]
+            values = ", ".join(["(?, ?)"] * len(batch))
+            params = [self.rules_version] + [part for key in batch for part in key]
+            rows = self.conn.execute(
+                f"SELECT counterparty_key, summary_key, category FROM category_cache "
+                f"WHERE rules_version = ? AND (counterparty_key, summary_key) IN (VALUES {values})",
+                params,
+            )
+            for counterparty_key, summary_key, category in rows:
+                found[(counterparty_key, summary_key)] = category
+        return found
+
+    def _save(self, categories):
+        #  调用方已开启事务（如导入账簿）时随调用方一起提交，否则单独提交
+        with contextlib.nullcontext() if self.conn.in_transaction else self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO category_cache (counterparty_key, summary_key, rules_version, category) "
+                "VALUES (?, ?, ?, ?)",
+                [(counterparty_key, summary_key, self.rules_version, category)
+                 for (counterparty_key, summary_key), category in categories.items()],
+            )
+
+    def lookup(self, pairs):
+        """查询一批 (交易对方, 交易说明) 的分类，未命中的计算后写回两级缓存。
+
+        Args:
+            pairs (iterable): (交易对方, 交易说明) 元组。
+
+        Returns:
+            dict: {(交易对方键, 交易说明键): 分类}，键为 normalize_key 规范化后的值。
+        """
+        results = {}
+        misses = []
+        for counterparty, summary in pairs:
+            key = (normalize_key(counterparty), normalize_key(summary))
+            if key in results:
+                continue
+            category = _lru_get((self.rules_version,) + key)
+            if category is None:
+                misses.append(key)
+                results[key] = None
+            else:
+                results[key] = category
+
+        if misses:
+            stored = self._load(misses)
+            computed = {}
+            for key in misses:
+                category = stored.get(key)
+                if category is None:
+                    category = classify(key[0], key[1])
+                    computed[key] = category
+                results[key] = category
+                _lru_put((self.rules_version,) + key, category)
+            if computed:
+                try:
+                    self._save(computed)
+                except sqlite3.Error as e:
+                    print(f"保存分类缓存失败: {e}")
+        return results
+
+    def categorize(self, counterparties, summaries):
+        """批量分类整列交易。
+
+        Args:
+            counterparties (pandas.Series): 交易对方列。
+            summaries (pandas.Series): 交易说明列，与 counterparties 索引一致。
+
+        Returns:
+            pandas.Series: 交易类型列。
+        """
+        counterparty_keys = counterparties.map(normalize_key)
+        summary_keys = summaries.map(normalize_key)
+        results = self.lookup(zip(counterparty_keys, summary_keys))
+        return pd.Series([results[key] for key in zip(counterparty_keys, summary_keys)],
+                         index=counterparties.index, dtype=object)
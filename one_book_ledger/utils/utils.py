@@ -9,6 +9,9 @@ import openpyxl
 import csv
 from enum import Enum # 导入 Enum
 
+import numpy as np
+import pandas as pd
+
 # -------------------------------- 交易类型枚举 ---------------------------------
 class TransactionType(Enum):
     """交易类型枚举"""
@@ -44,126 +47,119 @@ class TransactionType(Enum):
 
 
 # -------------------------------- 标准化交易类型函数 ---------------------------------
-def standardize_transaction_type(transaction_summary):
-    """
-    标准化交易摘要为统一的交易类型.
-
-    Args:
-        transaction_summary (str): 交易摘要字符串.
-
-    Returns:
-        str: 标准化后的交易类型 (TransactionType 枚举值).
-    """
-    summary = transaction_summary.lower() #  转换为小写，方便匹配
-
+# 交易类型关键字规则，按匹配优先级排列：(交易类型, 关键字正则)。关键字只匹配摘要开头。
+TRANSACTION_TYPE_RULES = [
     # 餐饮美食
-    if re.search(r'^(麦当劳|肯德基|星巴克|咖啡|餐饮|美食|茶饮|小吃|快餐|外卖|餐厅|饭店|食堂|自助餐|火锅|烧烤|烤肉|披萨|汉堡|炸鸡|奶茶|果汁|面包|蛋糕|甜点|零食|夜宵|早点|午餐|晚餐|宵夜|下午茶|咖啡馆|餐馆|小馆|饭馆|酒楼|菜馆|茶餐厅|料理|美食城| food | eat | dining | restaurant | coffee | cafe | mcdonald\'s | kfc | starbucks)', summary):
-        return TransactionType.DINING.value
-
+    (TransactionType.DINING, r'麦当劳|肯德基|星巴克|咖啡|餐饮|美食|茶饮|小吃|快餐|外卖|餐厅|饭店|食堂|自助餐|火锅|烧烤|烤肉|披萨|汉堡|炸鸡|奶茶|果汁|面包|蛋糕|甜点|零食|夜宵|早点|午餐|晚餐|宵夜|下午茶|咖啡馆|餐馆|小馆|饭馆|酒楼|菜馆|茶餐厅|料理|美食城| food | eat | dining | restaurant | coffee | cafe | mcdonald\'s | kfc | starbucks'),
     # 交通出行
-    elif re.search(r'^(地铁|公交|滴滴|打车|出租车|共享单车|单车|自行车|火车|高铁|机票| bus | subway | taxi | ride | bike | transportation | travel | airport | railway | station | 轨道交通)', summary):
-        return TransactionType.TRANSPORTATION.value
-
+    (TransactionType.TRANSPORTATION, r'地铁|公交|滴滴|打车|出租车|共享单车|单车|自行车|火车|高铁|机票| bus | subway | taxi | ride | bike | transportation | travel | airport | railway | station | 轨道交通'),
     # 购物消费 (更细化的购物类型可以继续添加)
-    elif re.search(r'^(淘宝|天猫|京东|拼多多|亚马逊|当当|唯品会|苏宁易购|国美电器|超市|商场|购物|消费|买| purchase | shop | shopping | tmall | taobao | jd.com | pdd | amazon | supermarket | mall | store | 门店|便利店|7-eleven|全家|屈臣氏|沃尔玛|家乐福|华联|物美|永辉|京客隆|超市发|超市发超市)', summary):
-        return TransactionType.SHOPPING.value
-
+    (TransactionType.SHOPPING, r'淘宝|天猫|京东|拼多多|亚马逊|当当|唯品会|苏宁易购|国美电器|超市|商场|购物|消费|买| purchase | shop | shopping | tmall | taobao | jd.com | pdd | amazon | supermarket | mall | store | 门店|便利店|7-eleven|全家|屈臣氏|沃尔玛|家乐福|华联|物美|永辉|京客隆|超市发|超市发超市'),
     # 休闲娱乐
-    elif re.search(r'^(电影|KTV|酒吧|剧院|演出|展览|演唱会|音乐会|体育赛事|健身|运动|游戏|视频会员|音乐会员|电影票|ktv | bar | theater | performance | exhibition | concert | sports | fitness | exercise | game | movie | entertainment | leisure)', summary):
-        return TransactionType.ENTERTAINMENT.value
-
+    (TransactionType.ENTERTAINMENT, r'电影|KTV|酒吧|剧院|演出|展览|演唱会|音乐会|体育赛事|健身|运动|游戏|视频会员|音乐会员|电影票|ktv | bar | theater | performance | exhibition | concert | sports | fitness | exercise | game | movie | entertainment | leisure'),
     # 日用百货
-    elif re.search(r'^(日用品|百货|家居|家纺|厨具|餐具|家电|电器|数码|手机|电脑|办公用品|文具|纸巾|牙膏|洗发水|沐浴露|洗衣液|卫生巾| household | daily use | necessities | home | furniture | appliance | digital | stationery | paper | tissue | toothpaste | shampoo | body wash | laundry detergent)', summary):
-        return TransactionType.DAILY_NECESSITIES.value
-
+    (TransactionType.DAILY_NECESSITIES, r'日用品|百货|家居|家纺|厨具|餐具|家电|电器|数码|手机|电脑|办公用品|文具|纸巾|牙膏|洗发水|沐浴露|洗衣液|卫生巾| household | daily use | necessities | home | furniture | appliance | digital | stationery | paper | tissue | toothpaste | shampoo | body wash | laundry detergent'),
     # 商超购物 (可以更精细化)
-    elif re.search(r'^(超市|商场|shopping mall|supermarket|mart|grocery store| hypermarket)', summary):
-        return TransactionType.SUPERMARKET.value
-
+    (TransactionType.SUPERMARKET, r'超市|商场|shopping mall|supermarket|mart|grocery store| hypermarket'),
     # 生鲜食品
-    elif re.search(r'^(生鲜|水果|蔬菜|肉|禽|蛋|海鲜|水产| dairy | fruit | vegetable | meat | seafood | grocery | produce | fresh food)', summary):
-        return TransactionType.GROCERY.value
-
+    (TransactionType.GROCERY, r'生鲜|水果|蔬菜|肉|禽|蛋|海鲜|水产| dairy | fruit | vegetable | meat | seafood | grocery | produce | fresh food'),
     # 数码家电
-    elif re.search(r'^(数码产品|电子产品|家电|手机|电脑|平板|相机|电视|冰箱|洗衣机|空调| digital product | electronics | appliance | mobile phone | computer | tablet | camera | tv | refrigerator | washing machine | air conditioner)', summary):
-        return TransactionType.DIGITAL_PRODUCTS.value
-
-     # 服饰鞋包
-    elif re.search(r'^(服装|衣服|鞋子|包|帽子|围巾|手套| fashion | clothing | clothes | shoes | bags | hats | scarves | gloves)', summary):
-        return TransactionType.CLOTHING.value
-
+    (TransactionType.DIGITAL_PRODUCTS, r'数码产品|电子产品|家电|手机|电脑|平板|相机|电视|冰箱|洗衣机|空调| digital product | electronics | appliance | mobile phone | computer | tablet | camera | tv | refrigerator | washing machine | air conditioner'),
+    # 服饰鞋包
+    (TransactionType.CLOTHING, r'服装|衣服|鞋子|包|帽子|围巾|手套| fashion | clothing | clothes | shoes | bags | hats | scarves | gloves'),
     # 美妆个护
-    elif re.search(r'^(化妆品|护肤品|彩妆|香水| personal care | beauty | cosmetics | makeup | perfume | skincare | 美容|个护)', summary):
-        return TransactionType.BEAUTY_COSMETICS.value
-
+    (TransactionType.BEAUTY_COSMETICS, r'化妆品|护肤品|彩妆|香水| personal care | beauty | cosmetics | makeup | perfume | skincare | 美容|个护'),
     # 图书音像
-    elif re.search(r'^(图书|书籍|书店|音像制品|电影|音乐|唱片|书本|杂志|报纸|电子书| ebook | books | bookstore | media | film | music | cd | magazine | newspaper)', summary):
-        return TransactionType.BOOKS_MEDIA.value
-
+    (TransactionType.BOOKS_MEDIA, r'图书|书籍|书店|音像制品|电影|音乐|唱片|书本|杂志|报纸|电子书| ebook | books | bookstore | media | film | music | cd | magazine | newspaper'),
     # 旅行
-    elif re.search(r'^(旅行|酒店|住宿|景点|机票|火车票|旅游|旅馆|客栈|酒店住宿|hotel | accommodation | scenic spot | flight ticket | train ticket | travel | tourism | hostel | inn)', summary):
-        return TransactionType.TRAVEL.value
-
+    (TransactionType.TRAVEL, r'旅行|酒店|住宿|景点|机票|火车票|旅游|旅馆|客栈|酒店住宿|hotel | accommodation | scenic spot | flight ticket | train ticket | travel | tourism | hostel | inn'),
     # 住房缴费
-    elif re.search(r'^(房租|物业费|房贷|租房| mortgage | rent | property management fee | housing payment)', summary):
-        return TransactionType.HOUSING.value
-
+    (TransactionType.HOUSING, r'房租|物业费|房贷|租房| mortgage | rent | property management fee | housing payment'),
     # 水电煤缴费
-    elif re.search(r'^(水费|电费|燃气费| energy bill | water bill | electricity bill | gas bill | utility bill | 水电费|煤气费)', summary):
-        return TransactionType.UTILITIES.value
-
+    (TransactionType.UTILITIES, r'水费|电费|燃气费| energy bill | water bill | electricity bill | gas bill | utility bill | 水电费|煤气费'),
     # 通讯缴费
-    elif re.search(r'^(话费|流量费|宽带费|网费|通讯费|电话费|手机费|通信费| telecommunication fee | phone bill | mobile bill | internet fee | broadband fee | network fee)', summary):
-        return TransactionType.TELECOMMUNICATIONS.value
-
+    (TransactionType.TELECOMMUNICATIONS, r'话费|流量费|宽带费|网费|通讯费|电话费|手机费|通信费| telecommunication fee | phone bill | mobile bill | internet fee | broadband fee | network fee'),
     # 金融服务 (可以更精细化)
-    elif re.search(r'^(理财|保险|证券|基金|股票|期货|银行|支付|贷款| finance | insurance | securities | fund | stock | futures | bank | payment | loan | 金融|理财产品| investment)', summary):
-        return TransactionType.FINANCIAL_SERVICES.value
+    (TransactionType.FINANCIAL_SERVICES, r'理财|保险|证券|基金|股票|期货|银行|支付|贷款| finance | insurance | securities | fund | stock | futures | bank | payment | loan | 金融|理财产品| investment'),
+    # 工资收入  "收入-工资" 匹配 微信账单中的 "收入-工资" 类型
+    (TransactionType.SALARY, r'工资|薪资| salary | wage | income | 收入-工资'),
+    # 投资理财收入
+    (TransactionType.INVESTMENT_INCOME, r'投资收入|理财收入|分红| dividend | investment income | wealth management income'),
+    # 利息收入  "收益-利息" 匹配 微信账单中的 "收益-利息" 类型
+    (TransactionType.INTEREST, r'利息| interest | 收益-利息'),
+    # 退税
+    (TransactionType.TAX_REFUND, r'退税| tax refund '),
+    # 信用卡还款
+    (TransactionType.CREDIT_CARD_REPAYMENT, r'信用卡还款| credit card repayment '),
+    # 现金提取/提现
+    (TransactionType.CASH_WITHDRAWAL, r'现金提取|提现| withdraw | cash withdrawal '),
+    # 支付 (更通用的支付类型，放在最后匹配)
+    (TransactionType.PAYMENT, r'支付|付款|缴费| spend | pay | payment | expense'),
+    # 转账  "支出-转账" 匹配 微信账单中的 "支出-转账" 类型
+    (TransactionType.TRANSFER, r'转账| transfer | 支出-转账'),
+    # 充值  "收入-充值" 匹配 微信账单中的 "收入-充值" 类型
+    (TransactionType.RECHARGE, r'充值| recharge | 收入-充值'),
+    # 退款
+    (TransactionType.REFUND, r'退款| refund '),
+]
 
-    # 工资收入
-    elif re.search(r'^(工资|薪资| salary | wage | income | 收入-工资)', summary): # "收入-工资" 匹配 微信账单中的 "收入-工资" 类型
-        return TransactionType.SALARY.value
 
-    # 投资理财收入
-    elif re.search(r'^(投资收入|理财收入|分红| dividend | investment income | wealth management income)', summary):
-        return TransactionType.INVESTMENT_INCOME.value
+def _compile_transaction_type_pattern(rules):
+    """把全部关键字规则编译为一个带命名分组的正则，分组顺序即匹配优先级。"""
+    alternatives = "|".join(f"(?P<{transaction_type.name}>{keywords})" for transaction_type, keywords in rules)
+    return re.compile(f"^(?:{alternatives})")
 
-    # 利息收入
-    elif re.search(r'^(利息| interest | 收益-利息)', summary): # "收益-利息" 匹配 微信账单中的 "收益-利息" 类型
-        return TransactionType.INTEREST.value
 
-    # 退税
-    elif re.search(r'^(退税| tax refund )', summary):
-        return TransactionType.TAX_REFUND.value
+# 所有规则只编译一次；一次 match 即可按优先级得到第一个命中的交易类型
+TRANSACTION_TYPE_PATTERN = _compile_transaction_type_pattern(TRANSACTION_TYPE_RULES)
 
-    # 信用卡还款
-    elif re.search(r'^(信用卡还款| credit card repayment )', summary):
-        return TransactionType.CREDIT_CARD_REPAYMENT.value
 
-    # 现金提取/提现
-    elif re.search(r'^(现金提取|提现| withdraw | cash withdrawal )', summary):
-        return TransactionType.CASH_WITHDRAWAL.value
+def _match_transaction_type(summary):
+    """对已转换为小写的摘要做一次匹配，返回交易类型枚举值。"""
+    match = TRANSACTION_TYPE_PATTERN.match(summary)
+    if match is None:
+        return TransactionType.UNKNOWN.value # 默认未知类型
+    return TransactionType[match.lastgroup].value
 
-    # 支付 (更通用的支付类型，放在最后匹配)
-    elif re.search(r'^(支付|付款|缴费| spend | pay | payment | expense)', summary):
-        return TransactionType.PAYMENT.value
 
-    # 转账
-    elif re.search(r'^(转账| transfer | 支出-转账)', summary): # "支出-转账" 匹配 微信账单中的 "支出-转账" 类型
-        return TransactionType.TRANSFER.value
+def standardize_transaction_type(transaction_summary):
+    """
+    标准化交易摘要为统一的交易类型.
 
-    # 充值
-    elif re.search(r'^(充值| recharge | 收入-充值)', summary): # "收入-充值" 匹配 微信账单中的 "收入-充值" 类型
-        return TransactionType.RECHARGE.value
+    Args:
+        transaction_summary (str): 交易摘要字符串.
+
+    Returns:
+        str: 标准化后的交易类型 (TransactionType 枚举值).
+    """
+    return _match_transaction_type(transaction_summary.lower()) #  转换为小写，方便匹配
 
-    # 退款
-    elif re.search(r'^(退款| refund )', summary):
-        return TransactionType.REFUND.value
 
-    return TransactionType.UNKNOWN.value # 默认未知类型
+def categorize(summaries):
+    """
+    批量标准化整列交易摘要.
+
+    同一摘要只匹配一次：先对小写后的摘要去重，再把结果映射回每一行。
+
+    Args:
+        summaries (pandas.Series): 交易摘要列.
+
+    Returns:
+        pandas.Series: 与输入索引一致的交易类型列 (TransactionType 枚举值)，空值为未知类型.
+    """
+    codes, uniques = pd.factorize(summaries.str.lower())
+    categories = np.array([_match_transaction_type(summary) for summary in uniques] + [TransactionType.UNKNOWN.value],
+                          dtype=object)
+    return pd.Series(categories[codes], index=summaries.index, dtype=object)  # 空值的编码为 -1，对应末尾的未知类型
 
 
 # -------------------------------- 金额解析函数 ---------------------------------
+CURRENCY_AMOUNT_PATTERN = re.compile(r'[\uFFE5¥\$](-?[\d,\.]+(?:\.\d{2})?)') # 匹配人民币/日元/美元符号及金额
+CNY_AMOUNT_PATTERN = re.compile(r'CNY\s*(-?[\d,\.]+(?:\.\d{2})?)', re.IGNORECASE) # 匹配 "CNY" 前缀
+# 汇总警告中列出的失败示例个数
+AMOUNT_FAILURE_SAMPLES = 5
+
+
 def parse_amount(amount_str, transaction_type=TransactionType.UNKNOWN): #  添加 transaction_type 参数，并设置默认值为 UNKNOWN
     """
     解析金额字符串为浮点数.
@@ -188,12 +184,12 @@ def parse_amount(amount_str, transaction_type=TransactionType.UNKNOWN): #  添
         except ValueError:
             try:
                 #  处理中文金额格式 (例如 "￥123.45" 或 "CNY 123.45")
-                amount_match = re.search(r'[\uFFE5¥\$](-?[\d,\.]+(?:\.\d{2})?)', amount_str) # 匹配人民币/日元/美元符号及金额
+                amount_match = CURRENCY_AMOUNT_PATTERN.search(amount_str) # 匹配人民币/日元/美元符号及金额
                 if amount_match:
                     amount_value = amount_match.group(1).replace(',', '')
                     return float(amount_value)
                 else:
-                    amount_match_cny_prefix = re.search(r'CNY\s*(-?[\d,\.]+(?:\.\d{2})?)', amount_str, re.IGNORECASE) # 匹配 "CNY" 前缀
+                    amount_match_cny_prefix = CNY_AMOUNT_PATTERN.search(amount_str) # 匹配 "CNY" 前缀
                     if amount_match_cny_prefix:
                         amount_value = amount_match_cny_prefix.group(1).replace(',', '')
                         return float(amount_value)
@@ -204,7 +200,72 @@ def parse_amount(amount_str, transaction_type=TransactionType.UNKNOWN): #  添
                 return 0.0 # 解析失败返回 0.0
 
 
+def parse_amount_series(amounts, transaction_type=TransactionType.UNKNOWN, failed_value=0.0):
+    """
+    批量解析整列金额.
+
+    先对整列做一次 pd.to_numeric，只有转换失败的行才依次尝试去除千分位分隔符、
+    货币符号和 "CNY" 前缀，规则与 parse_amount 相同。所有失败行汇总为一条警告。
+
+    Args:
+        amounts (pandas.Series): 金额列 (字符串或数值).
+        transaction_type (TransactionType, optional): 交易类型 (用于警告信息). 默认为 TransactionType.UNKNOWN.
+        failed_value (float, optional): 解析失败的行的取值. 默认为 0.0 (与 parse_amount 一致)，传入 NaN 可区分失败行.
+
+    Returns:
+        pandas.Series: float64 金额列，与输入索引一致。解析失败的行为 failed_value，原本为空的行保持为 NaN。
+    """
+    result = pd.to_numeric(amounts, errors='coerce').astype('float64')
+    pending = result.isna() & amounts.notna()
+    if not pending.any():
+        return result
+
+    #  处理千分位分隔符 (例如 "1,234.56")
+    text = amounts[pending].astype(str)
+    values = pd.to_numeric(text.str.replace(',', '', regex=False), errors='coerce')
+    remaining = values.isna()
+    if remaining.any():
+        #  处理中文金额格式 (例如 "￥123.45" 或 "CNY 123.45")，货币符号优先于 "CNY" 前缀
+        rest = text[remaining]
+        matched = rest.str.extract(CURRENCY_AMOUNT_PATTERN, expand=False)
+        matched = matched.where(matched.notna(), rest.str.extract(CNY_AMOUNT_PATTERN, expand=False))
+        values[remaining] = pd.to_numeric(matched.str.replace(',', '', regex=False), errors='coerce')
+
+    failed = text[values.isna()]
+    if len(failed):
+        logging.warning(f"警告: {len(failed)} 个金额解析失败, 交易类型: {transaction_type.value}, "
+                        f"示例: {failed.head(AMOUNT_FAILURE_SAMPLES).tolist()}")
+    result[pending] = values.fillna(failed_value) # 解析失败默认返回 0.0
+    return result
+
+
 # -------------------------------- 日期时间解析函数 ---------------------------------
+# 自动推断时尝试的常见格式 (根据实际账单格式添加更多格式)，按尝试顺序排列
+DATETIME_FORMATS = [
+    '%Y-%m-%d %H:%M:%S', #  常见格式 1:  微信/支付宝账单，例如 '2023-10-26 10:30:00'
+    '%Y%m%d', #  常见格式 2:  银行账单，例如 '20231026'
+    '%Y/%m/%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y/%m/%d %H:%M',
+    '%Y-%m-%d',
+    '%Y/%m/%d',
+]
+# 整列解析时用于推断格式的样本数
+DATETIME_SAMPLE_SIZE = 200
+# 汇总警告中列出的失败示例个数
+DATETIME_FAILURE_SAMPLES = 5
+
+
+def _strptime_any(datetime_value, formats):
+    """依次尝试多个格式解析日期时间字符串，全部失败时返回 None。"""
+    for fmt in formats:
+        try:
+            return datetime.datetime.strptime(datetime_value, fmt)
+        except ValueError:
+            continue # 尝试下一个格式
+    return None
+
+
 def parse_datetime(datetime_value, date_format=None):
     """
     解析日期时间字符串为 datetime 对象.
@@ -223,20 +284,73 @@ def parse_datetime(datetime_value, date_format=None):
             logging.warning(f"警告: 日期时间解析失败 (指定格式): {datetime_value}, 格式: {date_format}, 错误信息: {e}") ###  添加调试日志，输出具体错误信息 ###
             return None
     else:
-        # 尝试自动推断常见格式 (根据实际账单格式添加更多格式)
-        formats_to_try = [
-            '%Y-%m-%d %H:%M:%S', #  常见格式 1:  例如 '2023-10-26 10:30:00'
-            # ... (其他格式字符串) ...
-        ]
-        for fmt in formats_to_try:
-            try:
-                return datetime.datetime.strptime(datetime_value, fmt)
-            except ValueError as e: ###  添加调试日志  ###
-                logging.debug(f"尝试格式 '{fmt}' 解析日期 '{datetime_value}' 失败: {e}") ###  添加调试日志，输出尝试的格式和错误信息 ###
-                continue # 尝试下一个格式
+        # 尝试自动推断常见格式
+        parsed = _strptime_any(datetime_value, DATETIME_FORMATS)
+        if parsed is None:
+            logging.warning(f"警告: 日期时间解析失败 (自动推断格式): {datetime_value}, 尝试格式: {DATETIME_FORMATS}")
+        return parsed # 所有格式都尝试失败后返回 None
+
+
+def infer_datetime_format(values, formats=DATETIME_FORMATS):
+    """
+    根据样本推断日期时间格式.
+
+    Args:
+        values (pandas.Series): 日期时间字符串样本 (不含空值).
+        formats (list, optional): 候选格式，按优先级排列. 默认为 DATETIME_FORMATS.
 
-        logging.warning(f"警告: 日期时间解析失败 (自动推断格式): {datetime_value}, 尝试格式: {formats_to_try}")
-        return None # 所有格式都尝试失败后返回 None
+    Returns:
+        str: 能解析最多样本的格式 (相同时取靠前的)；样本为空或都无法解析时返回 None.
+    """
+    best_format, best_count = None, 0
+    for fmt in formats:
+        count = pd.to_datetime(values, format=fmt, errors='coerce').notna().sum()
+        if count > best_count:
+            best_format, best_count = fmt, count
+            if count == len(values):
+                break # 全部样本都能解析，无需再尝试其他格式
+    return best_format
+
+
+def parse_datetime_series(values, date_format=None):
+    """
+    批量解析整列日期时间.
+
+    未指定格式时，先从样本推断一次格式，再用该格式对整列做一次向量化转换；
+    只有不符合该格式的个别值才逐个尝试 DATETIME_FORMATS。所有失败值汇总为一条警告。
+
+    Args:
+        values (pandas.Series): 日期时间列 (字符串、'YYYYMMDD' 形式的整数或 datetime).
+        date_format (str, optional): 指定的日期时间格式. 默认为 None，表示自动推断.
+
+    Returns:
+        pandas.Series: datetime64 列，与输入索引一致；无法解析或原本为空的值为 NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values # 已经是日期时间列，直接返回
+
+    if pd.api.types.is_numeric_dtype(values):
+        text = values.round().astype('Int64').astype('string') # 银行账单中 20231026 形式的整数日期
+    else:
+        text = values.where(values.isna(), values.astype(str))
+    text = text.where(text.str.strip() != '') # 空字符串视为空值
+
+    non_null = text.dropna()
+    fmt = date_format or infer_datetime_format(non_null.drop_duplicates().head(DATETIME_SAMPLE_SIZE))
+    if fmt is None:
+        parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[us]')
+    else:
+        parsed = pd.to_datetime(text, format=fmt, errors='coerce')
+
+    outliers = parsed.isna() & text.notna()
+    if outliers.any():
+        fallback = text[outliers].map(lambda value: _strptime_any(value, DATETIME_FORMATS))
+        parsed[outliers] = pd.to_datetime(fallback)
+        failed = text[outliers][fallback.isna()]
+        if len(failed):
+            logging.warning(f"警告: {len(failed)} 个日期时间解析失败, 推断格式: {fmt}, "
+                            f"示例: {failed.head(DATETIME_FAILURE_SAMPLES).tolist()}")
+    return parsed
 
 # -------------------------------- XLS 账单文件解析函数 ---------------------------------
 
@@ -255,40 +369,38 @@ def parse_xls_bill(xls_filepath, column_name_mapping):
     """
     bill_data = []
     try:
-        workbook = openpyxl.load_workbook(xls_filepath)
-        sheet = workbook.active
-        header_row = [cell.value for cell in sheet[1]] # 获取表头行
-
-        if not header_row:
-            logging.error(f"错误: XLS 文件缺少表头行: {xls_filepath}") # 使用 logging 输出错误
-            return None
-
-        # 获取列索引
-        column_indices = {}
-        for col_name_xls, field_name in column_name_mapping.items():
-            try:
-                column_indices[field_name] = header_row.index(col_name_xls)
-            except ValueError:
-                logging.warning(f"警告: XLS 文件缺少列: {col_name_xls}") # 使用 logging 输出警告
-                column_indices[field_name] = None #  如果找不到列，则设置为 None
-
-        # 从第二行开始遍历数据行
-        for row_index in range(2, sheet.max_row + 1):
-            bill_item = {}
-            row_values = [cell.value for cell in sheet[row_index]]
-
-            if not any(row_values): # 跳过空行
-                continue
-
-            try:
-                for field_name, col_index in column_indices.items():
-                    if col_index is not None: #  只处理找到的列
-                        bill_item[field_name] = row_values[col_index]
-                bill_data.append(bill_item)
-
-            except Exception as e:
-                logging.warning(f"解析 XLS 账单行出错 (行号: {row_index}): {e}") # 使用 logging 输出警告，包含行号
-                continue # 跳过错误行
+        #  只读模式逐行读取单元格的值，不会把整个工作簿的单元格对象载入内存
+        workbook = openpyxl.load_workbook(xls_filepath, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header_row = next(rows, None) # 获取表头行
+
+            if not header_row:
+                logging.error(f"错误: XLS 文件缺少表头行: {xls_filepath}") # 使用 logging 输出错误
+                return None
+
+            # 获取列索引，只读取映射中的列
+            column_indices = {}
+            for col_name_xls, field_name in column_name_mapping.items():
+                try:
+                    column_indices[field_name] = header_row.index(col_name_xls)
+                except ValueError:
+                    logging.warning(f"警告: XLS 文件缺少列: {col_name_xls}") # 使用 logging 输出警告
+            fields = list(column_indices.items())
+
+            # 从第二行开始遍历数据行
+            for row_index, row_values in enumerate(rows, start=2):
+                if not any(row_values): # 跳过空行
+                    continue
+
+                try:
+                    bill_data.append({field_name: row_values[col_index] if col_index < len(row_values) else None
+                                      for field_name, col_index in fields})
+                except Exception as e:
+                    logging.warning(f"解析 XLS 账单行出错 (行号: {row_index}): {e}") # 使用 logging 输出警告，包含行号
+                    continue # 跳过错误行
+        finally:
+            workbook.close()
 
         return bill_data
 
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+from one_book_ledger.bill_parser.utils import transform_dataframe
+from one_book_ledger.bill_parser.common_paser import parse, parse_iter, read_plan
+from one_book_ledger.bill_parser import zhongxin_parser
+from one_book_ledger.bill_parser.wechat_parser import COLUMN_MAPPING, EXTRA_COLUMNS, normalize_wechat_change
+
+
+WECHAT_HEADER = '交易时间,交易类型,交易对方,商品,收/支,金额(元),支付方式,当前状态,交易单号,商户单号,备注\n'
+
+
+class TestParseIter(unittest.TestCase):
+
+    def setUp(self):
+        # 构造一个微信格式的CSV文件：16 行说明 + 表头 + 数据行
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.temp_dir.name, 'wechat.csv')
+        lines = [f'说明行{i}\n' for i in range(16)] + [WECHAT_HEADER]
+        for i in range(25):
+            status = '已存入零钱' if i % 5 == 0 else '支付成功'
+            lines.append(f'2025-01-{i % 28 + 1:02d} 10:00:00,商户消费,商户{i},商品{i},支出,¥{i}.50,零钱,{status},T{i},M{i},/\n')
+        with open(self.csv_path, 'w', encoding='utf-8') as f:
+            f.writelines(lines)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_parse_iter_matches_parse(self):
+        full_df = parse(self.csv_path, COLUMN_MAPPING, EXTRA_COLUMNS, 'utf-8', 16, post_process=normalize_wechat_change)
+        chunks = list(parse_iter(self.csv_path, COLUMN_MAPPING, EXTRA_COLUMNS, 'utf-8', 16,
+                                 chunksize=10, post_process=normalize_wechat_change))
+
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+        pd.testing.assert_frame_equal(pd.concat(chunks), full_df)
+        self.assertEqual((full_df['交易状态'] == '已存入零钱').sum(), 0)
+        self.assertEqual(list(full_df['统计账单'].unique()), ['微信'])
+
+    def test_parse_iter_raises_mid_file_errors(self):
+        calls = []
+
+        def fail_on_second_chunk(df):
+            calls.append(df)
+            if len(calls) == 2:
+                raise ValueError('坏数据')
+            return df
+
+        chunks = parse_iter(self.csv_path, COLUMN_MAPPING, EXTRA_COLUMNS, 'utf-8', 16,
+                            chunksize=10, post_process=fail_on_second_chunk)
+        self.assertEqual(len(next(chunks)), 10)
+        with self.assertRaises(ValueError):
+            next(chunks)
+
+    def test_parse_iter_unsupported_extension(self):
+        self.assertEqual(list(parse_iter('bill.txt', COLUMN_MAPPING)), [])
+
+
+class TestReadPlan(unittest.TestCase):
+
+    def test_plan_from_mapping(self):
+        plan = read_plan(COLUMN_MAPPING)
+        self.assertEqual(plan['usecols'], ['交易时间', '交易类型', '交易对方', '商品', '金额(元)', '收/支', '支付方式', '当前状态'])
+        self.assertEqual(plan['dtype']['收/支'], 'category')
+        self.assertEqual(plan['dtype']['金额(元)'], 'str')
+
+    def test_shared_source_column_is_read_once(self):
+        plan = read_plan(zhongxin_parser.COLUMN_MAPPING)
+        self.assertEqual(plan['usecols'], ['交易日期', '交易摘要', '交易对方', '交易金额'])
+        self.assertEqual(set(plan['dtype'].values()), {'str'})  # 带转换函数的列不做 category
+
+    def test_unused_columns_are_not_read(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_path = os.path.join(temp_dir, 'wechat.csv')
+            with open(csv_path, 'w', encoding='utf-8') as f:
+                f.write(WECHAT_HEADER + '2025-01-01 10:00:00,商户消费,商户,商品,支出,¥1.50,零钱,支付成功,T1,M1,/\n')
+            with mock.patch('one_book_ledger.bill_parser.common_paser.transform_dataframe',
+                            wraps=transform_dataframe) as transform:
+                df = parse(csv_path, COLUMN_MAPPING, EXTRA_COLUMNS, 'utf-8', 0)
+        raw = transform.call_args.args[0]
+        self.assertNotIn('交易单号', raw.columns)
+        self.assertNotIn('备注', raw.columns)
+        self.assertEqual(df['收/支'].dtype, 'category')
+        self.assertEqual(df.loc[0, '交易金额'], '¥1.50')
+
+    def test_missing_and_padded_columns(self):
+        # 缺少可选的“当前状态”列，且“金额(元)”列名两侧带空格
+        header = WECHAT_HEADER.replace(',当前状态', '').replace('金额(元)', ' 金额(元) ')
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_path = os.path.join(temp_dir, 'wechat.csv')
+            with open(csv_path, 'w', encoding='utf-8') as f:
+                f.write(header + '2025-01-01 10:00:00,商户消费,商户,商品,支出,¥1.50,零钱,T1,M1,/\n')
+            df = parse(csv_path, COLUMN_MAPPING, EXTRA_COLUMNS, 'utf-8', 0)
+            chunks = list(parse_iter(csv_path, COLUMN_MAPPING, EXTRA_COLUMNS, 'utf-8', 0, chunksize=10))
+        self.assertEqual(len(df), 1)
+        self.assertNotIn('交易状态', df.columns)
+        self.assertEqual(df.loc[0, '交易金额'], '¥1.50')
+        self.assertEqual(df['收/支'].dtype, 'category')
+        pd.testing.assert_frame_equal(pd.concat(chunks), df)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,11 @@
 import unittest
+import pandas as pd
 from one_book_ledger.bill_parser.field_convert import convert_date_format,remove_sign,get_income_or_expense
+from one_book_ledger.bill_parser.field_convert import (
+    extract_account,
+    extract_description,
+    get_vectorized_converter,
+)
 
 class TestConvertDateFormat(unittest.TestCase):
 
@@ -63,5 +69,30 @@ class TestConvertDateFormat(unittest.TestCase):
         self.assertEqual(get_income_or_expense('-59.90'), '收入')
         self.assertEqual(get_income_or_expense('0.00'), '其他')
 
+class TestVectorizedConverters(unittest.TestCase):
+    """列级实现的结果应与逐行函数一致。"""
+
+    def assert_same_as_row_func(self, row_func, values):
+        series = pd.Series(values)
+        vectorized_func = get_vectorized_converter(row_func)
+        self.assertIsNotNone(vectorized_func)
+        expected = [row_func(value) for value in values]
+        self.assertEqual(vectorized_func(series).tolist(), expected)
+
+    def test_convert_date_format_series(self):
+        self.assert_same_as_row_func(convert_date_format, ['20250105', '20241231', '20251305', '20250105a', ''])
+
+    def test_remove_sign_series(self):
+        self.assert_same_as_row_func(remove_sign, ['+100.00', '-59.90', '-0', '0', 'abc', ''])
+
+    def test_get_income_or_expense_series(self):
+        self.assert_same_as_row_func(get_income_or_expense, ['100.00', '-59.90', '0.00', 'abc', ''])
+
+    def test_extract_account_series(self):
+        self.assert_same_as_row_func(extract_account, ['财付通-起点中文网', '支付宝-淘宝-天猫', '直接支付', ''])
+
+    def test_extract_description_series(self):
+        self.assert_same_as_row_func(extract_description, ['财付通-起点中文网', '支付宝-淘宝-天猫', '直接支付', ''])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,76 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+from one_book_ledger.bill_parser import parse_cache
+from one_book_ledger.bill_parser.parse_cache import CACHE_SUFFIX, ParseCache, content_hash
+
+
+ZHONGXIN_CSV = ('中信银行信用卡账单\n'
+                '交易日期,交易摘要,交易对方,交易金额\n'
+                '20250105,财付通-起点中文网,起点中文网,6.00\n'
+                '20250106,支付宝-淘宝网,淘宝网,-12.50\n')
+
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.temp_dir.name, 'cache')
+        self.csv_path = os.path.join(self.temp_dir.name, 'zhongxin.csv')
+        with open(self.csv_path, 'wb') as f:
+            f.write(ZHONGXIN_CSV.encode('gbk'))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def cache_files(self):
+        return [name for name in os.listdir(self.cache_dir) if name.endswith(CACHE_SUFFIX)]
+
+    def test_hit_returns_same_frame_without_parsing(self):
+        cache = ParseCache(self.cache_dir)
+        spec, first = cache.parse(self.csv_path)
+        self.assertEqual(spec.bill_type, '中信银行账单')
+        self.assertEqual(len(self.cache_files()), 1)
+
+        with mock.patch.object(spec, 'parse') as parse:
+            _, second = cache.parse(self.csv_path)
+        parse.assert_not_called()
+        pd.testing.assert_frame_equal(second, first)
+
+    def test_key_depends_on_content_and_parser_version(self):
+        with open(self.csv_path, 'rb') as f:
+            data = f.read()
+        self.assertEqual(content_hash(self.csv_path), content_hash(data))
+        self.assertNotEqual(content_hash(data), content_hash(data + b'\n'))
+
+        file_hash = content_hash(self.csv_path)
+        self.assertNotEqual(ParseCache(self.cache_dir, parser_version='a').key(file_hash, '中信银行账单', 1),
+                            ParseCache(self.cache_dir, parser_version='b').key(file_hash, '中信银行账单', 1))
+
+    def test_eviction_keeps_cache_under_limit(self):
+        cache = ParseCache(self.cache_dir)
+        df = pd.DataFrame({'a': range(1000)})
+        cache.put('old', df)
+        os.utime(os.path.join(self.cache_dir, 'old' + CACHE_SUFFIX), (0, 0))  # 最久未使用
+        size = os.path.getsize(os.path.join(self.cache_dir, 'old' + CACHE_SUFFIX))
+
+        cache.max_bytes = size + size // 2
+        cache.put('new', df)
+        self.assertEqual(self.cache_files(), ['new' + CACHE_SUFFIX])
+
+    def test_corrupt_entry_is_a_miss(self):
+        cache = ParseCache(self.cache_dir)
+        os.makedirs(self.cache_dir)
+        with open(os.path.join(self.cache_dir, 'bad' + CACHE_SUFFIX), 'wb') as f:
+            f.write(b'not a frame')
+        with self.assertLogs(level='WARNING'):
+            self.assertIsNone(cache.get('bad'))
+
+    def test_parser_version_is_stable(self):
+        self.assertEqual(parse_cache._parser_version(), parse_cache.PARSER_VERSION)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,8 @@
+import os
+import tempfile
 import unittest
-from one_book_ledger.bill_parser.pufa_parser import extract_account,extract_description
+import pandas as pd
+from one_book_ledger.bill_parser.pufa_parser import extract_account,extract_description,parse_pufa_excel
 
 class TestExtractFunctions(unittest.TestCase):
 
@@ -21,5 +24,21 @@ class TestExtractFunctions(unittest.TestCase):
         self.assertEqual(extract_description('已退款￥1.51'), '已退款￥1.51') # 不包含 '-'
         self.assertEqual(extract_description(''), '') # 空字符串
 
+
+class TestParsePufaExcel(unittest.TestCase):
+
+    def test_parse_xlsx(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'pufa.xlsx')
+            pd.DataFrame({'交易日期': [20250105], '记账日期': [20250106], '交易摘要': ['财付通-起点中文网'],
+                          '交易对方': ['起点中文网'], '交易金额': ['-6.00']}).to_excel(path, index=False)
+            df = parse_pufa_excel(path)
+        row = df.iloc[0]
+        self.assertEqual(row['收/付款账户'], '财付通')
+        self.assertEqual(row['交易说明'], '起点中文网')
+        self.assertEqual(row['收/支'], '收入')  # 负数表示收入
+        self.assertEqual(row['统计账单'], '浦发银行')
+        self.assertNotIn('记账日期', df.columns)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,145 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+from one_book_ledger.bill_parser import utils
+from one_book_ledger.bill_parser.utils import (
+    auto_detect_encoding,
+    auto_skip_header_lines,
+    iter_csv_chunks,
+    iter_excel_chunks,
+    read_csv_to_dataframe,
+    read_excel_to_dataframe,
+)
+
+
+CSV_TEXT = '支付宝交易记录明细查询\n账号:[test@example.com]\n交易时间,交易对方,金额\n2025-01-05 10:00:00,美团,12.50\n2025-01-06 11:00:00,起点中文网,6.00\n'
+
+
+class UploadedFile(io.BytesIO):
+    """模拟 Streamlit 的 UploadedFile：带文件名的内存文件对象。"""
+
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+class TestReadCsvToDataFrame(unittest.TestCase):
+
+    def setUp(self):
+        self.data = CSV_TEXT.encode('gbk')
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.temp_dir.name, 'bill.csv')
+        with open(self.csv_path, 'wb') as f:
+            f.write(self.data)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def assert_bill_frame(self, df):
+        self.assertEqual(list(df.columns), ['交易时间', '交易对方', '金额'])
+        self.assertEqual(df['交易对方'].tolist(), ['美团', '起点中文网'])
+
+    def test_auto_skip_header_lines_on_bytes(self):
+        self.assertEqual(auto_skip_header_lines(self.data, encoding='gbk'), 2)
+
+    def test_read_from_path(self):
+        self.assert_bill_frame(read_csv_to_dataframe(self.csv_path, encoding='gbk'))
+
+    def test_read_from_bytes(self):
+        self.assert_bill_frame(read_csv_to_dataframe(self.data, skip_lines=2, encoding='gbk'))
+
+    def test_read_from_uploaded_file(self):
+        self.assert_bill_frame(read_csv_to_dataframe(UploadedFile(self.data, 'bill.csv'), encoding='gbk'))
+
+    def test_iter_csv_chunks_from_path(self):
+        chunks = list(iter_csv_chunks(self.csv_path, 1, encoding='gbk'))
+        self.assertEqual(len(chunks), 2)
+        self.assert_bill_frame(pd.concat(chunks))
+
+    def test_read_empty_file(self):
+        empty_path = os.path.join(self.temp_dir.name, 'empty.csv')
+        open(empty_path, 'wb').close()
+        self.assertIsNone(read_csv_to_dataframe(empty_path))
+
+
+class TestAutoDetectEncoding(unittest.TestCase):
+
+    def setUp(self):
+        utils._encoding_cache.clear()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.temp_dir.name, 'bill.csv')
+        with open(self.csv_path, 'wb') as f:
+            f.write((CSV_TEXT * 20000).encode('gbk'))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_detects_on_bounded_sample(self):
+        with mock.patch.object(utils.chardet, 'detect', wraps=utils.chardet.detect) as detect:
+            encoding = auto_detect_encoding(self.csv_path)
+        self.assertIn(encoding.lower(), ('gbk', 'gb18030'))
+        sample = detect.call_args_list[0].args[0]
+        self.assertLessEqual(len(sample), utils.ENCODING_SAMPLE_SIZE)
+        self.assertTrue(sample.endswith(b'\n'))
+
+    def test_result_is_cached_per_file(self):
+        with mock.patch.object(utils.chardet, 'detect', wraps=utils.chardet.detect) as detect:
+            first = auto_detect_encoding(self.csv_path)
+            calls = detect.call_count
+            self.assertEqual(auto_detect_encoding(self.csv_path), first)
+            self.assertEqual(detect.call_count, calls)
+
+    def test_bytes_are_cached_by_content(self):
+        data = CSV_TEXT.encode('utf-8')
+        with mock.patch.object(utils.chardet, 'detect', return_value={'encoding': 'utf-8', 'confidence': 0.99}) as detect:
+            self.assertEqual(auto_detect_encoding(data), 'utf-8')
+            self.assertEqual(auto_detect_encoding(bytes(data)), 'utf-8')
+        self.assertEqual(detect.call_count, 1)
+
+    def test_low_confidence_grows_sample(self):
+        results = [{'encoding': 'gbk', 'confidence': 0.3}, {'encoding': 'gbk', 'confidence': 0.95}]
+        with mock.patch.object(utils.chardet, 'detect', side_effect=results) as detect:
+            self.assertEqual(auto_detect_encoding(self.csv_path), 'gbk')
+        first, second = (call.args[0] for call in detect.call_args_list)
+        self.assertGreater(len(second), len(first))
+
+
+
+class TestReadExcel(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.xlsx_path = os.path.join(self.temp_dir.name, 'bill.xlsx')
+        pd.DataFrame({
+            '交易日期': [20250105, None, 20250106, 20250107],
+            '交易摘要': ['财付通-起点中文网', None, '支付宝-淘宝网', '银行卡-美团外卖'],
+            '备注': ['a', None, 'b', 'c'],
+            '交易金额': ['-6.00', None, '12.50', '-3.00'],
+        }).to_excel(self.xlsx_path, index=False)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_reads_only_requested_columns(self):
+        df = read_excel_to_dataframe(self.xlsx_path, usecols=['交易日期', '交易金额'])
+        self.assertEqual(list(df.columns), ['交易日期', '交易金额'])
+        self.assertEqual(df['交易日期'].tolist(), [20250105, 20250106, 20250107])  # 空行被跳过
+        self.assertEqual(df['交易金额'].tolist(), [-6.0, 12.5, -3.0])  # 与 pd.read_excel 一样转换数字文本
+
+    def test_matches_pandas_reader(self):
+        with open(self.xlsx_path, 'rb') as f:
+            df = read_excel_to_dataframe(f.read())
+        pd.testing.assert_frame_equal(df, pd.read_excel(self.xlsx_path).dropna(how='all').reset_index(drop=True),
+                                      check_dtype=False)
+
+    def test_iter_chunks(self):
+        chunks = list(iter_excel_chunks(self.xlsx_path, 2, usecols=['交易摘要']))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+        self.assertEqual(pd.concat(chunks)['交易摘要'].tolist(), ['财付通-起点中文网', '支付宝-淘宝网', '银行卡-美团外卖'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import io
+import os
+import tempfile
+import unittest
+import pandas as pd
+from one_book_ledger.bill_parser.registry import BILL_TYPES, detect_bill_type, match_header, parse_bill
+
+
+ALIPAY_CSV = ('支付宝交易记录明细查询\n账号:[test@example.com]\n'
+              '交易时间,交易分类,交易对方,对方账号,商品说明,收/支,金额,收/付款方式,交易状态,交易订单号,商家订单号,备注\n'
+              '2025-01-05 10:00:00,餐饮美食,美团,/,外卖订单,支出,12.50,余额宝,交易成功,1,2,\n')
+WECHAT_CSV = ('微信支付账单明细\n微信昵称：[test]\n'
+              '交易时间,交易类型,交易对方,商品,收/支,金额(元),支付方式,当前状态,交易单号,商户单号,备注\n'
+              '2025-01-05 10:00:00,商户消费,美团,外卖,支出,¥12.50,零钱,支付成功,1,2,/\n')
+ZHONGXIN_CSV = ('中信银行信用卡账单\n'
+                '交易日期,交易摘要,交易对方,交易金额\n'
+                '20250105,财付通-起点中文网,起点中文网,6.00\n')
+
+
+class UploadedFile(io.BytesIO):
+    """模拟 Streamlit 的 UploadedFile：带文件名的内存文件对象。"""
+
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+class TestDetectBillType(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_detect_csv_sources(self):
+        cases = [
+            (ALIPAY_CSV.encode('gbk'), '支付宝账单', 2),
+            (WECHAT_CSV.encode('utf-8'), '微信账单', 2),
+            (ZHONGXIN_CSV.encode('gbk'), '中信银行账单', 1),
+        ]
+        for data, bill_type, skip_lines in cases:
+            spec, detected_skip_lines = detect_bill_type(self.write('bill.csv', data))
+            self.assertEqual(spec.bill_type, bill_type)
+            self.assertEqual(detected_skip_lines, skip_lines)
+
+    def test_detect_excel_source(self):
+        path = os.path.join(self.temp_dir.name, 'pufa.xlsx')
+        pd.DataFrame({'交易日期': ['20250105'], '交易摘要': ['财付通-起点中文网'],
+                      '交易对方': ['起点中文网'], '交易金额': ['6.00']}).to_excel(path, index=False)
+        spec, skip_lines = detect_bill_type(path)
+        self.assertEqual(spec.bill_type, '浦发银行账单')
+        self.assertEqual(skip_lines, 0)
+
+    def test_detect_uploaded_file(self):
+        spec, _ = detect_bill_type(UploadedFile(WECHAT_CSV.encode('utf-8'), 'wechat.csv'))
+        self.assertEqual(spec.bill_type, '微信账单')
+
+    def test_unknown_files(self):
+        self.assertEqual(detect_bill_type(self.write('notes.csv', b'a,b\n1,2\n')), (None, None))
+        self.assertEqual(detect_bill_type(self.write('notes.txt', WECHAT_CSV.encode('utf-8'))), (None, None))
+
+    def test_match_header_ignores_extra_columns(self):
+        cells = ['交易日期', '交易摘要', '交易对方', '交易金额', '卡号末四位', ' 备注 ']
+        self.assertEqual(match_header('csv', cells).bill_type, '中信银行账单')
+        self.assertIsNone(match_header('csv', ['交易日期', '交易金额']))
+
+    def test_parse_bill_with_detected_type(self):
+        df = parse_bill(self.write('bill.csv', ALIPAY_CSV.encode('gbk')))
+        self.assertEqual(df['交易对方'].tolist(), ['美团'])
+        self.assertEqual(df['统计账单'].tolist(), ['支付宝'])
+
+    def test_bill_types(self):
+        self.assertEqual(BILL_TYPES, ["微信账单", "支付宝账单", "中信银行账单", "浦发银行账单"])
+
+
+if __name__ == '__main__':
+    unittest.main()
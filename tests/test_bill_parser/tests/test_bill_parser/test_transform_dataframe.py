@@ -1,6 +1,7 @@
 import unittest
 import pandas as pd
 from one_book_ledger.bill_parser.utils import transform_dataframe  # 假设模块路径
+from one_book_ledger.bill_parser.field_convert import remove_sign, get_income_or_expense
 
 
 class TestTransformDataFrame(unittest.TestCase):
@@ -54,6 +55,21 @@ class TestTransformDataFrame(unittest.TestCase):
 
         pd.testing.assert_frame_equal(transformed_df, expected_df)
 
+    def test_transform_dataframe_with_vectorized_converter(self):
+        # 测试用例：注册了列级实现的转换函数走向量化路径
+        data = {'交易金额': ['-59.90', '100', 'abc']}
+        df = pd.DataFrame(data)
+
+        column_mapping = [
+            ('交易金额', '交易金额', remove_sign),
+            ('交易金额', '收/支', get_income_or_expense)
+        ]
+
+        transformed_df = transform_dataframe(df, column_mapping)
+
+        self.assertEqual(transformed_df['交易金额'].tolist(), ['59.90', '100.00', None])
+        self.assertEqual(transformed_df['收/支'].tolist(), ['收入', '支出', None])
+
     def convert_age(self, age):  # 用于测试的年龄转换函数
         try:
             return int(age)
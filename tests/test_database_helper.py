@@ -0,0 +1,111 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from one_book_ledger import database_helper, migrations
+from one_book_ledger.database_helper import DatabaseHelper, get_connection
+
+
+class TestSharedConnection(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, 'ledger.db')
+        patcher = mock.patch.object(database_helper, 'DATABASE_NAME', self.db_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(database_helper.close_connections)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_connection_is_reused_within_thread(self):
+        self.assertIs(DatabaseHelper().conn, DatabaseHelper().conn)
+        self.assertIs(get_connection(), get_connection(self.db_path))
+
+    def test_pragmas(self):
+        conn = get_connection()
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+        self.assertEqual(conn.execute("PRAGMA cache_size").fetchone()[0], -64 * 1024)
+
+    def test_migrations_run_once(self):
+        get_connection()
+        self.assertEqual(migrations.get_schema_version(get_connection()), migrations.SCHEMA_VERSION)
+        other = []
+        with mock.patch.object(migrations, 'MIGRATIONS', [mock.Mock() for _ in migrations.MIGRATIONS]) as patched:
+            thread = threading.Thread(target=lambda: (other.append(get_connection()), database_helper.close_connections()))
+            thread.start()
+            thread.join()
+        self.assertFalse(any(migration.called for migration in patched))  # 版本一致时不执行任何迁移
+        self.assertIsNot(other[0], get_connection())  # 每个线程使用自己的连接
+
+    def test_close_connection_keeps_shared_connection_open(self):
+        helper = DatabaseHelper()
+        conn = helper.conn
+        helper.close_connection()
+        self.assertIsNone(helper.conn)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM bill_files").fetchone()[0], 0)
+
+
+class TestTransactionsSchema(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, 'ledger.db')
+        self.addCleanup(database_helper.close_connections)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_range_queries_use_indexes(self):
+        conn = get_connection(self.db_path)
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM transactions WHERE source = ? AND time >= ? AND time < ?",
+                            ('微信', '2025-01-01', '2025-02-01')).fetchall()
+        self.assertIn('idx_transactions_source_time', str(plan))
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM transactions WHERE category = ? AND time >= ?",
+                            ('餐饮', '2025-01-01')).fetchall()
+        self.assertIn('idx_transactions_category_time', str(plan))
+
+    def test_legacy_real_amounts_are_converted_to_cents(self):
+        legacy = sqlite3.connect(self.db_path)
+        legacy.execute("CREATE TABLE transactions (id INTEGER PRIMARY KEY AUTOINCREMENT, file_id INTEGER, time TEXT, "
+                       "category TEXT, counterparty TEXT, description TEXT, amount REAL, direction TEXT, account TEXT, "
+                       "status TEXT, source TEXT)")
+        legacy.execute("INSERT INTO transactions (time, amount) VALUES ('2025-01-05 10:00:00', 12.34)")
+        legacy.commit()
+        legacy.close()
+
+        conn = get_connection(self.db_path)
+        self.assertEqual(conn.execute("SELECT amount_cents FROM transactions").fetchall(), [(1234,)])
+
+
+class TestWriteGeneration(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(database_helper, 'DATABASE_NAME', ':memory:')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(database_helper.close_connections)
+
+    def test_committed_writes_bump_generation(self):
+        helper = DatabaseHelper()
+        generation = database_helper.write_generation()
+        helper.get_bill_files()
+        self.assertEqual(database_helper.write_generation(), generation)  # 读取不影响缓存
+        self.assertTrue(helper.save_bill_file_info('a.csv', '微信账单', 'resources/a.csv', 'hash-a'))
+        self.assertEqual(database_helper.write_generation(), generation + 1)
+        self.assertFalse(helper.save_bill_file_info('b.csv', '微信账单', 'resources/b.csv', 'hash-a'))  # 重复哈希
+        self.assertEqual(database_helper.write_generation(), generation + 1)
+
+    def test_helper_can_wrap_given_connection(self):
+        conn = database_helper.open_connection(':memory:', check_same_thread=False)
+        self.addCleanup(conn.close)
+        self.assertIs(DatabaseHelper(conn).conn, conn)
+        self.assertEqual(DatabaseHelper(conn).get_bill_files(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import numpy as np
+import pandas as pd
+from DatabaseManager import DatabaseManager
+
+
+class TestBulkInsert(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = DatabaseManager(':memory:')
+        self.manager.connect()
+        self.manager.conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, amount_cents INTEGER, note TEXT)")
+        self.addCleanup(self.manager.close_connection)
+
+    def test_bulk_insert_with_missing_values(self):
+        df = pd.DataFrame({'id': [1, 2], 'amount_cents': [1250, np.nan], 'note': ['a', None]})
+        self.assertEqual(self.manager.bulk_insert(df, 't'), 2)
+        self.assertEqual(self.manager.conn.execute("SELECT * FROM t ORDER BY id").fetchall(),
+                         [(1, 1250, 'a'), (2, None, None)])
+
+    def test_failed_batch_is_rolled_back(self):
+        df = pd.DataFrame({'id': [1, 1], 'amount_cents': [1, 2], 'note': ['a', 'b']})
+        self.assertEqual(self.manager.bulk_insert(df, 't'), 0)
+        self.assertEqual(self.manager.conn.execute("SELECT COUNT(*) FROM t").fetchone(), (0,))
+        self.assertEqual(self.manager.bulk_insert(df, 't', or_ignore=True), 1)
+
+
+class TestSaveDfChunks(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = DatabaseManager(':memory:')
+        self.addCleanup(self.manager.close_connection)
+
+    def chunks(self, fail=False):
+        yield pd.DataFrame({'交易时间': ['2025-01-01'], '交易金额': [1.5]})
+        yield pd.DataFrame({'交易时间': ['2025-01-02'], '交易金额': [np.nan]})
+        if fail:
+            raise ValueError('解析失败')
+
+    def test_chunks_create_and_fill_table(self):
+        self.assertEqual(self.manager.save_df_chunks(self.chunks(), 'bill'), 2)
+        self.assertEqual(self.manager.conn.execute('SELECT "交易时间", "交易金额" FROM bill').fetchall(),
+                         [('2025-01-01', 1.5), ('2025-01-02', None)])
+
+    def test_failure_mid_stream_rolls_back_earlier_chunks(self):
+        self.assertEqual(self.manager.save_df_chunks(self.chunks(), 'bill'), 2)
+        self.assertEqual(self.manager.save_df_chunks(self.chunks(fail=True), 'bill'), 0)
+        self.assertEqual(self.manager.conn.execute("SELECT COUNT(*) FROM bill").fetchone(), (2,))
+
+
+
+class TestPagedQueries(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = DatabaseManager(':memory:')
+        self.manager.connect()
+        self.manager.conn.execute("CREATE TABLE transactions (id INTEGER PRIMARY KEY, time TEXT, source TEXT)")
+        self.manager.conn.executemany("INSERT INTO transactions (id, time, source) VALUES (?, ?, ?)", [
+            (i, f'2025-01-{i // 3 + 1:02d} 10:00:00', '微信' if i % 2 else '支付宝') for i in range(1, 11)
+        ])  # 每 3 行时间相同，翻页键必须带上 id 才能不漏不重
+        self.addCleanup(self.manager.close_connection)
+
+    def test_keyset_pages_cover_all_rows_once(self):
+        pages = list(self.manager.iter_pages('transactions', page_size=4, columns=['source']))
+        self.assertEqual([len(page) for page in pages], [4, 4, 2])
+        self.assertEqual(list(pages[0].columns), ['source'])
+
+        ids = []
+        after = None
+        while True:
+            page, after = self.manager.query_page('transactions', after=after, limit=3, descending=True)
+            ids.extend(page['id'])
+            if after is None:
+                break
+        self.assertEqual(ids, list(range(10, 0, -1)))
+
+    def test_filters_are_parameterized(self):
+        page, after = self.manager.query_page('transactions', where="source = ?", params=('微信',), limit=10)
+        self.assertEqual(page['id'].tolist(), [1, 3, 5, 7, 9])
+        self.assertIsNone(after)
+        with self.assertRaises(ValueError):
+            self.manager.query_page('transactions; DROP TABLE transactions')
+
+    def test_rows_with_null_keys_are_paged(self):
+        self.manager.conn.executemany("INSERT INTO transactions (id, time, source) VALUES (?, NULL, ?)",
+                                      [(11, '微信'), (12, '支付宝'), (13, '微信')])  # 交易时间为空的行
+        for descending in (False, True):
+            for page_size in (1, 2, 3, 4, 13, 20):
+                pages = list(self.manager.iter_pages('transactions', page_size=page_size, descending=descending))
+                ids = [row_id for page in pages for row_id in page['id']]
+                expected = [11, 12, 13] + list(range(1, 11))  # 升序时空值在前
+                self.assertEqual(ids, expected[::-1] if descending else expected, (descending, page_size))
+                self.assertTrue(all(len(page) <= page_size for page in pages))
+
+    def test_iter_query_chunks(self):
+        chunks = list(self.manager.iter_query("SELECT id FROM transactions WHERE id > ?", params=(2,), chunksize=3))
+        self.assertEqual([len(chunk) for chunk in chunks], [3, 3, 2])
+        self.assertEqual(self.manager.query_df('transactions', "SELECT COUNT(*) AS n FROM transactions WHERE id <= ?",
+                                               params=(4,))['n'][0], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
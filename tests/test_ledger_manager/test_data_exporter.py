@@ -0,0 +1,29 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from DatabaseManager import DatabaseManager
+from one_book_ledger.ledger_manager.data_exporter import export_transactions_csv
+
+
+class TestExportTransactionsCsv(unittest.TestCase):
+
+    def test_export_walks_all_pages(self):
+        manager = DatabaseManager(':memory:')
+        manager.connect()
+        self.addCleanup(manager.close_connection)
+        manager.conn.execute("CREATE TABLE transactions (id INTEGER PRIMARY KEY, time TEXT, source TEXT, amount_cents INTEGER)")
+        manager.conn.executemany("INSERT INTO transactions (time, source, amount_cents) VALUES (?, ?, ?)",
+                                 [(f'2025-01-{i % 28 + 1:02d} 10:00:00', '微信' if i % 2 else '支付宝', i) for i in range(25)])
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'ledger.csv')
+            self.assertEqual(export_transactions_csv(manager, path, where="source = ?", params=('微信',), page_size=4), 12)
+            df = pd.read_csv(path, encoding='utf-8-sig')
+        self.assertEqual(len(df), 12)
+        self.assertTrue(df['time'].is_monotonic_increasing)
+        self.assertEqual(set(df['source']), {'微信'})
+
+
+if __name__ == '__main__':
+    unittest.main()
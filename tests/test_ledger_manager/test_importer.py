@@ -0,0 +1,98 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+from one_book_ledger import database_helper
+from one_book_ledger.ledger_manager.importer import find_unimported_files, import_folder
+
+
+WECHAT_CSV = ('微信支付账单明细\n'
+              '交易时间,交易类型,交易对方,商品,收/支,金额(元),支付方式,当前状态,交易单号,商户单号,备注\n'
+              '2025-01-05 10:00:00,商户消费,美团,外卖,支出,¥12.50,零钱,支付成功,1,2,/\n'
+              '2025-01-06 09:00:00,转账,张三,/,收入,¥100.00,/,已存入零钱,3,4,/\n')
+ZHONGXIN_CSV = ('中信银行信用卡账单\n'
+                '交易日期,交易摘要,交易对方,交易金额\n'
+                '20250105,财付通-起点中文网,起点中文网,6.00\n')
+
+
+class TestImportFolder(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.bills_dir = os.path.join(self.temp_dir.name, 'resources')
+        os.makedirs(self.bills_dir)
+        self.db_path = os.path.join(self.temp_dir.name, 'ledger.db')
+        self.cache_dir = os.path.join(self.temp_dir.name, 'cache')
+        patcher = mock.patch.object(database_helper, 'DATABASE_NAME', self.db_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(database_helper.close_connections)
+        self.write('wechat.csv', WECHAT_CSV.encode('utf-8'))
+        self.write('zhongxin.csv', ZHONGXIN_CSV.encode('gbk'))
+        self.write('notes.csv', b'a,b\n1,2\n')
+        self.write('readme.txt', b'not a bill')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, data):
+        with open(os.path.join(self.bills_dir, name), 'wb') as f:
+            f.write(data)
+
+    def query(self, sql):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(sql).fetchall()
+        finally:
+            conn.close()
+
+    def test_find_unimported_files(self):
+        imported = {os.path.join(self.bills_dir, 'wechat.csv')}
+        names = [os.path.basename(path) for path in find_unimported_files(self.bills_dir, imported)]
+        self.assertEqual(names, ['notes.csv', 'zhongxin.csv'])
+
+    def test_import_folder(self):
+        progress = []
+        result = import_folder(self.bills_dir, max_workers=2, cache_dir=self.cache_dir,
+                               progress=lambda done, total, path, error: progress.append((done, total, error)))
+
+        self.assertEqual(result['files'], 2)
+        self.assertEqual(result['rows'], 3)
+        self.assertEqual(list(result['failed'].values()), ['无法识别账单类型'])
+        self.assertEqual(sorted(done for done, _, _ in progress), [1, 2, 3])
+        rows = self.query("SELECT source, time, counterparty, amount_cents, direction, account FROM transactions ORDER BY id")
+        self.assertEqual(rows, [
+            ('微信', '2025-01-05 10:00:00', '美团', 1250, '支出', '零钱'),
+            ('微信', '2025-01-06 09:00:00', '张三', 10000, '收入', '零钱'),
+            ('中信银行', '2025-01-05 00:00:00', '起点中文网', 600, '支出', '财付通'),
+        ])
+        bill_files = self.query("SELECT filename, bill_type FROM bill_files WHERE imported_at IS NOT NULL ORDER BY id")
+        self.assertEqual(bill_files, [('wechat.csv', '微信账单'), ('zhongxin.csv', '中信银行账单')])
+
+        # 再次导入时已导入的文件被跳过
+        second = import_folder(self.bills_dir, max_workers=2, cache_dir=self.cache_dir)
+        self.assertEqual(second['files'], 0)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM transactions"), [(3,)])
+
+    def test_rejected_files_are_reported_once(self):
+        first = import_folder(self.bills_dir, max_workers=1, cache_dir=None)
+        self.assertEqual(list(first['failed'].values()), ['无法识别账单类型'])
+        self.assertEqual(self.query("SELECT error FROM rejected_files"), [('无法识别账单类型',)])
+
+        # 文件未变化时不再解析，也不再报告
+        with mock.patch('one_book_ledger.ledger_manager.importer.ProcessPoolExecutor') as executor:
+            second = import_folder(self.bills_dir, max_workers=1, cache_dir=None)
+        executor.assert_not_called()
+        self.assertEqual(second['failed'], {})
+
+        # 文件被替换后重新解析并导入
+        self.write('notes.csv', ZHONGXIN_CSV.replace('6.00', '8.00').encode('gbk'))
+        os.utime(os.path.join(self.bills_dir, 'notes.csv'), ns=(0, 0))
+        third = import_folder(self.bills_dir, max_workers=1, cache_dir=None)
+        self.assertEqual((third['files'], third['failed']), (1, {}))
+        self.assertEqual(self.query("SELECT COUNT(*) FROM rejected_files"), [(0,)])
+
+
+if __name__ == '__main__':
+    unittest.main()
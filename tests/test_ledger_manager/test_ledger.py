@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+from one_book_ledger import database_helper
+from one_book_ledger.bill_parser.parse_cache import content_hash
+from one_book_ledger.database_helper import DatabaseHelper
+from one_book_ledger.ledger_manager.ledger import Ledger, amounts_to_cents, normalize_times, row_fingerprints
+
+
+def wechat_bill(rows):
+    """构造微信解析器输出格式的账单，rows 为 (交易时间, 交易对方, 交易金额)。"""
+    return pd.DataFrame({
+        '交易时间': [time for time, _, _ in rows],
+        '交易分类': '商户消费',
+        '交易对方': [counterparty for _, counterparty, _ in rows],
+        '交易说明': '/',
+        '交易金额': [amount for _, _, amount in rows],
+        '收/支': '支出',
+        '收/付款账户': '零钱',
+        '交易状态': '支付成功',
+        '统计账单': '微信',
+    })
+
+
+class TestIncrementalImport(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(database_helper, 'DATABASE_NAME', ':memory:')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(database_helper.close_connections)
+        self.db_helper = DatabaseHelper()
+        self.addCleanup(self.db_helper.close_connection)
+        self.ledger = Ledger(self.db_helper.conn)
+
+    def transactions(self):
+        return self.db_helper.conn.execute("SELECT time, counterparty FROM transactions ORDER BY time, id").fetchall()
+
+    def test_overlapping_exports_insert_only_new_rows(self):
+        first = wechat_bill([('2025-01-05 10:00:00', '美团', '¥1.00'), ('2025-01-25 10:00:00', '京东', '¥2.00'),
+                             ('2025-02-04 20:00:00', '滴滴', '¥3.00')])
+        second = wechat_bill([('2025-01-20 09:00:00', '京东', '¥9.00'), ('2025-01-25 10:00:00', '京东', '¥2.00'),
+                              ('2025-02-04 20:00:00', '滴滴', '¥3.00'), ('2025-02-10 08:00:00', '肯德基', '¥4.00')])
+        self.assertEqual(self.ledger.import_files([('a.csv', '微信账单', first)]), 3)
+
+        # 京东 ¥9.00 落在第一份账单的时段内，但指纹不同，仍然写入
+        self.assertEqual(self.ledger.import_files([('b.csv', '微信账单', second)]), 2)
+        self.assertEqual([name for _, name in self.transactions()], ['美团', '京东', '京东', '滴滴', '肯德基'])
+
+    def test_same_period_from_another_account_is_kept(self):
+        self.ledger.import_files([('a.csv', '微信账单', wechat_bill([('2025-01-05 10:00:00', '美团', '¥1.00'),
+                                                                   ('2025-01-25 10:00:00', '京东', '¥2.00')]))])
+        card = wechat_bill([('2025-01-10 10:00:00', '滴滴', '¥3.00')]).assign(**{'收/付款账户': '招商银行'})
+        self.assertEqual(self.ledger.import_files([('card.csv', '微信账单', card)]), 1)
+        self.assertEqual([name for _, name in self.transactions()], ['美团', '滴滴', '京东'])
+
+    def test_identical_rows_in_one_file_are_kept(self):
+        bill = wechat_bill([('2025-01-05 10:00:00', '地铁', '¥2.00'), ('2025-01-05 10:00:00', '地铁', '¥2.00')])
+        self.assertEqual(self.ledger.import_files([('a.csv', '微信账单', bill)]), 2)
+        self.assertEqual(self.ledger.import_files([('b.csv', '微信账单', bill)]), 0)
+
+    def test_imported_file_records_content_hash(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'wechat.csv')
+            with open(path, 'wb') as f:
+                f.write('交易时间,交易对方\n2025-01-05 10:00:00,美团\n'.encode('utf-8'))
+            self.ledger.import_files([(path, '微信账单', wechat_bill([('2025-01-05 10:00:00', '美团', '¥1.00')]))])
+            file_hash = content_hash(path)
+        # 之后上传同样内容的文件时按哈希识别为重复
+        self.assertEqual(self.db_helper.get_bill_file_by_hash(file_hash)['storage_path'], path)
+
+
+class TestFingerprintHelpers(unittest.TestCase):
+
+    def test_fingerprint_ignores_status_and_category(self):
+        bill = wechat_bill([('2025-01-05 10:00:00', '美团', '¥1.00')])
+        changed = bill.assign(交易状态='已全额退款', 交易分类='餐饮')
+        self.assertEqual(row_fingerprints(bill).tolist(), row_fingerprints(changed).tolist())
+        self.assertNotEqual(row_fingerprints(bill).tolist(), row_fingerprints(bill.assign(交易金额='¥2.00')).tolist())
+
+    def test_unparseable_values_become_null(self):
+        with self.assertLogs(level='WARNING'):
+            times = normalize_times(pd.Series(['2025-01-05 10:00:00', 'not a date', None]))
+        self.assertEqual(times.tolist(), ['2025-01-05 10:00:00', None, None])
+        with self.assertLogs(level='WARNING'):
+            cents = amounts_to_cents(pd.Series(['¥12.50', 'abc', None, '0']))
+        self.assertEqual(cents.tolist(), [1250, None, None, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from DatabaseManager import DatabaseManager
+from one_book_ledger import database_helper
+from one_book_ledger.database_helper import DatabaseHelper
+from one_book_ledger.ledger_manager.ledger import Ledger
+from one_book_ledger.ledger_manager.ledger_query import build_filters, fetch_page
+from one_book_ledger.ledger_manager.partitions import archive_year
+from tests.test_ledger_manager.test_summary import bill
+
+
+class TestLedgerQuery(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        db_path = os.path.join(self.temp_dir.name, 'ledger.db')
+        patcher = mock.patch.object(database_helper, 'DATABASE_NAME', db_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(database_helper.close_connections)
+        self.conn = DatabaseHelper().conn
+        df = bill('微信', [(f'{2024 + day // 10}-01-{day % 10 + 1:02d} 10:00:00', '餐饮', '支出', f'{day}.00', '零钱')
+                           for day in range(1, 21)])
+        df['交易对方'] = ['美团外卖' if day % 2 else '便利店' for day in range(1, 21)]
+        Ledger(self.conn).import_files([('wechat.csv', '微信账单', df)])
+        self.conn.execute("UPDATE transactions SET mirror_of = 1 WHERE id = 2")
+        self.conn.commit()
+        self.manager = DatabaseManager(db_path)
+        self.addCleanup(self.manager.close_connection)
+
+    def walk(self, limit=3, **kwargs):
+        pages = []
+        after = None
+        while True:
+            page, after = fetch_page(self.manager, after=after, limit=limit, **kwargs)
+            pages.append(page)
+            if after is None:
+                return pages
+
+    def test_pages_cover_filtered_rows_once(self):
+        where, params = build_filters(text='美团', min_amount=5)
+        pages = self.walk(where=where, params=params)
+        self.assertTrue(all(len(page) <= 3 for page in pages))
+        amounts = [amount for page in pages for amount in page['amount']]
+        self.assertEqual(sorted(amounts), [5.0, 7.0, 9.0, 11.0, 13.0, 15.0, 17.0, 19.0])
+        times = [time for page in pages for time in page['time']]
+        self.assertEqual(times, sorted(times, reverse=True))  # 默认最新在前
+
+    def test_sort_by_amount_and_time_range(self):
+        pages = self.walk(sort='amount', descending=False, start='2025-01-01')
+        self.assertEqual([amount for page in pages for amount in page['amount']], [10.0 + i for i in range(11)])
+
+    def test_mirrors_hidden_by_default(self):
+        where, params = build_filters()
+        ids = [row_id for page in self.walk(where=where, params=params) for row_id in page['id']]
+        self.assertEqual(len(ids), 19)
+        self.assertNotIn(2, ids)
+        where, params = build_filters(include_mirrors=True)
+        self.assertEqual(sum(len(page) for page in self.walk(where=where, params=params)), 20)
+
+    def test_pages_span_archived_years(self):
+        archive_year(self.manager, 2024)
+        pages = self.walk(limit=4, sort='time', descending=False)
+        self.assertEqual(sum(len(page) for page in pages), 20)
+        self.assertEqual(pages[0]['time'].iloc[0], '2024-01-02 10:00:00')
+
+    def test_build_filters(self):
+        where, params = build_filters(sources=['微信', '支付宝'], direction='支出', max_amount=12.34)
+        self.assertEqual(where, "source IN (?, ?) AND direction = ? AND amount_cents <= ? AND +mirror_of IS NULL")
+        self.assertEqual(params, ('微信', '支付宝', '支出', 1234))
+        with self.assertRaises(ValueError):
+            fetch_page(self.manager, sort='counterparty')
+
+    def routed_queries(self, **kwargs):
+        """执行 fetch_page，返回 query_page 实际发出的 SELECT 语句（参数已代入）。"""
+        self.manager.connect()
+        statements = []
+        self.manager.conn.set_trace_callback(statements.append)
+        try:
+            fetch_page(self.manager, **kwargs)
+        finally:
+            self.manager.conn.set_trace_callback(None)
+        return [sql for sql in statements if sql.startswith('SELECT') and 'transactions' in sql]
+
+    def test_pages_follow_sort_index(self):
+        where, params = build_filters()
+        archive_year(self.manager, 2024)
+        self.manager.connect()
+        self.manager.conn.execute("ALTER TABLE transactions ADD COLUMN note TEXT")  # 分区中缺少的列以 NULL 补齐
+        for sort, index in (('time', 'idx_transactions_time'), ('amount', 'idx_transactions_amount')):
+            for start in (None, '2024-06-01'):  # 不限时间，以及跨越已归档年份的时间范围
+                queries = self.routed_queries(where=where, params=params, sort=sort, limit=3, start=start,
+                                              after=(1500, 15) if sort == 'amount' else ('2025-01-05 10:00:00', 15))
+                self.assertTrue(any('p2024.transactions' in sql for sql in queries))
+                for sql in queries:
+                    plan = str(self.manager.conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall())
+                    self.assertIn(index, plan, sql)
+                    self.assertNotIn('TEMP B-TREE', plan, sql)  # 不需要对整个账簿或分区排序
+
+    def test_rows_with_empty_sort_keys_are_shown(self):
+        self.conn.execute("UPDATE transactions SET time = NULL, amount_cents = NULL WHERE id IN (3, 4)")
+        self.conn.commit()
+        for sort in ('time', 'amount'):
+            for descending in (True, False):
+                pages = self.walk(limit=3, sort=sort, descending=descending)
+                ids = [row_id for page in pages for row_id in page['id']]
+                self.assertEqual(sorted(ids), list(range(1, 21)))
+                self.assertEqual(ids[-2:] if descending else ids[:2], [4, 3] if descending else [3, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import sqlite3
+import stat
+import tempfile
+import unittest
+from unittest import mock
+from DatabaseManager import DatabaseManager
+from one_book_ledger import database_helper
+from one_book_ledger.database_helper import DatabaseHelper
+from one_book_ledger.ledger_manager.ledger import Ledger
+from one_book_ledger.ledger_manager import partitions
+from one_book_ledger.ledger_manager.partitions import archive_year
+from one_book_ledger.ledger_manager.summary import monthly_summary
+from tests.test_ledger_manager.test_summary import bill
+
+
+class TestYearPartitions(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.db_path = os.path.join(self.temp_dir.name, 'ledger.db')
+        patcher = mock.patch.object(database_helper, 'DATABASE_NAME', self.db_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(database_helper.close_connections)
+        self.conn = DatabaseHelper().conn
+        Ledger(self.conn).import_files([('wechat.csv', '微信账单', bill('微信', [
+            (f'{year}-{month:02d}-15 10:00:00', '餐饮', '支出', '10.00', '零钱')
+            for year in (2023, 2024, 2025) for month in (3, 9)]))])
+        self.manager = DatabaseManager(self.db_path)
+        self.addCleanup(self.manager.close_connection)
+
+    def test_archive_moves_year_out_of_main_store(self):
+        before = monthly_summary(self.conn)
+        self.assertEqual(archive_year(self.manager, 2023), 2)
+        path = self.manager.partition_path(2023)
+        self.assertEqual(path, os.path.join(self.temp_dir.name, 'ledger_2023.db'))
+        self.assertFalse(os.stat(path).st_mode & stat.S_IWUSR)  # 整理为只读文件
+        self.assertEqual(self.manager.partition_years(), [2023])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM transactions WHERE time < '2024'").fetchone()[0], 0)
+        self.assertTrue(monthly_summary(self.conn).equals(before))  # 统计结果不受归档影响
+
+        with self.assertRaises(FileExistsError):
+            archive_year(self.manager, 2023)
+        self.assertEqual(archive_year(self.manager, 2020), 0)
+        self.assertFalse(os.path.exists(self.manager.partition_path(2020)))
+
+    def test_interrupted_archive_is_resumed(self):
+        before = monthly_summary(self.conn)
+        with mock.patch.object(partitions, '_delete_archived', side_effect=sqlite3.OperationalError('disk I/O error')):
+            with self.assertRaises(sqlite3.OperationalError):
+                archive_year(self.manager, 2023)
+        # 复制已提交、删除未执行：交易仍在主库中，没有丢失
+        self.assertTrue(os.path.exists(self.manager.partition_path(2023)))
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM transactions WHERE time < '2024'").fetchone()[0], 2)
+
+        self.assertEqual(archive_year(self.manager, 2023), 2)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM transactions WHERE time < '2024'").fetchone()[0], 0)
+        self.assertEqual(len(self.manager.query_range('transactions')), 6)
+        self.assertTrue(monthly_summary(self.conn).equals(before))
+
+    def test_queries_touch_only_overlapping_partitions(self):
+        archive_year(self.manager, 2023)
+        archive_year(self.manager, 2024)
+        df = self.manager.query_range('transactions', start='2023-06-01', end='2024-06-01', columns=['time'])
+        self.assertEqual(df['time'].tolist(), ['2023-09-15 10:00:00', '2024-03-15 10:00:00'])
+        self.assertEqual(self.manager._attached, {2023, 2024})
+
+        df = self.manager.query_range('transactions', start='2025-01-01', columns=['time'])
+        self.assertEqual(len(df), 2)
+        self.assertEqual(self.manager._attached, set())  # 不再需要的分区已分离
+
+        pages = list(self.manager.iter_pages('transactions', page_size=4, columns=['time']))
+        self.assertEqual([len(page) for page in pages], [4, 2])
+        times = [time for page in pages for time in page['time']]
+        self.assertEqual(times, sorted(times))
+        self.assertEqual(self.manager._attached, {2023, 2024})
+
+    def test_pages_read_each_partition_through_its_index(self):
+        archive_year(self.manager, 2023)
+        self.manager.connect()
+        self.manager.conn.execute("ALTER TABLE transactions ADD COLUMN note TEXT")  # 归档后新增的列，分区中以 NULL 补齐
+        statements = []
+        self.manager.conn.set_trace_callback(statements.append)
+        try:
+            for key in (('time', 'id'), ('amount_cents', 'id')):
+                page, after = self.manager.query_page('transactions', limit=2, descending=True, key=key)
+                self.manager.query_page('transactions', limit=2, descending=True, key=key, after=after)
+        finally:
+            self.manager.conn.set_trace_callback(None)
+        queries = [sql for sql in statements if sql.startswith('SELECT') and 'transactions' in sql]
+        self.assertTrue(any('p2023.transactions' in sql for sql in queries))
+        for sql in queries:
+            plan = str(self.manager.conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall())
+            self.assertIn('USING INDEX', plan, sql)
+            self.assertNotIn('TEMP B-TREE', plan, sql)  # 不对整个分区排序
+
+    def test_files_with_archived_rows_cannot_be_removed(self):
+        archive_year(self.manager, 2023)
+        ledger = Ledger(self.conn)
+        with self.assertRaises(ValueError):
+            ledger.remove_file('wechat.csv')
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0], 4)  # 主库未改动
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM bill_files WHERE imported_at IS NOT NULL").fetchone()[0], 1)
+
+        # 只有主库中交易的文件仍可撤销
+        ledger.import_files([('recent.csv', '微信账单', bill('微信', [('2025-12-01 10:00:00', '餐饮', '支出', '8.00', '零钱')]))])
+        self.assertEqual(ledger.remove_file('recent.csv'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
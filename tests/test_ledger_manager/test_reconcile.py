@@ -0,0 +1,69 @@
+import sqlite3
+import unittest
+import pandas as pd
+from one_book_ledger.ledger_manager.reconcile import match_mirrors, reconcile
+
+
+def transactions(rows):
+    return pd.DataFrame(rows, columns=['id', 'time', 'amount_cents', 'direction', 'source', 'account'])
+
+
+class TestMatchMirrors(unittest.TestCase):
+
+    def test_wallet_payment_funded_by_card(self):
+        df = transactions([
+            (1, '2025-01-05 23:50:00', 1250, '支出', '微信', '中信银行信用卡(1234)'),
+            (2, '2025-01-06 00:00:00', 1250, '支出', '中信银行', '财付通'),
+            (3, '2025-01-05 10:00:00', 3000, '支出', '支付宝', '浦发银行信用卡'),
+            (4, '2025-01-07 00:00:00', 3000, '支出', '浦发银行', '支付宝'),
+        ])
+        self.assertEqual(sorted(match_mirrors(df)), [(2, 1), (4, 3)])
+
+    def test_non_matching_rows(self):
+        df = transactions([
+            (1, '2025-01-05 10:00:00', 1250, '支出', '微信', '零钱'),  # 零钱支付，银行没有记录
+            (2, '2025-01-05 00:00:00', 1250, '支出', '中信银行', '财付通'),
+            (3, '2025-01-05 10:00:00', 800, '支出', '微信', '中信银行信用卡'),
+            (4, '2025-01-05 00:00:00', 800, '支出', '中信银行', '支付宝'),  # 渠道不一致
+            (5, '2025-01-05 10:00:00', 900, '支出', '支付宝', '中信银行信用卡'),
+            (6, '2025-01-20 00:00:00', 900, '支出', '中信银行', '支付宝'),  # 超出时间窗口
+            (7, '2025-01-05 10:00:00', 700, '收入', '支付宝', '中信银行信用卡'),
+            (8, '2025-01-05 00:00:00', 700, '支出', '中信银行', '支付宝'),  # 收支方向不一致
+        ])
+        self.assertEqual(match_mirrors(df), [])
+
+    def test_repeated_amounts_pair_one_to_one(self):
+        df = transactions([
+            (1, '2025-01-01 08:00:00', 500, '支出', '微信', '中信银行信用卡'),
+            (2, '2025-01-02 08:00:00', 500, '支出', '微信', '中信银行信用卡'),
+            (3, '2025-01-10 08:00:00', 500, '支出', '微信', '中信银行信用卡'),
+            (4, '2025-01-02 00:00:00', 500, '支出', '中信银行', '财付通'),
+            (5, '2025-01-01 00:00:00', 500, '支出', '中信银行', '财付通'),
+        ])
+        self.assertEqual(match_mirrors(df), [(5, 1), (4, 2)])
+        self.assertEqual(match_mirrors(df, window=pd.Timedelta(hours=1)), [])
+
+
+class TestReconcile(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute("CREATE TABLE transactions (id INTEGER PRIMARY KEY, time TEXT, amount_cents INTEGER, direction TEXT, "
+                          "source TEXT, account TEXT, mirror_of INTEGER)")
+        self.conn.executemany("INSERT INTO transactions (id, time, amount_cents, direction, source, account) VALUES (?, ?, ?, ?, ?, ?)", [
+            (1, '2025-01-05 23:50:00', 1250, '支出', '微信', '中信银行信用卡(1234)'),
+            (2, '2025-01-06 00:00:00', 1250, '支出', '中信银行', '财付通'),
+        ])
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_marks_bank_side_once(self):
+        self.assertEqual(reconcile(self.conn), 1)
+        self.assertEqual(self.conn.execute("SELECT id, mirror_of FROM transactions ORDER BY id").fetchall(),
+                         [(1, None), (2, 1)])
+        self.assertEqual(reconcile(self.conn), 0)  # 已配对的记录不再参与对账
+
+
+if __name__ == '__main__':
+    unittest.main()
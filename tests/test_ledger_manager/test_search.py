@@ -0,0 +1,82 @@
+import sqlite3
+import unittest
+from unittest import mock
+from one_book_ledger import database_helper, migrations
+from one_book_ledger.database_helper import DatabaseHelper
+from one_book_ledger.ledger_manager.ledger import Ledger
+from one_book_ledger.ledger_manager.search import fts_query, fts_text, search_transactions
+from tests.test_ledger_manager.test_summary import bill
+
+
+class TestFtsText(unittest.TestCase):
+
+    def test_cjk_runs_become_bigrams(self):
+        self.assertEqual(fts_text('财付通-起点中文网'), '财付 付通 - 起点 点中 中文 文网 通 网')
+        self.assertEqual(fts_text('KFC肯德基'), 'KFC 肯德 德基 基')
+        self.assertEqual(fts_text('美'), '美')
+        self.assertEqual(fts_text(None), '')
+
+    def test_query_phrases(self):
+        self.assertEqual(fts_query('起点中文网'), '"起点 点中 中文 文网"')
+        self.assertEqual(fts_query('美'), '"美" *')
+        self.assertEqual(fts_query('美团 外卖'), '"美团" AND "外卖"')
+        self.assertEqual(fts_query('a"b'), '"a""b"')
+        self.assertIsNone(fts_query(' - '))
+
+
+class TestSearchTransactions(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(database_helper, 'DATABASE_NAME', ':memory:')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(database_helper.close_connections)
+        self.conn = DatabaseHelper().conn
+        self.ledger = Ledger(self.conn)
+        df = bill('微信', [
+            ('2025-01-05 10:00:00', '餐饮', '支出', '30.00', '零钱'),
+            ('2025-01-06 10:00:00', '文化', '支出', '6.00', '零钱'),
+            ('2025-01-07 10:00:00', '餐饮', '支出', '18.00', '零钱'),
+        ])
+        df['交易对方'] = ['美团外卖', '起点中文网', '肯德基KFC']
+        df['交易说明'] = ['美团订单', '月票', '汉堡']
+        self.ledger.import_files([('wechat.csv', '微信账单', df)])
+
+    def search(self, text, **kwargs):
+        return search_transactions(self.conn, text, **kwargs)['counterparty'].tolist()
+
+    def test_substring_search(self):
+        self.assertEqual(self.search('美团'), ['美团外卖'])
+        self.assertEqual(self.search('中文'), ['起点中文网'])
+        self.assertEqual(self.search('起点中文网'), ['起点中文网'])
+        self.assertEqual(self.search('网'), ['起点中文网'])
+        self.assertEqual(self.search('kfc'), ['肯德基KFC'])
+        self.assertEqual(self.search('外卖 订单'), ['美团外卖'])
+        self.assertEqual(self.search('起中'), [])
+
+    def test_column_and_source_filters(self):
+        self.assertEqual(self.search('订单', column='description'), ['美团外卖'])
+        self.assertEqual(self.search('订单', column='counterparty'), [])
+        self.assertEqual(self.search('美团', source='支付宝'), [])
+        self.assertEqual(search_transactions(self.conn, '汉堡')['amount'].tolist(), [18.0])
+        with self.assertRaises(ValueError):
+            search_transactions(self.conn, '美团', column='account')
+
+    def test_index_follows_deletes(self):
+        self.ledger.remove_file('wechat.csv')
+        self.assertEqual(self.search('美团'), [])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM transactions_fts").fetchone()[0], 0)
+
+    def test_existing_transactions_are_indexed_once(self):
+        conn = sqlite3.connect(':memory:')
+        self.addCleanup(conn.close)
+        conn.execute("CREATE TABLE transactions (id INTEGER PRIMARY KEY AUTOINCREMENT, counterparty TEXT, description TEXT)")
+        conn.execute("INSERT INTO transactions (counterparty, description) VALUES ('美团', '外卖')")
+        conn.commit()
+        migrations._add_transactions_fts(conn)
+        migrations._add_transactions_fts(conn)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM transactions_fts").fetchone()[0], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
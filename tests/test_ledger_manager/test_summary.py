@@ -0,0 +1,73 @@
+import unittest
+from unittest import mock
+import pandas as pd
+from one_book_ledger import database_helper
+from one_book_ledger.database_helper import DatabaseHelper
+from one_book_ledger.ledger_manager.ledger import Ledger
+from one_book_ledger.ledger_manager.summary import income_expense_by_month, monthly_summary
+
+
+def bill(source, rows):
+    """构造解析器输出格式的账单，rows 为 (交易时间, 交易分类, 收/支, 交易金额, 收/付款账户)。"""
+    return pd.DataFrame({
+        '交易时间': [row[0] for row in rows],
+        '交易分类': [row[1] for row in rows],
+        '交易对方': '商户',
+        '交易说明': [f'商品{i}' for i in range(len(rows))],
+        '交易金额': [row[3] for row in rows],
+        '收/支': [row[2] for row in rows],
+        '收/付款账户': [row[4] for row in rows],
+        '交易状态': '支付成功',
+        '统计账单': source,
+    })
+
+
+class TestMonthlySummary(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(database_helper, 'DATABASE_NAME', ':memory:')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(database_helper.close_connections)
+        self.conn = DatabaseHelper().conn
+        self.ledger = Ledger(self.conn)
+        self.ledger.import_files([
+            ('wechat.csv', '微信账单', bill('微信', [
+                ('2025-01-05 10:00:00', '餐饮', '支出', '12.50', '中信银行信用卡'),
+                ('2025-01-20 10:00:00', '餐饮', '支出', '7.50', '零钱'),
+                ('2025-02-01 09:00:00', '工资', '收入', '100.00', '零钱'),
+            ])),
+            ('zhongxin.csv', '中信银行账单', bill('中信银行', [
+                ('2025-01-06 00:00:00', '餐饮', '支出', '12.50', '财付通'),
+            ])),
+        ])
+
+    def summary(self):
+        return monthly_summary(self.conn)[['month', 'source', 'category', 'direction', 'amount', 'count']].values.tolist()
+
+    def test_summary_matches_full_scan(self):
+        self.assertEqual(self.summary(), [
+            ['2025-01', '中信银行', '餐饮', '支出', 12.5, 1],
+            ['2025-01', '微信', '餐饮', '支出', 20.0, 2],
+            ['2025-02', '微信', '工资', '收入', 100.0, 1],
+        ])
+        totals = income_expense_by_month(self.conn, source='微信')
+        self.assertEqual(totals.loc['2025-01', '支出'], 20.0)
+        self.assertEqual(totals.loc['2025-02', '收入'], 100.0)
+
+    def test_mirror_rows_are_excluded(self):
+        self.conn.execute("UPDATE transactions SET mirror_of = 1 WHERE source = '中信银行'")
+        self.assertEqual([row[1] for row in self.summary()], ['微信', '微信'])
+        self.conn.execute("UPDATE transactions SET mirror_of = NULL WHERE source = '中信银行'")
+        self.assertEqual(len(self.summary()), 3)
+
+    def test_removing_an_import_batch(self):
+        self.assertEqual(self.ledger.remove_file('wechat.csv'), 3)
+        self.assertEqual(self.summary(), [['2025-01', '中信银行', '餐饮', '支出', 12.5, 1]])
+        # 撤销后可以重新导入
+        self.assertEqual(self.ledger.import_files([('wechat.csv', '微信账单', bill('微信', [
+            ('2025-01-05 10:00:00', '餐饮', '支出', '12.50', '零钱')]))]), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
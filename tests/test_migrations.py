@@ -0,0 +1,73 @@
+import sqlite3
+import unittest
+from unittest import mock
+from one_book_ledger import migrations
+from one_book_ledger.migrations import SCHEMA_VERSION, get_schema_version, migrate
+
+
+def table_columns(conn, table_name):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table_name})")]
+
+
+class TestMigrate(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.addCleanup(self.conn.close)
+
+    def test_new_database(self):
+        self.assertEqual(migrate(self.conn), SCHEMA_VERSION)
+        self.assertEqual(get_schema_version(self.conn), SCHEMA_VERSION)
+        tables = {row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.assertTrue({'bill_files', 'bill_types', 'transactions', 'category_cache',
+                         'monthly_summary', 'transactions_fts', 'rejected_files'} <= tables)
+        self.assertNotIn('import_coverage', tables)
+        self.assertIn('fingerprint', table_columns(self.conn, 'transactions'))
+
+    def test_current_version_runs_no_migrations(self):
+        migrate(self.conn)
+        with mock.patch.object(migrations, 'MIGRATIONS', [mock.Mock() for _ in migrations.MIGRATIONS]) as patched:
+            self.assertEqual(migrate(self.conn), SCHEMA_VERSION)
+        self.assertFalse(any(migration.called for migration in patched))
+
+    def test_upgrade_unversioned_database_in_batches(self):
+        #  迁移机制之前创建的数据库：user_version 为 0，金额以 REAL 保存，缺少后来新增的列
+        self.conn.execute("CREATE TABLE bill_files (id INTEGER PRIMARY KEY AUTOINCREMENT, filename TEXT NOT NULL, "
+                          "bill_type TEXT NOT NULL, storage_path TEXT NOT NULL, upload_timestamp DATETIME)")
+        self.conn.execute("CREATE TABLE transactions (id INTEGER PRIMARY KEY AUTOINCREMENT, file_id INTEGER, time TEXT, "
+                          "category TEXT, counterparty TEXT, description TEXT, amount REAL, direction TEXT, "
+                          "account TEXT, status TEXT, source TEXT)")
+        self.conn.executemany("INSERT INTO transactions (time, counterparty, amount, direction, source) VALUES (?, ?, ?, ?, ?)",
+                              [(f'2025-01-{day:02d} 10:00:00', '美团外卖', day + 0.5, '支出', '微信') for day in range(1, 8)])
+        self.conn.commit()
+
+        with mock.patch.object(migrations, 'MIGRATION_BATCH_SIZE', 3):
+            migrate(self.conn)
+        self.assertIn('imported_at', table_columns(self.conn, 'bill_files'))
+        self.assertEqual([row[0] for row in self.conn.execute("SELECT amount_cents FROM transactions ORDER BY id")],
+                         [day * 100 + 50 for day in range(1, 8)])
+        self.assertEqual(self.conn.execute("SELECT amount_cents, tx_count FROM monthly_summary").fetchall(), [(3150, 7)])
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM transactions_fts WHERE transactions_fts MATCH '美团'")
+                         .fetchone()[0], 7)
+
+    def test_failed_migration_keeps_earlier_versions(self):
+        def broken(conn):
+            with migrations._transaction(conn) as cursor:
+                cursor.execute("CREATE TABLE half_done (id INTEGER)")
+                cursor.execute("SELECT * FROM missing_table")
+
+        with mock.patch.object(migrations, 'MIGRATIONS', migrations.MIGRATIONS[:2] + [broken]), \
+                mock.patch.object(migrations, 'SCHEMA_VERSION', 3):
+            with self.assertRaises(sqlite3.OperationalError):
+                migrate(self.conn)
+        self.assertEqual(get_schema_version(self.conn), 2)
+        self.assertIsNone(self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'half_done'").fetchone())
+
+    def test_newer_database_is_rejected(self):
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+        with self.assertRaises(sqlite3.DatabaseError):
+            migrate(self.conn)
+
+
+if __name__ == '__main__':
+    unittest.main()
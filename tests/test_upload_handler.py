@@ -0,0 +1,80 @@
+import io
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+from one_book_ledger import database_helper, upload_handler
+from one_book_ledger.upload_handler import bill_file_uploader
+
+
+ZHONGXIN_CSV = ('中信银行信用卡账单\n'
+                '交易日期,交易摘要,交易对方,交易金额\n'
+                '20250105,财付通-起点中文网,起点中文网,6.00\n').encode('gbk')
+
+
+class UploadedFile(io.BytesIO):
+    """模拟 Streamlit 的 UploadedFile：带文件名的内存文件对象。"""
+
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+class TestBillFileUploader(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.resources_dir = os.path.join(self.temp_dir.name, 'resources')
+        os.makedirs(self.resources_dir)
+        self.db_path = os.path.join(self.temp_dir.name, 'ledger.db')
+        for patcher in (mock.patch.object(database_helper, 'DATABASE_NAME', self.db_path),
+                        mock.patch.object(upload_handler, 'RESOURCES_DIR', self.resources_dir)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(database_helper.close_connections)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def bill_files(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute("SELECT filename, bill_type, storage_path, content_hash FROM bill_files").fetchall()
+        finally:
+            conn.close()
+
+    def test_upload_is_stored_by_content_hash(self):
+        result = bill_file_uploader(UploadedFile(ZHONGXIN_CSV, 'zhongxin.csv'))
+        self.assertTrue(result['status'])
+
+        [(filename, bill_type, storage_path, content_hash)] = self.bill_files()
+        self.assertEqual((filename, bill_type), ('zhongxin.csv', '中信银行账单'))
+        self.assertEqual(os.path.basename(storage_path), f'{content_hash}.csv')
+        with open(storage_path, 'rb') as f:
+            self.assertEqual(f.read(), ZHONGXIN_CSV)
+
+    def test_duplicate_upload_is_skipped_before_parsing(self):
+        bill_file_uploader(UploadedFile(ZHONGXIN_CSV, 'zhongxin.csv'))
+        with mock.patch.object(upload_handler, 'detect_bill_type') as detect:
+            result = bill_file_uploader(UploadedFile(ZHONGXIN_CSV, 'copy.csv'))
+        detect.assert_not_called()
+        self.assertFalse(result['status'])
+        self.assertTrue(result['duplicate'])
+        self.assertIn('zhongxin.csv', result['message'])
+        self.assertEqual(len(self.bill_files()), 1)
+        self.assertEqual(len(os.listdir(self.resources_dir)), 1)
+
+    def test_unique_index_rejects_same_hash(self):
+        helper = database_helper.DatabaseHelper()
+        try:
+            self.assertTrue(helper.save_bill_file_info('a.csv', '中信银行账单', 'a.csv', 'abc'))
+            self.assertFalse(helper.save_bill_file_info('b.csv', '中信银行账单', 'b.csv', 'abc'))
+            self.assertEqual(helper.get_bill_file_by_hash('abc')['filename'], 'a.csv')
+            self.assertIsNone(helper.get_bill_file_by_hash('missing'))
+        finally:
+            helper.close_connection()
+
+
+if __name__ == '__main__':
+    unittest.main()
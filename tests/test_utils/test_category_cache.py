@@ -0,0 +1,80 @@
+import sqlite3
+import unittest
+from unittest import mock
+import pandas as pd
+from one_book_ledger.utils import category_cache
+from one_book_ledger.utils.category_cache import CategoryMemo, classify
+from one_book_ledger.utils.utils import TransactionType
+
+
+def create_cache_table(conn):
+    conn.execute("""
+        CREATE TABLE category_cache (
+            counterparty_key TEXT NOT NULL,
+            summary_key TEXT NOT NULL,
+            rules_version TEXT NOT NULL,
+            category TEXT NOT NULL,
+            PRIMARY KEY (counterparty_key, summary_key)
+        )
+    """)
+
+
+class TestCategoryMemo(unittest.TestCase):
+
+    def setUp(self):
+        category_cache._category_lru.clear()
+        category_cache._purged_versions.clear()
+        self.conn = sqlite3.connect(':memory:')
+        create_cache_table(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_classify_falls_back_to_counterparty(self):
+        self.assertEqual(classify('麦当劳', '起点中文网'), TransactionType.DINING.value)
+        self.assertEqual(classify('某商户', '地铁出行'), TransactionType.TRANSPORTATION.value)
+        self.assertEqual(classify('', None), TransactionType.UNKNOWN.value)
+
+    def test_categorize_computes_each_pair_once(self):
+        memo = CategoryMemo(self.conn)
+        counterparties = pd.Series(['麦当劳', '麦当劳', '地铁', None])
+        summaries = pd.Series(['午餐', '午餐', '', None])
+        with mock.patch.object(category_cache, 'classify', wraps=classify) as classify_mock:
+            result = memo.categorize(counterparties, summaries)
+        self.assertEqual(result.tolist(), [TransactionType.DINING.value, TransactionType.DINING.value,
+                                           TransactionType.TRANSPORTATION.value, TransactionType.UNKNOWN.value])
+        self.assertEqual(classify_mock.call_count, 3)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM category_cache").fetchone()[0], 3)
+
+    def test_persistent_cache_survives_lru_reset(self):
+        CategoryMemo(self.conn).lookup([('麦当劳', '午餐')])
+        category_cache._category_lru.clear()
+        with mock.patch.object(category_cache, 'classify') as classify_mock:
+            results = CategoryMemo(self.conn).lookup([('麦当劳', '午餐')])
+        classify_mock.assert_not_called()
+        self.assertEqual(results[('麦当劳', '午餐')], TransactionType.DINING.value)
+
+    def test_rules_version_change_invalidates(self):
+        self.conn.execute("INSERT INTO category_cache VALUES ('麦当劳', '午餐', 'old-version', '其他')")
+        self.conn.commit()
+        results = CategoryMemo(self.conn).lookup([('麦当劳', '午餐')])
+        self.assertEqual(results[('麦当劳', '午餐')], TransactionType.DINING.value)
+        versions = self.conn.execute("SELECT DISTINCT rules_version FROM category_cache").fetchall()
+        self.assertEqual(versions, [(category_cache.RULES_VERSION,)])
+
+    def test_purge_leaves_callers_transaction_open(self):
+        self.conn.execute("INSERT INTO category_cache VALUES ('麦当劳', '午餐', 'old-version', '其他')")
+        CategoryMemo(self.conn)
+        self.assertTrue(self.conn.in_transaction)
+        self.conn.rollback()
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM category_cache").fetchone()[0], 0)
+
+        # 没有未提交的事务时再清理
+        self.conn.execute("INSERT INTO category_cache VALUES ('麦当劳', '午餐', 'old-version', '其他')")
+        self.conn.commit()
+        CategoryMemo(self.conn)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM category_cache").fetchone()[0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import datetime
+import re
+import unittest
+import pandas as pd
+from one_book_ledger.utils.utils import (
+    TRANSACTION_TYPE_RULES,
+    TransactionType,
+    categorize,
+    parse_amount,
+    parse_amount_series,
+    parse_datetime,
+    parse_datetime_series,
+    standardize_transaction_type,
+)
+
+
+SUMMARIES = [
+    '麦当劳', '星巴克咖啡', '地铁出行', '淘宝购物', '电影票', '超市发', '水果店', '手机', '服装店',
+    '化妆品', '图书', '酒店住宿', '房租', '水费', '话费充值', '理财产品', '工资', '分红',
+    '利息', '退税', '信用卡还款', '提现', '付款', '转账', '充值', '退款', '收入-工资',
+    '支出-转账', ' food ', ' KFC ', 'KTV', '起点中文网', '', '美团外卖',
+]
+
+
+def sequential_transaction_type(summary):
+    """逐条 re.search 的参考实现，用于校验合并后的正则保持了原有优先级。"""
+    summary = summary.lower()
+    for transaction_type, keywords in TRANSACTION_TYPE_RULES:
+        if re.search(f'^({keywords})', summary):
+            return transaction_type.value
+    return TransactionType.UNKNOWN.value
+
+
+class TestStandardizeTransactionType(unittest.TestCase):
+
+    def test_matches_sequential_rules(self):
+        for summary in SUMMARIES:
+            self.assertEqual(standardize_transaction_type(summary), sequential_transaction_type(summary), summary)
+
+    def test_priority_order(self):
+        self.assertEqual(standardize_transaction_type('超市发'), TransactionType.SHOPPING.value)  # 购物消费优先于商超购物
+        self.assertEqual(standardize_transaction_type('电影票'), TransactionType.ENTERTAINMENT.value)  # 休闲娱乐优先于图书音像
+        self.assertEqual(standardize_transaction_type('起点中文网'), TransactionType.UNKNOWN.value)
+
+    def test_categorize_series(self):
+        series = pd.Series(SUMMARIES + [None, '麦当劳'], index=range(10, 10 + len(SUMMARIES) + 2))
+        result = categorize(series)
+        expected = [sequential_transaction_type(summary) for summary in SUMMARIES]
+        expected += [TransactionType.UNKNOWN.value, TransactionType.DINING.value]
+        self.assertEqual(result.tolist(), expected)
+        self.assertTrue(result.index.equals(series.index))
+
+
+class TestParseAmountSeries(unittest.TestCase):
+
+    AMOUNTS = ['12.50', '-3', '1,234.56', '¥12.50', '￥1,000.00', '$-5.20', 'CNY 88.80', 'cny66', '¥1.2.3', 'abc', '']
+
+    def test_matches_parse_amount(self):
+        result = parse_amount_series(pd.Series(self.AMOUNTS))
+        self.assertEqual(result.tolist(), [parse_amount(amount) for amount in self.AMOUNTS])
+        self.assertEqual(result.dtype, 'float64')
+
+    def test_numeric_input_and_missing_values(self):
+        result = parse_amount_series(pd.Series([1.5, None, 2], index=[5, 6, 7], dtype=object))
+        self.assertEqual(result.loc[5], 1.5)
+        self.assertTrue(pd.isna(result.loc[6]))
+        self.assertEqual(result.loc[7], 2.0)
+
+    def test_failures_are_reported_once(self):
+        with self.assertLogs(level='WARNING') as logs:
+            parse_amount_series(pd.Series(['abc', 'def', '1.00']))
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('2 个金额解析失败', logs.output[0])
+
+
+class TestParseDatetimeSeries(unittest.TestCase):
+
+    def test_wallet_format(self):
+        values = ['2024-01-02 03:04:05', '2024-12-31 23:59:59']
+        result = parse_datetime_series(pd.Series(values))
+        self.assertEqual(result.tolist(), [parse_datetime(value) for value in values])
+
+    def test_bank_dates_as_strings_and_ints(self):
+        expected = [datetime.datetime(2024, 1, 2), datetime.datetime(2024, 2, 29)]
+        self.assertEqual(parse_datetime_series(pd.Series(['20240102', '20240229'])).tolist(), expected)
+        self.assertEqual(parse_datetime_series(pd.Series([20240102, 20240229])).tolist(), expected)
+
+    def test_outliers_fall_back_per_value(self):
+        series = pd.Series(['2024-01-02 03:04:05', '2024/01/03', None, '', 'bad'], index=[10, 11, 12, 13, 14])
+        with self.assertLogs(level='WARNING') as logs:
+            result = parse_datetime_series(series)
+        self.assertEqual(result.loc[10], datetime.datetime(2024, 1, 2, 3, 4, 5))
+        self.assertEqual(result.loc[11], datetime.datetime(2024, 1, 3))
+        self.assertTrue(result.loc[[12, 13, 14]].isna().all())
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn('1 个日期时间解析失败', logs.output[0])
+
+
+if __name__ == '__main__':
+    unittest.main()